@@ -1,5 +1,7 @@
 from xoa_core.types import PluginAbstract
 from typing import TYPE_CHECKING, List
+from loguru import logger
+from .plugin.command_trace import CommandTracer, trace_phase
 from .plugin.config_checkers import check_test_type_config
 from .plugin.tc_base import TestCaseProcessor
 from .plugin.test_resource import ResourceManager
@@ -28,9 +30,10 @@ class TestSuite2544(PluginAbstract["PluginModel2544"]):
     async def __pre_test(self) -> None:
         """ check config and configure ports and streams"""
         check_test_type_config(self._test_type_conf)
-        await self.resources.init_resource(
-            self.cfg.test_types_configuration.latency_test.latency_mode,
-        )
+        with trace_phase("setup_ports"):
+            await self.resources.init_resource(
+                self.cfg.test_types_configuration.latency_test.latency_mode,
+            )
 
     async def __do_test(self) -> None:
         """ configure tests and run traffic """
@@ -42,6 +45,20 @@ class TestSuite2544(PluginAbstract["PluginModel2544"]):
         await self.resources.free()
 
     async def start(self) -> None:
-        await self.__pre_test()
-        await self.__do_test()
-        await self.__post_test()
+        tracer = CommandTracer().install(self.testers.values()) if self.__test_conf.command_trace_path else None
+        try:
+            try:
+                await self.__pre_test()
+                await self.__do_test()
+                await self.__post_test()
+            except BaseException:
+                # the periodic job errors must not replace the exception of the test
+                for error in await self.resources.scheduler.stop(raise_error=False):
+                    logger.warning(f"Periodic job failed: {error!r}")
+                raise
+            await self.resources.scheduler.stop()
+        finally:
+            logger.debug(f"Periodic jobs: {self.resources.scheduler.metrics}")
+            if tracer:
+                tracer.uninstall()
+                tracer.export(self.__test_conf.command_trace_path, self.__test_conf.command_trace_format)
@@ -1,12 +1,24 @@
 import re
 from enum import Enum
 from random import randint
-from typing import Any, Callable, Dict, Generator, List, Optional
+from typing import Any, Callable, Dict, Generator, List, NamedTuple, Optional, Tuple
 from pydantic import BaseModel, Field
 from pydantic.class_validators import validator
 from xoa_driver.enums import ProtocolOption, ModifierAction
 from ..utils.exceptions import ModifierRangeError
 
+
+def ones_complement_sum(data: bytes) -> int:
+    """
+    one's complement sum of the big endian 16 bit words of data.
+    2 ** 16 is 1 modulo 0xFFFF, so the sum is the whole data as one int modulo 0xFFFF, computed in C,
+    except that data which is not all zero sums to 0xFFFF rather than 0.
+    """
+    padded = int.from_bytes(data, "big") << (8 * (len(data) % 2))  # odd length is padded with a zero byte
+    total = padded % 0xFFFF
+    return 0xFFFF if not total and padded else total
+
+
 class BinaryString(str):
     @classmethod
     def __get_validators__(cls) -> Generator[Callable, None, None]:
@@ -225,10 +237,22 @@ class SegmentField(BaseModel):
         return self.value.is_all_zero
 
 
+class PackedLayout(NamedTuple):
+    """ segment packed into an int, built from the field values once """
+    values: Tuple[str, ...]  # field values the layout was built from
+    static: int  # fields without value range, value range fields are zero
+    byte_length: int
+    value_ranges: Tuple[Tuple[int, int], ...]  # index and shift of the value range fields
+
+
 class ProtocolSegment(BaseModel):
     type: SegmentType
     fields: List[SegmentField]
     checksum_offset: Optional[int]
+    _packed_layout: Optional[PackedLayout] = None
+
+    class Config:
+        underscore_attrs_are_private = True
 
     def __init__(self, **data: Dict[str, Any]) -> None:
         super().__init__(**data)
@@ -248,25 +272,38 @@ class ProtocolSegment(BaseModel):
         return value
 
     def __wrap_add_16(self, data: bytearray, offset_num: int) -> bytearray:
-        checksum = 0
-        data[offset_num + 0] = 0
-        data[offset_num + 1] = 0
-        for i in range(0, len(data), 2):
-            w = (data[i + 0] << 8) + data[i + 1]
-            checksum += w
-            if checksum > 0xFFFF:
-                checksum = (1 + checksum) & 0xFFFF  # add carry back in as lsb
-        data[offset_num + 0] = 0xFF + 1 + (~(checksum >> 8))
-        data[offset_num + 1] = 0xFF + 1 + (~(checksum & 0xFF))
+        data[offset_num : offset_num + 2] = b"\x00\x00"
+        checksum = ones_complement_sum(data)
+        data[offset_num : offset_num + 2] = (~checksum & 0xFFFF).to_bytes(2, "big")
         return data
 
+    def __get_packed_layout(self) -> "PackedLayout":
+        values = tuple([f.value for f in self.fields])
+        if self._packed_layout is not None and self._packed_layout.values == values:
+            return self._packed_layout
+        static = 0
+        bit_length = 0
+        value_range_ends = []
+        for index, f in enumerate(self.fields):
+            field_bit_length = f.bit_length if f.value_range else len(f.value)
+            static = (static << field_bit_length) | (0 if f.value_range else int(f.value, 2))
+            bit_length += field_bit_length
+            if f.value_range:
+                value_range_ends.append((index, bit_length))
+        self._packed_layout = PackedLayout(
+            values=values,
+            static=static,
+            byte_length=(bit_length + 7) // 8,
+            value_ranges=tuple((index, bit_length - end) for index, end in value_range_ends),
+        )
+        return self._packed_layout
+
     def prepare(self) -> bytearray:
-        result = ""
-        for f in self.fields:
-            field_binary_string = f.prepare()
-            result += field_binary_string
-        result = int(result, 2).to_bytes((len(result) + 7) // 8, byteorder="big")
-        result = bytearray(result)
+        layout = self.__get_packed_layout()
+        packed = layout.static
+        for index, shift in layout.value_ranges:
+            packed |= self.fields[index].value_range.get_current_value() << shift  # type: ignore[union-attr]
+        result = bytearray(packed.to_bytes(layout.byte_length, byteorder="big"))
         if self.checksum_offset:
             result = self.__wrap_add_16(result, self.checksum_offset)
         return result
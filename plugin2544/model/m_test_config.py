@@ -102,6 +102,7 @@ class L23LearningOptions(BaseModel):
     # ArpNdpOptions
     arp_refresh_enabled: bool
     arp_refresh_period_second: float = Field(default=4000.0, gt=0, le=100000)
+    arp_refresh_mode: const.ArpRefreshMode = const.ArpRefreshMode.PACKETS
     use_gateway_mac_as_dmac: bool
 
 
@@ -123,6 +124,7 @@ class MacLearningOptions(BaseModel):
     # MacLearningOptions
     mac_learning_mode: const.MACLearningMode
     mac_learning_frame_count: int = Field(gt=0, le=10)
+    mac_learning_round_gap_ms: int = Field(default=const.DELAY_LEARNING_MAC * 1000, ge=0, le=10000)
     toggle_port_sync_config: TogglePortSyncConfig
 
 
@@ -134,7 +136,12 @@ class TestExecutionConfig(BaseModel):
     l23_learning_options: L23LearningOptions
     flow_based_learning_options: FlowBasedLearningOptions
     reset_error_handling: ResetErrorHandling
+    counters_settle_ms: int = Field(default=const.DELAY_STATISTICS * 1000, ge=0, le=60000)  # counters unchanged this long after traffic stopped
     repeat_test_until_stopped: bool = False
+    result_journal_path: str = ""  # empty string means no journal
+    resume_from_journal: bool = False
+    command_trace_path: str = ""  # empty string means no command trace
+    command_trace_format: const.TraceFormat = const.TraceFormat.JSON
 
 
 class TestConfigModel(BaseModel):
@@ -53,6 +53,8 @@ class ThroughputTest(BaseModel):
     pass_criteria_throughput_pct: float
     acceptable_loss_pct: float
     collect_latency_jitter: bool
+    use_early_termination: bool = False
+    use_parallel_port_groups: bool = False
 
 
 class RateSweepOptions(BaseModel):
@@ -0,0 +1,87 @@
+import math
+from copy import deepcopy
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional, Tuple
+from .statistics import FinalStatistic
+
+
+@dataclass
+class RunningStatistic:
+    """ Welford's online mean and variance, with min and max """
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    minimum: float = math.inf
+    maximum: float = -math.inf
+
+    def update(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "mean": round(self.mean, 3),
+            "std": round(self.std, 3),
+            "min": self.minimum,
+            "max": self.maximum,
+        }
+
+
+def _numeric_fields(data: Dict[str, Any], prefix: str = "") -> Iterator[Tuple[str, float]]:
+    for name, value in data.items():
+        if isinstance(value, dict):
+            yield from _numeric_fields(value, f"{prefix}{name}.")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield f"{prefix}{name}", value
+
+
+class RepetitionAccumulator:
+    """
+    Accumulate the final statistic of every repetition in constant memory.
+    The average is the same as summing up all the final statistics and averaging them,
+    mean/std/min/max of the total statistic are updated on every repetition and reported with the average.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self._sum: Optional[FinalStatistic] = None
+        self.running: Dict[str, RunningStatistic] = {}
+
+    def add(self, result: "FinalStatistic") -> None:
+        if self._sum is None:
+            self._sum = deepcopy(result)
+        else:
+            self._sum.sum(result)
+        self.count += 1
+        values = dict(_numeric_fields(result.total.dict(), "total."))
+        values["tx_rate_percent"] = result.tx_rate_percent
+        for name, value in values.items():
+            self.running.setdefault(name, RunningStatistic()).update(value)
+
+    def average(self) -> Optional["FinalStatistic"]:
+        if self._sum is None:
+            return None
+        final = deepcopy(self._sum)
+        final.repetition = "avg"
+        final.avg(self.count)
+        return final
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """ mean/std/min/max of the fields which differ between the repetitions so far """
+        return {
+            name: running.to_dict()
+            for name, running in self.running.items()
+            if running.minimum != running.maximum
+        }
@@ -4,25 +4,30 @@ such as a MAC address, associated with a given internet layer address, typically
 """
 
 import asyncio
-from typing import TYPE_CHECKING
+import time
+from typing import TYPE_CHECKING, Dict, List, Tuple
 from xoa_driver import utils, enums
 from .common import is_same_ipnetwork
+from ..utils import constants as const
 from ..utils.field import IPv4Address, IPv6Address, MacAddress
 from ..utils.packet import Ether, IPV4Packet, IPV6Packet
 from ..utils.traffic_definitions import EtherType
-from ..utils.constants import DELAY_LEARNING_ARP
 from ..utils.exceptions import ARPRequestError
 
 
 if TYPE_CHECKING:
+    from xoa_driver import misc
     from .structure import PortStruct
     from ..utils.field import IPAddress
 
+ArpKey = Tuple[str, str, str]  # port name, source ip, destination ip
+
 
 async def set_arp_request(
     port_struct: "PortStruct",
     peer_struct: "PortStruct",
     use_gateway_mac_as_dmac: bool,
+    arp_resolver: "ArpResolver",
 ) -> "MacAddress":
     """ 
     ARP request requires:
@@ -67,7 +72,7 @@ async def set_arp_request(
             """
             destination_ip = peer_ip_properties.public_address
             
-        arp_mac = await send_arp_request(port_struct, ip_properties.address, destination_ip)
+        arp_mac = await arp_resolver.resolve(port_struct, ip_properties.address, destination_ip)
         if is_gateway_scenario:
             """
             YOU have the responsibility to store the MAC address and use it in the test stream configuration phase as the DMAC of all streams on the port. 
@@ -101,21 +106,93 @@ def get_packet_header(
     return packet_header
 
 
-async def send_arp_request(
-    port_struct: "PortStruct",
-    source_ip: "IPAddress",
-    destination_ip: "IPAddress",
-) -> "MacAddress":
-    """ 
-    Create a stream to query arp request 
-    Use PS_ARPREQUEST to let xenaserver to send out an ARP/NDP request, wait for response, and resolve the MAC address for you. 
-    If the ARP/NDP is successful, you will get the MAC address from the variable. 
-    If not, you will get an error response. This ARP process may take some milliseconds. You can wait until you have a result.
+class ArpResolver:
     """
-    packet_header = get_packet_header(port_struct, source_ip, destination_ip)
+    Use PS_ARPREQUEST to let xenaserver send out an ARP/NDP request, wait for the response and resolve the MAC address.
+    All the addresses are resolved at the same time, each port reuses a pool of up to streams_per_port dummy streams,
+    and the request is polled with a growing delay until the reply arrives instead of sleeping a fixed time.
+    Resolved MAC addresses are cached for ttl seconds.
+    """
+
+    def __init__(
+        self,
+        ttl: float = const.ARP_CACHE_TTL_SECOND,
+        streams_per_port: int = const.ARP_RESOLVER_STREAMS_PER_PORT,
+    ) -> None:
+        self.ttl = ttl
+        self.streams_per_port = streams_per_port
+        self._cache: Dict[ArpKey, Tuple["MacAddress", float]] = {}  # key -> mac address, expiry
+        self._resolving: Dict[ArpKey, "asyncio.Task[MacAddress]"] = {}
+        self._idle_streams: Dict[str, "asyncio.Queue[misc.GenuineStream]"] = {}
+        self._streams: Dict[str, List["misc.GenuineStream"]] = {}
+        self._stream_count: Dict[str, int] = {}  # created and being created streams per port
+
+    async def resolve(
+        self,
+        port_struct: "PortStruct",
+        source_ip: "IPAddress",
+        destination_ip: "IPAddress",
+    ) -> "MacAddress":
+        key = (port_struct.port_identity.name, str(source_ip), str(destination_ip))
+        cached = self._cache.get(key)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+        if key not in self._resolving:  # the same address asked again while resolving
+            self._resolving[key] = asyncio.create_task(
+                self._resolve(key, port_struct, source_ip, destination_ip)
+            )
+        return await self._resolving[key]
+
+    async def _resolve(
+        self,
+        key: ArpKey,
+        port_struct: "PortStruct",
+        source_ip: "IPAddress",
+        destination_ip: "IPAddress",
+    ) -> "MacAddress":
+        try:
+            stream = await self._acquire_stream(port_struct)
+            try:
+                mac_address = await send_arp_request(
+                    stream, get_packet_header(port_struct, source_ip, destination_ip)
+                )
+            finally:
+                self._idle_streams[key[0]].put_nowait(stream)
+            self._cache[key] = (mac_address, time.monotonic() + self.ttl)
+            return mac_address
+        finally:
+            del self._resolving[key]
+
+    async def _acquire_stream(self, port_struct: "PortStruct") -> "misc.GenuineStream":
+        name = port_struct.port_identity.name
+        idle_streams = self._idle_streams.setdefault(name, asyncio.Queue())
+        streams = self._streams.setdefault(name, [])
+        if idle_streams.empty() and self._stream_count.get(name, 0) < self.streams_per_port:
+            # reserve the slot before awaiting, the other resolvers of the port see it at once
+            self._stream_count[name] = self._stream_count.get(name, 0) + 1
+            try:
+                stream = await create_arp_stream(port_struct)
+            except BaseException:
+                self._stream_count[name] -= 1
+                raise
+            streams.append(stream)
+            return stream
+        return await idle_streams.get()
+
+    async def release_streams(self) -> None:
+        """ delete the dummy streams before the test streams are created, the cache is kept """
+        streams = [stream for port_streams in self._streams.values() for stream in port_streams]
+        self._streams.clear()
+        self._stream_count.clear()
+        self._idle_streams.clear()
+        await asyncio.gather(*[stream.delete() for stream in streams])
+
+
+async def create_arp_stream(port_struct: "PortStruct") -> "misc.GenuineStream":
+    """ Create a dummy stream to query arp request, the packet header is set per request """
     stream = await port_struct.create_stream()
     ip_protocol = enums.ProtocolOption.IP if port_struct.protocol_version.is_ipv4 else enums.ProtocolOption.IPV6
-    await utils.apply(  # Make a dummy stream to send arp
+    await utils.apply(
         stream.packet.limit.set(-1),
         stream.comment.set("Stream 0 / 0"),
         stream.rate.fraction.set(0),
@@ -124,7 +201,6 @@ async def send_arp_request(
         stream.packet.header.protocol.set(
             [enums.ProtocolOption.ETHERNET, ip_protocol]
         ),
-        stream.packet.header.data.set(packet_header),
         stream.packet.length.set(enums.LengthType.FIXED, 64, 1518),  # PS_PACKETLENGTH
         stream.payload.content.set(enums.PayloadType.INCREMENTING, "00"),
         stream.tpld_id.set(-1),
@@ -133,11 +209,26 @@ async def send_arp_request(
         stream.gateway.ipv6.set("::"),
         stream.enable.set(enums.OnOffWithSuppress.ON),
     )
-    await asyncio.sleep(DELAY_LEARNING_ARP) # make sure stream config is set
-    try:
-        result, *_ = await utils.apply(stream.request.arp.get())
-    except:
-        raise ARPRequestError()
-    peer_mac_address = MacAddress(result.mac_address)
-    await stream.delete()   # need to delete the stream after arp request
-    return peer_mac_address
+    return stream
+
+
+async def send_arp_request(
+    stream: "misc.GenuineStream", packet_header: str
+) -> "MacAddress":
+    """
+    If the ARP/NDP is successful, you will get the MAC address from the variable.
+    If not, you will get an error response. This ARP process may take some milliseconds,
+    so the request is repeated until the reply arrives or ARP_REQUEST_TIMEOUT passes.
+    """
+    await stream.packet.header.data.set(packet_header)
+    deadline = time.monotonic() + const.ARP_REQUEST_TIMEOUT
+    delay = const.INTERVAL_ARP_REQUEST_RETRY
+    while True:
+        try:
+            result, *_ = await utils.apply(stream.request.arp.get())
+            return MacAddress(result.mac_address)
+        except Exception:
+            if time.monotonic() + delay > deadline:
+                raise ARPRequestError()
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, const.DELAY_LEARNING_ARP)
@@ -0,0 +1,269 @@
+import asyncio
+import functools
+import json
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+from xoa_driver.internals.core.transporter.handler import TransportationHandler
+from ..utils import constants as const
+
+if TYPE_CHECKING:
+    from xoa_driver.testers import GenericAnyTester
+
+NO_PHASE = "other"
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+_current_phase: ContextVar[str] = ContextVar("command_trace_phase", default=NO_PHASE)
+_active_tracer: ContextVar[Optional["CommandTracer"]] = ContextVar("command_tracer", default=None)
+_connection_tracers: Dict[int, "CommandTracer"] = {}  # id of a traced connection -> its tracer
+_handler_originals: Optional[Tuple[Any, Any]] = None
+T = TypeVar("T")
+
+
+@dataclass
+class CommandRecord:
+    name: str
+    module_index: Optional[int]
+    port_index: Optional[int]
+    phase: str
+    batch_size: int = 1
+    sent: float = 0.0
+    latency: Optional[float] = None  # second, None until the reply arrives
+
+
+@dataclass
+class SpanRecord:
+    """ a phase or a sleep """
+    name: str
+    category: str
+    start: float
+    end: float = 0.0
+
+
+@dataclass
+class LatencyHistogram:
+    buckets: List[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1))
+    count: int = 0
+    total: float = 0.0
+    maximum: float = 0.0
+
+    def add(self, latency: float) -> None:
+        latency_ms = latency * 1000
+        self.buckets[bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+        self.count += 1
+        self.total += latency_ms
+        self.maximum = max(self.maximum, latency_ms)
+
+    def to_dict(self) -> Dict[str, Any]:
+        bounds = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 4) if self.count else 0.0,
+            "max_ms": round(self.maximum, 4),
+            "buckets": {bound: count for bound, count in zip(bounds, self.buckets) if count},
+        }
+
+
+class CommandTracer:
+    """
+    Record every command sent through xoa-driver: name, port, phase, batch size and latency.
+    Hooked into the driver connection class, so utils.apply, gathered tokens and awaited tokens are all traced,
+    but only the connections of the testers given to install are recorded, concurrent test runs keep their own tracer.
+    """
+
+    def __init__(self) -> None:
+        self.records: List[CommandRecord] = []
+        self.spans: List[SpanRecord] = []
+        self.started = time.perf_counter()
+        self._pending: Dict[int, List[CommandRecord]] = {}  # connection -> records prepared but not sent
+        self._connections: List[int] = []
+        self._context_token: Optional[Any] = None
+
+    def install(self, testers: Iterable["GenericAnyTester"]) -> "CommandTracer":
+        if self._context_token is not None:
+            return self
+        connections = [id(tester._conn) for tester in testers]
+        if any(connection in _connection_tracers for connection in connections):
+            raise RuntimeError("the testers are already traced by another command tracer")
+        _patch_handler()
+        for connection in connections:
+            _connection_tracers[connection] = self
+        self._connections = connections
+        self._context_token = _active_tracer.set(self)
+        return self
+
+    def uninstall(self) -> None:
+        if self._context_token is None:
+            return
+        _active_tracer.reset(self._context_token)
+        self._context_token = None
+        for connection in self._connections:
+            _connection_tracers.pop(connection, None)
+        self._connections = []
+        if not _connection_tracers:
+            _restore_handler()
+
+    def _on_prepare(self, conn: "TransportationHandler", request: Any, future: "asyncio.Future") -> None:
+        header = request.header
+        record = CommandRecord(
+            name=request.class_name,
+            module_index=None if header.module_index == 0xFF else header.module_index,
+            port_index=None if header.port_index == 0xFF else header.port_index,
+            phase=_current_phase.get(),
+        )
+        self._pending.setdefault(id(conn), []).append(record)
+
+        def on_done(_: "asyncio.Future") -> None:
+            record.latency = time.perf_counter() - record.sent
+
+        future.add_done_callback(on_done)
+
+    def _on_send(self, conn: "TransportationHandler") -> None:
+        batch = self._pending.pop(id(conn), [])
+        now = time.perf_counter()
+        for record in batch:
+            record.sent = now
+            record.batch_size = len(batch)
+        self.records.extend(batch)
+
+    def add_span(self, name: str, category: str, start: float, end: float) -> None:
+        self.spans.append(SpanRecord(name, category, start, end))
+
+    def histograms(self) -> Dict[str, Dict[str, LatencyHistogram]]:
+        """ phase -> command name -> latency histogram, "*" is all the commands of the phase """
+        result: Dict[str, Dict[str, LatencyHistogram]] = {}
+        for record in self.records:
+            if record.latency is None:
+                continue
+            per_phase = result.setdefault(record.phase, {})
+            for name in ("*", record.name):
+                per_phase.setdefault(name, LatencyHistogram()).add(record.latency)
+        return result
+
+    def summary(self) -> Dict[str, Any]:
+        batches: Dict[str, List[int]] = {}
+        for record in self.records:
+            batches.setdefault(record.phase, []).append(record.batch_size)
+        phases = {}
+        for phase, per_command in self.histograms().items():
+            sizes = batches.get(phase, [])
+            phases[phase] = {
+                "commands": len(sizes),
+                "mean_batch_size": round(sum(sizes) / len(sizes), 2) if sizes else 0.0,
+                "latency": per_command["*"].to_dict(),
+                "by_command": {
+                    name: histogram.to_dict()
+                    for name, histogram in sorted(per_command.items())
+                    if name != "*"
+                },
+            }
+        return {
+            "duration_second": round(time.perf_counter() - self.started, 3),
+            "commands": len(self.records),
+            "phases": phases,
+            "sleeps": {
+                "count": sum(1 for span in self.spans if span.category == "sleep"),
+                "total_second": round(
+                    sum(span.end - span.start for span in self.spans if span.category == "sleep"), 3
+                ),
+            },
+        }
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """ trace event format, viewable in chrome://tracing or Perfetto """
+        def us(moment: float) -> float:
+            return round((moment - self.started) * 1e6, 1)
+
+        thread_ids: Dict[str, int] = {"phases": 0}
+        events: List[Dict[str, Any]] = []
+        for span in self.spans:
+            events.append({
+                "name": span.name, "cat": span.category, "ph": "X", "pid": 1, "tid": 0,
+                "ts": us(span.start), "dur": round((span.end - span.start) * 1e6, 1),
+            })
+        for record in self.records:
+            if record.port_index is None:
+                thread = "chassis" if record.module_index is None else f"module {record.module_index}"
+            else:
+                thread = f"port {record.module_index}/{record.port_index}"
+            events.append({
+                "name": record.name, "cat": record.phase, "ph": "X", "pid": 1,
+                "tid": thread_ids.setdefault(thread, len(thread_ids)),
+                "ts": us(record.sent), "dur": round((record.latency or 0.0) * 1e6, 1),
+                "args": {"batch_size": record.batch_size},
+            })
+        for thread, tid in thread_ids.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": thread}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export(self, path: str, trace_format: "const.TraceFormat") -> None:
+        data = self.chrome_trace() if trace_format == const.TraceFormat.CHROME else self.summary()
+        with open(path, "w") as trace_file:
+            json.dump(data, trace_file)
+
+
+def _patch_handler() -> None:
+    """ hook the driver connection class once, the hooks look up the tracer of the connection """
+    global _handler_originals
+    if _handler_originals is not None:
+        return
+    prepare_data, send = TransportationHandler.prepare_data, TransportationHandler.send
+
+    async def traced_prepare_data(conn: "TransportationHandler", request: Any) -> Tuple[bytes, "asyncio.Future"]:
+        data, future = await prepare_data(conn, request)
+        tracer = _connection_tracers.get(id(conn))
+        if tracer is not None:
+            tracer._on_prepare(conn, request, future)
+        return data, future
+
+    def traced_send(conn: "TransportationHandler", data: bytes) -> None:
+        tracer = _connection_tracers.get(id(conn))
+        if tracer is not None:
+            tracer._on_send(conn)
+        send(conn, data)
+
+    _handler_originals = (prepare_data, send)
+    TransportationHandler.prepare_data = traced_prepare_data  # type: ignore[assignment]
+    TransportationHandler.send = traced_send  # type: ignore[assignment]
+
+
+def _restore_handler() -> None:
+    global _handler_originals
+    if _handler_originals is None:
+        return
+    TransportationHandler.prepare_data, TransportationHandler.send = _handler_originals  # type: ignore[assignment]
+    _handler_originals = None
+
+
+@contextmanager
+def trace_phase(name: str) -> Iterator[None]:
+    """ commands sent inside the block, and in the tasks it starts, are recorded under this phase """
+    token = _current_phase.set(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _current_phase.reset(token)
+        tracer = _active_tracer.get()
+        if tracer is not None:
+            tracer.add_span(name, "phase", start, time.perf_counter())
+
+
+def trace_sleep(name: str, start: float) -> None:
+    """ record a sleep which started at start and ends now """
+    tracer = _active_tracer.get()
+    if tracer is not None:
+        tracer.add_span(name, "sleep", start, time.perf_counter())
+
+
+def traced_phase(name: str) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """ decorator running a coroutine function inside trace_phase """
+    def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            with trace_phase(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
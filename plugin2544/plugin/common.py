@@ -1,13 +1,20 @@
 import re
-from typing import TYPE_CHECKING, Dict, List, Tuple, Union
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple, Union
+from xoa_driver import utils
 from ..utils import constants as const, field
 
 
 if TYPE_CHECKING:
+    from xoa_driver import misc
     from .structure import PortStruct
     from ..model.m_port_config import PortConfiguration
 
 
+async def apply_all(tokens: List["misc.Token"]) -> List[Any]:
+    """ like utils.apply without its limit of 200 tokens, the tokens must share one tester connection """
+    return [reply async for reply in utils.apply_iter(*tokens)]
+
+
 def gen_macaddress(first_three_bytes: str, index: int) -> "field.MacAddress":
     hex_num = hex(index)[2:].zfill(6)
     last_three_bytes = "".join(re.findall(r".{2}", hex_num))
@@ -0,0 +1,193 @@
+import math
+from array import array
+from typing import Dict, List, Sequence, Tuple, TYPE_CHECKING
+from .statistics import DelayCounter, PortCounter, StreamCounter, StreamStatisticData
+from ..utils import constants as const
+
+if TYPE_CHECKING:
+    from .structure import PortStruct
+    from .stream_struct import StreamStruct
+
+
+PT_COLUMNS = ("frames", "bps", "pps")
+PR_COLUMNS = (
+    "frames",
+    "bps",
+    "pps",
+    "bytes_count",
+    "live_loss_frames",
+    "latency_min",
+    "latency_avg",
+    "latency_max",
+    "jitter_min",
+    "jitter_avg",
+    "jitter_max",
+)
+
+
+def _valid_delay(value: int, counter_type: "const.CounterType") -> int:
+    """ tester reports counter_type value when there is no delay data, same as DelayData """
+    return 0 if value == counter_type.value else value
+
+
+class CounterStore:
+    """
+    Columnar storage of the raw PT/PR counters read by the statistic snapshot.
+    PT slots are contiguous per TX port and PR slots are contiguous per RX port,
+    so port aggregation is a sum/min/max over an array slice.
+    Pydantic models are only built when the port statistic is reported.
+    """
+
+    def __init__(self) -> None:
+        self.pt: Dict[str, "array[int]"] = {name: array("q") for name in PT_COLUMNS}
+        self.pr: Dict[str, "array[int]"] = {name: array("q") for name in PR_COLUMNS}
+        self.pt_ranges: Dict[str, Tuple[int, int]] = {}  # tx port name -> PT slot range
+        self.pr_ranges: Dict[str, Tuple[int, int]] = {}  # rx port name -> PR slot range
+        self.pr_index: Dict[Tuple[str, str, int], int] = {}  # (rx port, tx port, tpld id) -> PR slot
+
+    @property
+    def pt_count(self) -> int:
+        return len(self.pt["frames"])
+
+    @property
+    def pr_count(self) -> int:
+        return len(self.pr["frames"])
+
+    def build(self, port_structs: List["PortStruct"]) -> None:
+        """ preallocate one PT slot per stream and one PR slot per (stream, rx port) """
+        for column in (*self.pt.values(), *self.pr.values()):
+            del column[:]
+        for port_struct in port_structs:
+            start = self.pt_count
+            for stream_struct in port_struct.stream_structs:
+                stream_struct.bind_pt_slot(self, self.pt_count)
+                for column in self.pt.values():
+                    column.append(0)
+            self.pt_ranges[port_struct.port_identity.name] = (start, self.pt_count)
+
+        for rx_port in port_structs:
+            start = self.pr_count
+            for port_struct in port_structs:
+                for stream_struct in port_struct.stream_structs:
+                    if not stream_struct.is_rx_port(rx_port):
+                        continue
+                    key = (
+                        rx_port.port_identity.name,
+                        port_struct.port_identity.name,
+                        stream_struct.tpld_id,
+                    )
+                    self.pr_index[key] = self.pr_count
+                    stream_struct.bind_pr_slot(self, rx_port, self.pr_count)
+                    for column in self.pr.values():
+                        column.append(0)
+            self.pr_ranges[rx_port.port_identity.name] = (start, self.pr_count)
+
+    def write_pt(self, slot: int, frames: int, bps: int, pps: int) -> None:
+        self.pt["frames"][slot] = frames
+        self.pt["bps"][slot] = bps
+        self.pt["pps"][slot] = pps
+
+    def write_pr(
+        self,
+        slot: int,
+        frames: int,
+        bps: int,
+        pps: int,
+        bytes_count: int,
+        live_loss_frames: int,
+        latency: Tuple[int, int, int],
+        jitter: Tuple[int, int, int],
+    ) -> None:
+        pr = self.pr
+        pr["frames"][slot] = frames
+        pr["bps"][slot] = bps
+        pr["pps"][slot] = pps
+        pr["bytes_count"][slot] = bytes_count
+        pr["live_loss_frames"][slot] = live_loss_frames
+        for prefix, counter_type, values in (
+            ("latency", const.CounterType.LATENCY, latency),
+            ("jitter", const.CounterType.JITTER, jitter),
+        ):
+            minimum, average, maximum = values
+            pr[f"{prefix}_min"][slot] = _valid_delay(minimum, counter_type)
+            pr[f"{prefix}_avg"][slot] = _valid_delay(average, counter_type)
+            pr[f"{prefix}_max"][slot] = _valid_delay(maximum, counter_type)
+
+    @staticmethod
+    def _delay_counter(
+        minimums: Sequence[int], averages: Sequence[int], maximums: Sequence[int]
+    ) -> "DelayCounter":
+        """ same result as updating a DelayCounter with every pr stream delay data """
+        counter = DelayCounter()
+        count = len(averages)
+        if not count:
+            return counter
+        total = sum(averages)
+        counter.minimum = min(minimums)
+        counter.maximum = max(maximums)
+        counter._total = total
+        counter._count = count
+        counter.average = math.floor(total / count)
+        return counter
+
+    def _stream_delay_counter(self, prefix: str, slots: List[int]) -> "DelayCounter":
+        return self._delay_counter(
+            *(
+                [self.pr[f"{prefix}_{name}"][s] for s in slots]
+                for name in ("min", "avg", "max")
+            )
+        )
+
+    def stream_statistic(
+        self, stream_struct: "StreamStruct", src_port_addr: str, dest_port_addr: str
+    ) -> "StreamStatisticData":
+        """ build the reported stream statistic from the stream's PT slot and PR slots """
+        pt_slot = stream_struct.pt_slot
+        pr_slots = stream_struct.pr_slots
+        pr = self.pr
+        return StreamStatisticData(
+            src_port_id=stream_struct.tx_port.port_identity.name,
+            dest_port_id=stream_struct.rx_port.port_identity.name,
+            src_port_addr=src_port_addr,
+            dest_port_addr=dest_port_addr,
+            burst_frames=stream_struct.packet_limit,
+            tx_counter=StreamCounter(
+                frames=self.pt["frames"][pt_slot],
+                bps=self.pt["bps"][pt_slot],
+                pps=self.pt["pps"][pt_slot],
+            ),
+            rx_counter=StreamCounter(
+                frames=sum(pr["frames"][s] for s in pr_slots),
+                bps=sum(pr["bps"][s] for s in pr_slots),
+                pps=sum(pr["pps"][s] for s in pr_slots),
+                bytes_count=sum(pr["bytes_count"][s] for s in pr_slots),
+            ),
+            latency=self._stream_delay_counter("latency", pr_slots),
+            jitter=self._stream_delay_counter("jitter", pr_slots),
+            live_loss_frames=sum(
+                max(0, pr["live_loss_frames"][s]) for s in pr_slots
+            ),
+        )
+
+    def aggregate_rx_port(self, port_struct: "PortStruct") -> None:
+        """ aggregate the contiguous PR slots of a rx port into its port statistic """
+        start, end = self.pr_ranges.get(port_struct.port_identity.name, (0, 0))
+        if start == end:
+            return
+        statistic = port_struct.statistic
+        rx_counter: "PortCounter" = statistic.rx_counter
+        pr = self.pr
+        rx_counter.frames += sum(pr["frames"][start:end])
+        rx_counter.bps += sum(pr["bps"][start:end])
+        rx_counter.pps += sum(pr["pps"][start:end])
+        rx_counter.bytes_count += sum(pr["bytes_count"][start:end])
+        for prefix in ("latency", "jitter"):
+            setattr(
+                statistic,
+                prefix,
+                self._delay_counter(
+                    pr[f"{prefix}_min"][start:end],
+                    pr[f"{prefix}_avg"][start:end],
+                    pr[f"{prefix}_max"][start:end],
+                ),
+            )
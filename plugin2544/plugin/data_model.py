@@ -15,6 +15,8 @@ class ArpRefreshData:
     source_ip: Union[IPv4Address, IPv6Address, None]
     source_mac: Optional[MacAddress]
     addr_range: Optional[range]
+    addr_offset: int  # byte offset of the modifier of the address range in the address
+    addr_mask: str  # mask of that modifier, hex string as 'FFFF'
 
 
 @dataclass(frozen=True)
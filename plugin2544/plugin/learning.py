@@ -1,38 +1,34 @@
 import math
 import asyncio
-from xoa_driver import utils
-from typing import TYPE_CHECKING, Iterator, List, Optional, Tuple, Union
+from xoa_driver import enums, misc, utils
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple, Union
+from .common import apply_all
 from .data_model import ArpRefreshData
 from .setup_source_port_rates import setup_source_port_rates
 from ..utils import exceptions, constants as const
-from ..utils.scheduler import schedule
 from ..utils.field import IPv4Address, IPv6Address
 from ..utils.packet import ARPPacket, MacAddress, NDPPacket
 from loguru import logger
 
 if TYPE_CHECKING:
-    from xoa_driver import misc
+    from ..model.m_protocol_segment import HWModifier
     from .test_resource import ResourceManager
     from .structure import PortStruct
 
 
-def get_dest_ip_modifier_addr_range(
+def get_dest_ip_modifier(
     port_struct: "PortStruct",
-) -> Optional[range]:
+) -> Optional["HWModifier"]:
     header_segments = port_struct.port_conf.profile.segments
     for header_segment in header_segments:
-        if (not header_segment.type.is_ipv4) or (not header_segment.type.is_ipv6):
+        if (not header_segment.type.is_ipv4) and (not header_segment.type.is_ipv6):
             continue
 
         for field in header_segment.fields:
             if field.name in ("Dest IP Addr", "Dest IPv6 Addr") and (
                 modifier := field.hw_modifier
             ):
-                return range(
-                    modifier.start_value,
-                    modifier.stop_value + 1,
-                    modifier.step_value,
-                )
+                return modifier
     return None
 
 
@@ -43,10 +39,18 @@ def add_address_refresh_entry(
 ) -> None:  # AddAddressRefreshEntry
     """ARP REFRESH STEP 1: generate address_refresh_data_set"""
     # is_ipv4 = port_struct.port_conf.profile.protocol_version.is_ipv4
-    addr_range = get_dest_ip_modifier_addr_range(port_struct)
-    port_struct.properties.address_refresh_data_set.add(
-        ArpRefreshData(source_ip, source_mac, addr_range)
-    )
+    modifier = get_dest_ip_modifier(port_struct)
+    if modifier:
+        refresh_data = ArpRefreshData(
+            source_ip,
+            source_mac,
+            range(modifier.start_value, modifier.stop_value + 1, modifier.step_value),
+            modifier.offset,
+            modifier.mask,
+        )
+    else:
+        refresh_data = ArpRefreshData(source_ip, source_mac, None, 0, "")
+    port_struct.properties.address_refresh_data_set.add(refresh_data)
 
 
 def get_bytes_from_macaddress(dmac: "MacAddress") -> Iterator[str]:
@@ -62,24 +66,25 @@ def get_link_local_uci_ipv6address(dmac: "MacAddress") -> str:
 def get_address_list(
     source_ip: Union["IPv4Address", "IPv6Address"],
     addr_range: Optional[range],
+    addr_offset: int,
+    addr_mask: str,
 ) -> List[Union["IPv4Address", "IPv6Address"]]:
+    """
+    the addresses the dest IP modifier sweeps: the 16 bit modifier value is written
+    through the first 2 bytes of its mask at addr_offset bytes into the address
+    """
     if not addr_range:
         return [source_ip]
-    source_ip_list = []
-    for i in addr_range:
-        if isinstance(source_ip, IPv4Address):
-            splitter = "."
-            typing = IPv4Address
-        else:
-            splitter = ":"
-            typing = IPv6Address
+    address_type = IPv4Address if isinstance(source_ip, IPv4Address) else IPv6Address
+    shift = source_ip.max_prefixlen - 8 * addr_offset - 16  # negative when the modifier runs past the address
+    value_mask = int(addr_mask[:4].ljust(4, "0"), 16)
 
-        addr = str(source_ip).split(splitter)
-        addr[-1] = str(i)
-        addr_str = splitter.join(addr)
-        source_ip_list.append(typing(addr_str))
+    def place(value: int) -> int:
+        return value << shift if shift >= 0 else value >> -shift
 
-    return source_ip_list
+    window = place(value_mask)
+    base = int(source_ip) & ~window
+    return [address_type(base | (place(i) & window)) for i in addr_range]
 
 
 async def get_address_learning_packet(
@@ -107,7 +112,12 @@ async def get_address_learning_packet(
         if not arp_refresh_data.source_ip or arp_refresh_data.source_ip.is_empty
         else arp_refresh_data.source_ip
     )
-    source_ip_list = get_address_list(source_ip, arp_refresh_data.addr_range)
+    source_ip_list = get_address_list(
+        source_ip,
+        arp_refresh_data.addr_range,
+        arp_refresh_data.addr_offset,
+        arp_refresh_data.addr_mask,
+    )
     packet_list = []
     for source_ip in source_ip_list:
         if port_struct.protocol_version.is_ipv4:
@@ -131,17 +141,106 @@ async def get_address_learning_packet(
     return packet_list
 
 
+def can_refresh_by_stream(
+    port_struct: "PortStruct", arp_refresh_data: ArpRefreshData
+) -> bool:
+    """
+    rx only ports send no test traffic and get no tx time limit, the refresh stream runs alone on them.
+    An address range is swept by a modifier on the ARP sender IP, NDP would need its ICMPv6 checksum updated per packet.
+    """
+    return port_struct.port_conf.is_rx_only and (
+        port_struct.protocol_version.is_ipv4 or not arp_refresh_data.addr_range
+    )
+
+
+async def setup_address_refresh_stream(
+    port_struct: "PortStruct",
+    arp_refresh_data: ArpRefreshData,
+    refresh_period: float,
+    use_gateway: bool,
+) -> "misc.GenuineStream":
+    """ stream sending every address of arp_refresh_data once per refresh period """
+    addr_range = arp_refresh_data.addr_range
+    first_address_data = ArpRefreshData(
+        arp_refresh_data.source_ip,
+        arp_refresh_data.source_mac,
+        addr_range[:1] if addr_range else None,
+        arp_refresh_data.addr_offset,
+        arp_refresh_data.addr_mask,
+    )
+    packet, *_ = await get_address_learning_packet(
+        port_struct, first_address_data, use_gateway
+    )
+    if port_struct.protocol_version.is_ipv4:
+        packet = packet[: 2 * (14 + 28)]  # ethernet and ARP headers, the padding is sent as payload
+        protocol = [enums.ProtocolOption.ETHERNET, enums.ProtocolOption.ARP]
+    else:
+        protocol = [
+            enums.ProtocolOption.ETHERNET,
+            enums.ProtocolOption.IPV6,
+            enums.ProtocolOption.RAW_32,
+        ]
+    packet_length = max(
+        const.ETHERNET_MIN_FRAME_LENGTH, len(packet) // 2 + const.ETHERNET_FCS_LENGTH
+    )
+    address_count = len(addr_range) if addr_range else 1
+    stream = await port_struct.create_stream()
+    tokens = [
+        stream.packet.limit.set(-1),
+        stream.comment.set("ARP/NDP refresh"),
+        stream.rate.pps.set(max(1, math.ceil(address_count / refresh_period))),
+        stream.packet.header.protocol.set(protocol),
+        stream.packet.header.data.set(packet),
+        stream.packet.length.set(enums.LengthType.FIXED, packet_length, packet_length),
+        stream.payload.content.set(enums.PayloadType.PATTERN, "00"),
+        stream.tpld_id.set(-1),
+    ]
+    if addr_range and len(addr_range) > 1:
+        await stream.packet.header.modifiers.configure(1)
+        modifier = stream.packet.header.modifiers.obtain(0)
+        tokens += [
+            modifier.specification.set(
+                position=const.ARP_SENDER_IP_POSITION + arp_refresh_data.addr_offset,
+                mask=misc.Hex(arp_refresh_data.addr_mask),
+                action=enums.ModifierAction.INC,
+                repetition=1,
+            ),
+            modifier.range.set(
+                min_val=addr_range.start, step=addr_range.step, max_val=addr_range[-1]
+            ),
+        ]
+    tokens.append(stream.enable.set(enums.OnOffWithSuppress.ON))
+    await utils.apply(*tokens)
+    return stream
+
+
 async def setup_address_refresh(
     resources: "ResourceManager",
 ) -> List[Tuple["misc.Token", bool]]:  # SetupAddressRefresh
     address_refresh_tokens: List[Tuple["misc.Token", bool]] = []
+    use_gateway = resources.test_conf.use_gateway_mac_as_dmac
+    by_stream = resources.test_conf.arp_refresh_mode.is_stream
     for port_struct in resources.port_structs:
+        # prepare() may run again on the same ports
+        refresh_streams = port_struct.properties.refresh_streams
+        await asyncio.gather(*[stream.delete() for stream in refresh_streams])
+        refresh_streams.clear()
         arp_data_set = port_struct.properties.address_refresh_data_set
         for arp_data in arp_data_set:
+            if by_stream and can_refresh_by_stream(port_struct, arp_data):
+                refresh_streams.append(
+                    await setup_address_refresh_stream(
+                        port_struct,
+                        arp_data,
+                        resources.test_conf.arp_refresh_period_second,
+                        use_gateway,
+                    )
+                )
+                continue
             packet_list = await get_address_learning_packet(
                 port_struct,
                 arp_data,
-                resources.test_conf.use_gateway_mac_as_dmac,
+                use_gateway,
             )
             for packet in packet_list:
                 address_refresh_tokens.append(
@@ -199,7 +298,7 @@ class AddressRefreshHandler:
             interval = math.floor(self.refresh_period / total_refresh_count)
             if interval < const.MIN_REFRESH_TIMER_INTERNAL:
                 self.refresh_burst_size = math.ceil(
-                    const.MIN_REFRESH_TIMER_INTERNAL / interval
+                    const.MIN_REFRESH_TIMER_INTERNAL / max(interval, 1)
                 )
                 interval = const.MIN_REFRESH_TIMER_INTERNAL
             self.interval = interval / 1000.0  # ms -> second
@@ -240,7 +339,7 @@ async def send_l3_learning_packets(
     resources: "ResourceManager",
     address_refresh_handler: "AddressRefreshHandler",
 ) -> None:
-    await schedule(
+    resources.scheduler.schedule(
         address_refresh_handler.interval,
         "s",
         generate_l3_learning_packets,
@@ -257,6 +356,7 @@ async def schedule_arp_refresh(
     # arp refresh jobs
     if address_refresh_handler:
         address_refresh_handler.set_current_state(state)
+        await resources.start_refresh_streams()
         if address_refresh_handler.tokens:
             await send_l3_learning_packets(resources, address_refresh_handler)
 
@@ -308,16 +408,45 @@ async def add_flow_based_learning_preamble_steps(
     await resources.set_frame_limit(0)  # clear packet limit
 
 
-def make_mac_token(
-    send_struct: "PortStruct", hex_data: str
-) -> "misc.Token":
-    # logger.debug(send_struct.port_identity.name)
-    packet = hex_data
-    max_cap = send_struct.capabilities.max_xmit_one_packet_length
-    cur_length = len(hex_data) // 2
+def make_mac_learning_frame(port_struct: "PortStruct", mac_address: "MacAddress") -> str:
+    none_mac = "FFFFFFFFFFFF"
+    four_f = "FFFF"
+    paddings = "00" * 118
+    packet = f"{none_mac}{mac_address.to_hexstring()}{four_f}{paddings}"
+    max_cap = port_struct.capabilities.max_xmit_one_packet_length
+    cur_length = len(packet) // 2
     if cur_length > max_cap:
         raise exceptions.PacketLengthExceed(cur_length, max_cap)
-    return send_struct.send_packet(packet)  # P_XMITONE
+    return packet
+
+
+class MacLearningFrames:
+    """
+    The unique MAC learning frames of the ports, indexed by port name and MAC address:
+    the source MAC of every stream from its tx port, the destination MAC from every rx port of the stream.
+    """
+
+    def __init__(self, port_structs: List["PortStruct"]) -> None:
+        self.frames: Dict[Tuple[str, str], Tuple["PortStruct", str]] = {}
+        for port_struct in port_structs:
+            for stream_struct in port_struct.stream_structs:
+                self.add(port_struct, stream_struct._addr_coll.smac)
+                for dest_port_struct in stream_struct._rx_ports:
+                    self.add(dest_port_struct, stream_struct._addr_coll.dmac)
+
+    def add(self, port_struct: "PortStruct", mac_address: "MacAddress") -> None:
+        key = (port_struct.port_identity.name, mac_address.to_hexstring())
+        if key not in self.frames:
+            self.frames[key] = (port_struct, make_mac_learning_frame(port_struct, mac_address))
+
+    async def send(self) -> None:
+        """ one round, one batch of P_XMITONE per tester """
+        tokens: Dict[str, List["misc.Token"]] = {}
+        for port_struct, packet in self.frames.values():
+            tokens.setdefault(port_struct.port_identity.tester_id, []).append(
+                port_struct.send_packet(packet)  # P_XMITONE
+            )
+        await asyncio.gather(*[apply_all(tester_tokens) for tester_tokens in tokens.values()])
 
 
 async def add_mac_learning_steps(
@@ -330,33 +459,11 @@ async def add_mac_learning_steps(
         != resources.test_conf.mac_learning_mode
     ):
         return
-
-    mac_learning_frame_count = (
-        resources.test_conf.mac_learning_frame_count
-    )
-    none_mac = "FFFFFFFFFFFF"
-    four_f = "FFFF"
-    paddings = "00" * 118
-    tasks = []
-    done_struct = []
-    for port_struct in resources.port_structs:
-        for stream_struct in port_struct.stream_structs:
-            src_hex_data = f"{none_mac}{stream_struct._addr_coll.smac.to_hexstring()}{four_f}{paddings}"
-            if port_struct.port_identity.name not in done_struct:
-                tokens = make_mac_token(
-                    port_struct, src_hex_data
-                )
-                tasks.append(tokens)
-                done_struct.append(port_struct.port_identity.name)
-            for dest_port_struct in stream_struct._rx_ports:
-                dest_hex_data = f"{none_mac}{stream_struct._addr_coll.dmac.to_hexstring()}{four_f}{paddings}"
-                if dest_port_struct.port_identity.name in done_struct:
-                    continue
-                tokens = make_mac_token(
-                    dest_port_struct, dest_hex_data
-                )
-                done_struct.append(dest_port_struct.port_identity.name)
-                tasks.append(tokens)
-    for _ in range(mac_learning_frame_count):
-        await asyncio.gather(*tasks)
-        await asyncio.sleep(const.DELAY_LEARNING_MAC)
+    if resources.mac_learning_frames is None:
+        resources.mac_learning_frames = MacLearningFrames(resources.port_structs)
+    for frame_round in range(resources.test_conf.mac_learning_frame_count):
+        if frame_round:
+            await asyncio.sleep(resources.test_conf.mac_learning_round_gap_second)
+        await resources.mac_learning_frames.send()
+    # give the DUT time to learn the last round before the test traffic starts
+    await asyncio.sleep(const.DELAY_LEARNING_MAC)
@@ -0,0 +1,120 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from functools import partial
+from typing import Dict, List, Tuple, TYPE_CHECKING
+from loguru import logger
+from .statistic_snapshot import CommandBatch
+from ..utils import constants as const
+
+if TYPE_CHECKING:
+    from xoa_driver.lli import commands
+    from .test_resource import ResourceManager
+
+
+@dataclass
+class WaitRecord:
+    """ time spent in one wait state """
+    count: int = 0
+    total_second: float = 0.0
+    max_second: float = 0.0
+    timeout_count: int = 0
+
+    def add(self, elapsed: float, is_timeout: bool) -> None:
+        self.count += 1
+        self.total_second += elapsed
+        self.max_second = max(self.max_second, elapsed)
+        self.timeout_count += int(is_timeout)
+
+
+class ReadinessMonitor:
+    """
+    Wait until the tester reports traffic stopped and counters settled, instead of sleeping a fixed delay.
+    The fixed delays are kept as timeouts, counters settle only after staying unchanged for the configured window.
+    Time spent in each wait state is recorded.
+    """
+
+    def __init__(self, resources: "ResourceManager") -> None:
+        self.resources = resources
+        self.records: Dict["const.WaitState", WaitRecord] = {
+            state: WaitRecord() for state in const.WaitState
+        }
+
+    async def _query_traffic_stopped(self) -> bool:
+        traffic_status = await asyncio.gather(
+            *[port_struct.get_traffic_status() for port_struct in self.resources.tx_ports]
+        )
+        return not any(traffic_status)
+
+    async def _read_port_totals(self) -> List[Tuple[int, int]]:
+        """ read tx and rx total frames of all ports, one batch per tester """
+        port_structs = self.resources.port_structs
+        totals: List[Tuple[int, int]] = [(0, 0)] * len(port_structs)
+
+        def decode(
+            index: int,
+            tx: "commands.PT_TOTAL.GetDataAttr",
+            rx: "commands.PR_TOTAL.GetDataAttr",
+        ) -> None:
+            totals[index] = (tx.packet_count_since_cleared, rx.packet_count_since_cleared)
+
+        batches: Dict[str, CommandBatch] = {}
+        for index, port_struct in enumerate(port_structs):
+            statistics = port_struct.port_ins.statistics
+            batches.setdefault(port_struct.port_identity.tester_id, CommandBatch()).add(
+                [statistics.tx.total.get(), statistics.rx.total.get()],
+                partial(decode, index),
+            )
+        replies = await asyncio.gather(*[batch.send() for batch in batches.values()])
+        for batch, reply in zip(batches.values(), replies):
+            batch.decode(reply)
+        return totals
+
+    async def _wait(self, state: "const.WaitState", timeout: float, settle_second: float = 0.0) -> None:
+        start_time = time.time()
+        previous = None
+        stable_since = start_time
+        is_ready = False
+        while time.time() - start_time < timeout:
+            if state == const.WaitState.TRAFFIC_STOPPED:
+                is_ready = await self._query_traffic_stopped()
+            else:
+                totals = await self._read_port_totals()
+                if state == const.WaitState.COUNTERS_CLEARED:
+                    is_ready = not any(any(total) for total in totals)
+                else:  # counters stay unchanged for settle_second after traffic stopped
+                    if totals != previous:
+                        stable_since = time.time()
+                    is_ready = (
+                        totals == previous
+                        and time.time() - stable_since >= settle_second
+                        and await self._query_traffic_stopped()
+                    )
+                previous = totals
+            if is_ready:
+                break
+            await asyncio.sleep(const.INTERVAL_CHECK_READINESS)
+        elapsed = time.time() - start_time
+        self.records[state].add(elapsed, not is_ready)
+        if not is_ready:
+            logger.debug(f"{state.value} not ready after {elapsed:.2f}s")
+
+    async def wait_traffic_stopped(self, timeout: float) -> None:
+        await self._wait(const.WaitState.TRAFFIC_STOPPED, timeout)
+
+    async def wait_counters_cleared(self, timeout: float) -> None:
+        await self._wait(const.WaitState.COUNTERS_CLEARED, timeout)
+
+    async def wait_counters_settled(self, settle_second: float, timeout: float) -> None:
+        await self._wait(const.WaitState.COUNTERS_SETTLED, timeout, settle_second)
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        return {
+            state.value: {
+                "count": record.count,
+                "total_second": round(record.total_second, 3),
+                "max_second": round(record.max_second, 3),
+                "timeout_count": record.timeout_count,
+            }
+            for state, record in self.records.items()
+        }
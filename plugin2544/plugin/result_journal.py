@@ -0,0 +1,94 @@
+import json
+import sqlite3
+from typing import Dict, Optional, Tuple, Union
+from pydantic.json import pydantic_encoder
+from .statistics import FinalStatistic
+
+ResultKey = Tuple[int, str, float, Union[int, str], Optional[float]]
+
+
+class ResultJournal:
+    """
+    Append-only sqlite journal of the final statistic of every repetition.
+    A resumed run skips the results already in the journal.
+    """
+
+    def __init__(self, path: str, resume: bool = False) -> None:
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS final_result ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, loop INTEGER, test_type TEXT, "
+            "frame_size REAL, rate_percent REAL, repetition TEXT, data TEXT)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS throughput ("
+            "frame_size REAL PRIMARY KEY, rate_percent REAL)"
+        )
+        if not resume:
+            self._conn.execute("DELETE FROM final_result")
+            self._conn.execute("DELETE FROM throughput")
+        self._conn.commit()
+        self.completed: Dict[ResultKey, "FinalStatistic"] = {}
+        self.throughput_map: Dict[float, float] = {}
+        if resume:
+            self._load()
+
+    @staticmethod
+    def make_key(
+        loop: int,
+        test_type: str,
+        frame_size: float,
+        repetition: Union[int, str],
+        rate_percent: Optional[float] = None,
+    ) -> ResultKey:
+        """ throughput result is searched, so it is not keyed by rate """
+        return (loop, test_type, float(frame_size), str(repetition), rate_percent)
+
+    def _key_of(self, result: "FinalStatistic") -> ResultKey:
+        rate_percent = (
+            None if result.test_case_type.is_throughput else result.tx_rate_percent
+        )
+        return self.make_key(
+            result.loop,
+            result.test_case_type.value,
+            result.frame_size,
+            result.repetition,
+            rate_percent,
+        )
+
+    def _load(self) -> None:
+        for (data,) in self._conn.execute("SELECT data FROM final_result ORDER BY id"):
+            result = FinalStatistic.parse_raw(data)
+            self.completed[self._key_of(result)] = result
+        for frame_size, rate_percent in self._conn.execute(
+            "SELECT frame_size, rate_percent FROM throughput"
+        ):
+            self.throughput_map[frame_size] = rate_percent
+
+    def append(self, result: "FinalStatistic") -> None:
+        self._conn.execute(
+            "INSERT INTO final_result (loop, test_type, frame_size, rate_percent, repetition, data) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                result.loop,
+                result.test_case_type.value,
+                result.frame_size,
+                result.tx_rate_percent,
+                str(result.repetition),
+                json.dumps(result.dict(), default=pydantic_encoder),
+            ),
+        )
+        self._conn.commit()
+
+    def set_throughput(self, frame_size: float, rate_percent: float) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO throughput (frame_size, rate_percent) VALUES (?, ?)",
+            (frame_size, rate_percent),
+        )
+        self._conn.commit()
+
+    def get_completed(self, key: ResultKey) -> Optional["FinalStatistic"]:
+        return self.completed.get(key)
+
+    def close(self) -> None:
+        self._conn.close()
@@ -1,18 +1,23 @@
 import asyncio
+import time
 from typing import Dict, List, Tuple, TYPE_CHECKING
+from loguru import logger
 from .arp_request import set_arp_request
 from .common import TPLDControl
 from .data_model import StreamOffset
 from ..utils import exceptions
 
 if TYPE_CHECKING:
+    from .arp_request import ArpResolver
     from .structure import PortStruct
     from .test_config import TestConfigData
     from ..model.m_test_config import MultiStreamConfig
 
 
 async def setup_streams(
-    port_structs: List["PortStruct"], test_conf: "TestConfigData"
+    port_structs: List["PortStruct"],
+    test_conf: "TestConfigData",
+    arp_resolver: "ArpResolver",
 ) -> None:
     if not test_conf.is_stream_based:   
         # add modifier on TX ports
@@ -25,24 +30,55 @@ async def setup_streams(
                 add_modifier_based_stream(port_struct, test_port_index_map)
 
     else:   # configure stream based stream
-        for port_struct in port_structs:
-            for peer_struct in port_struct.properties.peers:
-                peer_struct.properties.arp_mac_address = await set_arp_request(
-                    port_struct,
-                    peer_struct,
-                    test_conf.use_gateway_mac_as_dmac,
-                )
+        await resolve_arp_mac_addresses(port_structs, test_conf, arp_resolver)
         if test_conf.enable_multi_stream:   # configure multi stream
             add_multi_streams(port_structs, test_conf)
         else:
             add_standard_streams(port_structs, test_conf)
 
+    begin = time.perf_counter()
+    await asyncio.gather(*[port_struct.create_streams() for port_struct in port_structs])
+    await asyncio.gather(*[port_struct.configure_streams(test_conf) for port_struct in port_structs])
+    stream_count = sum(len(port_struct.stream_structs) for port_struct in port_structs)
+    elapsed = time.perf_counter() - begin
+    logger.debug(
+        f"Configured {stream_count} streams in {elapsed:.3f}s ({stream_count / max(elapsed, 1e-9):.0f} streams/s)"
+    )
     for port_struct in port_structs:
-        await port_struct.configure_streams(test_conf)
         # set should stop on los before start traffic, can monitor sync status when traffic start
         port_struct.set_should_stop_on_los(test_conf.should_stop_on_los)
 
 
+async def resolve_arp_mac_addresses(
+    port_structs: List["PortStruct"],
+    test_conf: "TestConfigData",
+    arp_resolver: "ArpResolver",
+) -> None:
+    """ resolve all the port pairs at the same time, results are assigned in port order as when resolved one by one """
+    pairs = [
+        (port_struct, peer_struct)
+        for port_struct in port_structs
+        for peer_struct in port_struct.properties.peers
+    ]
+    arp_mac_addresses = await asyncio.gather(
+        *[
+            set_arp_request(
+                port_struct,
+                peer_struct,
+                test_conf.use_gateway_mac_as_dmac,
+                arp_resolver,
+            )
+            for port_struct, peer_struct in pairs
+        ],
+        return_exceptions=True,
+    )
+    await arp_resolver.release_streams()
+    for (_, peer_struct), arp_mac_address in zip(pairs, arp_mac_addresses):
+        if isinstance(arp_mac_address, BaseException):
+            raise arp_mac_address
+        peer_struct.properties.arp_mac_address = arp_mac_address
+
+
 def get_stream_offsets(
     offset_table: Dict[Tuple[str, str], List["StreamOffset"]],
     port_index: str,
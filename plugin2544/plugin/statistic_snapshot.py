@@ -0,0 +1,77 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Tuple, TYPE_CHECKING
+from xoa_driver import utils
+
+if TYPE_CHECKING:
+    from xoa_driver import misc
+    from .counter_store import CounterStore
+    from .structure import PortStruct
+
+
+@dataclass
+class CommandBatch:
+    """ all statistic tokens of one tester connection, and the decoders of their replies """
+    tokens: List["misc.Token"] = field(default_factory=list)
+    decoders: List[Tuple[Callable[..., None], int]] = field(default_factory=list)
+
+    async def send(self) -> List[Any]:
+        """ utils.apply is limited to 200 tokens, apply_iter pipelines any number of tokens on one connection """
+        return [reply async for reply in utils.apply_iter(*self.tokens)]
+
+    def add(self, tokens: List["misc.Token"], decode: Callable[..., None]) -> None:
+        self.tokens.extend(tokens)
+        self.decoders.append((decode, len(tokens)))
+
+    def decode(self, replies: List[Any]) -> None:
+        index = 0
+        for decode, count in self.decoders:
+            decode(*replies[index : index + count])
+            index += count
+
+
+class StatisticSnapshot:
+    """
+    Read PT/PR/PR_EXTRA statistic of all ports in one pipelined batch per tester connection,
+    so the poll latency scales with the number of testers, not with the number of streams.
+    """
+
+    def __init__(
+        self, port_structs: List["PortStruct"], store: "CounterStore"
+    ) -> None:
+        self.port_structs = port_structs
+        self.store = store
+        self.timestamp: float = 0.0  # time when the batches were sent
+        self.elapsed: float = 0.0  # seconds spent waiting for all the replies
+        self.command_count: int = 0
+
+    def _build_batches(self) -> Dict[str, "CommandBatch"]:
+        batches: Dict[str, "CommandBatch"] = {}
+        for port_struct in self.port_structs:
+            tester_id = port_struct.port_identity.tester_id
+            extra_tokens = port_struct.get_extra_tokens()
+            if extra_tokens:
+                batches.setdefault(tester_id, CommandBatch()).add(
+                    extra_tokens, port_struct.decode_extra
+                )
+            for stream_struct in port_struct.stream_structs:
+                for reader in stream_struct.get_statistic_readers():
+                    batches.setdefault(reader.tester_id, CommandBatch()).add(
+                        reader.get_tokens(), reader.decode
+                    )
+        return batches
+
+    async def take(self) -> None:
+        """ send all batches concurrently, then decode replies into the counter store and aggregate port statistic """
+        batches = self._build_batches()
+        self.command_count = sum(len(batch.tokens) for batch in batches.values())
+        self.timestamp = time.time()
+        replies = await asyncio.gather(*[batch.send() for batch in batches.values()])
+        self.elapsed = time.time() - self.timestamp
+        for batch, reply in zip(batches.values(), replies):
+            batch.decode(reply)
+        for port_struct in self.port_structs:
+            for stream_struct in port_struct.stream_structs:
+                stream_struct.aggregate_statistic(self.store)
+            self.store.aggregate_rx_port(port_struct)
@@ -92,14 +92,6 @@ class StreamCounter(BaseModel):
             self.tx_l1_bps = self.bps * (frame_size + interframe_gap) / frame_size
 
 
-class PRStatistic(BaseModel):
-    """pr stream statistic"""
-    rx_stream_counter: StreamCounter = StreamCounter()
-    latency: DelayData = DelayData(counter_type=const.CounterType.LATENCY)
-    jitter: DelayData = DelayData(counter_type=const.CounterType.JITTER)
-    live_loss_frames: int = 0
-
-
 class StreamStatisticData(BaseModel):
     """stream statistic"""
     src_port_id: str = ""
@@ -113,13 +105,6 @@ class StreamStatisticData(BaseModel):
     live_loss_frames: int = 0
     burst_frames: int = 0
 
-    def add_pr_stream_statistic(self, pr_stream_statistic: "PRStatistic") -> None:
-        """aggregate pr stream statistic"""
-        self.rx_counter.add_stream_counter(pr_stream_statistic.rx_stream_counter)
-        self.latency.update(pr_stream_statistic.latency)
-        self.jitter.update(pr_stream_statistic.jitter)
-        self.live_loss_frames += max(0, pr_stream_statistic.live_loss_frames)
-
     def calculate(
         self, tx_port_struct: "PortStruct", rx_port_struct: "PortStruct"
     ) -> None:
@@ -265,12 +250,6 @@ class PortStatistic(BaseModel):
         )
         self.stream_statistic.append(stream_statistic)
 
-    def aggregate_rx_statistic(self, pr_statistic: "PRStatistic") -> None:
-        """aggregate rx port statistic based on pr statistic"""
-        self.add_rx(pr_statistic.rx_stream_counter)
-        self.add_latency(pr_statistic.latency)
-        self.add_jitter(pr_statistic.jitter)
-
     def add_tx(self, tx_stream_counter: "StreamCounter") -> None:
         """ add tx stream counter into port counter from pr_stream statistic """
         tx_stream_counter.calculate_stream_rate(
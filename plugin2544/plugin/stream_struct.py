@@ -1,7 +1,6 @@
-import asyncio
 from copy import deepcopy
-from typing import List, Optional, TYPE_CHECKING
-from xoa_driver import utils, enums, misc
+from typing import List, Optional, Union, TYPE_CHECKING
+from xoa_driver import enums, misc
 from ..model.m_protocol_segment import (
     HWModifier,
     ModifierActionOption,
@@ -13,34 +12,41 @@ from .data_model import (
     StreamOffset,
 )
 from .learning import add_address_refresh_entry
-from .statistics import (
-    DelayData,
-    PRStatistic,
-    StreamCounter,
-    StreamStatisticData,
-)
-from ..utils.field import MacAddress, IPv4Address, IPv6Address
-from ..utils import constants as const, protocol_segments as ps, exceptions
+from .statistics import StreamStatisticData
+from ..utils.field import MacAddress
+from ..utils import constants as const, exceptions
 from collections import defaultdict
 from loguru import logger
 
 if TYPE_CHECKING:
+    from xoa_driver.lli import commands
+    from .counter_store import CounterStore
     from .structure import PortStruct
     from .test_config import TestConfigData
 
 
 class PTStream:
-    def __init__(self, tx_port: "PortStruct", stream_id: int) -> None:
+    def __init__(
+        self, tx_port: "PortStruct", stream_id: int, store: "CounterStore", slot: int
+    ) -> None:
         self.tx_port = tx_port
         self.stream_id = stream_id
-        self.statistic = StreamCounter()
-
-    async def query(self) -> None:
-        """ query statistic on TX port """
-        tx_frames = await self.tx_port.port_ins.statistics.tx.obtain_from_stream(
-            self.stream_id
-        ).get()
-        self.statistic = StreamCounter(
+        self.store = store
+        self.slot = slot
+
+    @property
+    def tester_id(self) -> str:
+        return self.tx_port.port_identity.tester_id
+
+    def get_tokens(self) -> List["misc.Token"]:
+        """ statistic tokens on TX port """
+        return [
+            self.tx_port.port_ins.statistics.tx.obtain_from_stream(self.stream_id).get()
+        ]
+
+    def decode(self, tx_frames: "commands.PT_STREAM.GetDataAttr") -> None:
+        self.store.write_pt(
+            self.slot,
             frames=tx_frames.packet_count_since_cleared,
             bps=tx_frames.bit_count_last_sec,
             pps=tx_frames.packet_count_last_sec,
@@ -49,42 +55,49 @@ class PTStream:
 
 class PRStream:
     def __init__(
-        self, tx_port: "PortStruct", rx_port: "PortStruct", tpld_id: int
+        self,
+        tx_port: "PortStruct",
+        rx_port: "PortStruct",
+        tpld_id: int,
+        store: "CounterStore",
+        slot: int,
     ) -> None:
         self.tx_port = tx_port
         self.tpld_id = tpld_id
         self.rx_port = rx_port
-        self.statistic: "PRStatistic" = PRStatistic()
+        self.store = store
+        self.slot = slot
 
-    async def query(self) -> None:
-        """ query statistic on rx port """
+    @property
+    def tester_id(self) -> str:
+        return self.rx_port.port_identity.tester_id
+
+    def get_tokens(self) -> List["misc.Token"]:
+        """ statistic tokens on rx port """
         rx = self.rx_port.port_ins.statistics.rx.access_tpld(self.tpld_id)
-        rx_frames, error, ji, latency = await utils.apply(
+        return [
             rx.traffic.get(),
             rx.errors.get(),
             rx.jitter.get(),
             rx.latency.get(),
-        )
-        self.statistic = PRStatistic(
-            rx_stream_counter=StreamCounter(
-                frames=rx_frames.packet_count_since_cleared,
-                bps=rx_frames.bit_count_last_sec,
-                pps=rx_frames.packet_count_last_sec,
-                bytes_count=rx_frames.byte_count_since_cleared,
-            ),
+        ]
+
+    def decode(
+        self,
+        rx_frames: "commands.PR_TPLDTRAFFIC.GetDataAttr",
+        error: "commands.PR_TPLDERRORS.GetDataAttr",
+        ji: "commands.PR_TPLDJITTER.GetDataAttr",
+        latency: "commands.PR_TPLDLATENCY.GetDataAttr",
+    ) -> None:
+        self.store.write_pr(
+            self.slot,
+            frames=rx_frames.packet_count_since_cleared,
+            bps=rx_frames.bit_count_last_sec,
+            pps=rx_frames.packet_count_last_sec,
+            bytes_count=rx_frames.byte_count_since_cleared,
             live_loss_frames=error.non_incre_seq_event_count,
-            latency=DelayData(
-                counter_type=const.CounterType.LATENCY,
-                minimum=latency.min_val,
-                average=latency.avg_val,
-                maximum=latency.max_val,
-            ),
-            jitter=DelayData(
-                counter_type=const.CounterType.JITTER,
-                minimum=ji.min_val,
-                average=ji.avg_val,
-                maximum=ji.max_val,
-            ),
+            latency=(latency.min_val, latency.avg_val, latency.max_val),
+            jitter=(ji.min_val, ji.avg_val, ji.max_val),
         )
 
 
@@ -114,6 +127,44 @@ class StreamStruct:
         self._best_result: Optional[
             StreamStatisticData
         ] = None  # store best result for throughput per_port_result_scope, only for stream based
+        self._pt_stream: Optional["PTStream"] = None
+        self._pr_streams: List["PRStream"] = []
+        self._hw_modifiers: List["HWModifier"] = []
+
+    @property
+    def tx_port(self) -> "PortStruct":
+        return self._tx_port
+
+    @property
+    def stream_id(self) -> int:
+        return self._stream_id
+
+    @property
+    def tpld_id(self) -> int:
+        return self._tpldid
+
+    @property
+    def packet_limit(self) -> int:
+        return self._packet_limit
+
+    @property
+    def pt_slot(self) -> int:
+        return self._pt_stream.slot if self._pt_stream else -1
+
+    @property
+    def pr_slots(self) -> List[int]:
+        return [pr_stream.slot for pr_stream in self._pr_streams]
+
+    def bind_pt_slot(self, store: "CounterStore", slot: int) -> None:
+        self._pt_stream = PTStream(self._tx_port, self._stream_id, store, slot)
+        self._pr_streams = []
+
+    def bind_pr_slot(
+        self, store: "CounterStore", rx_port: "PortStruct", slot: int
+    ) -> None:
+        self._pr_streams.append(
+            PRStream(self._tx_port, rx_port, self._tpldid, store, slot)
+        )
 
     def is_rx_port(self, peer_struct: "PortStruct"):
         return True if peer_struct in self._rx_ports else False
@@ -160,9 +211,11 @@ class StreamStruct:
         if self._best_result:
             self._best_result.calculate(self._tx_port, self.rx_port)
 
-    async def configure(self, test_conf: "TestConfigData") -> None:
-        stream = await self._tx_port.create_stream()
+    def bind_stream(self, stream: "misc.GenuineStream") -> None:
         self._stream = stream
+
+    def configuration_tokens(self, test_conf: "TestConfigData") -> List["misc.Token"]:
+        """ stream settings and packet header, the modifiers are set after their count is configured """
         base_mac = (
             test_conf.multi_stream_mac_base_address
             if test_conf.is_stream_based
@@ -176,7 +229,8 @@ class StreamStruct:
             self._arp_mac,
             self._stream_offset,
         )
-        await utils.apply(
+        self._hw_modifiers = self.hw_modifiers
+        return [
             self._stream.enable.set(enums.OnOffWithSuppress.ON),
             self._stream.comment.set(f"Stream {self._stream_id} / {self._tpldid}"),
             self._stream.packet.header.protocol.set(
@@ -188,13 +242,8 @@ class StreamStruct:
             ),
             self._stream.tpld_id.set(test_payload_identifier=self._tpldid),
             self._stream.insert_packets_checksum.set(enums.OnOff.ON),
-        )
-        await self.set_packet_header()
-        await self.setup_modifier()
-        self.init_rx_tables(
-            test_conf.arp_refresh_enabled,
-            test_conf.use_gateway_mac_as_dmac,
-        )
+            self.packet_header_token(),
+        ]
 
     def init_rx_tables(
         self, arp_refresh_enabled: bool, use_gateway_mac_as_dmac: bool
@@ -225,95 +274,61 @@ class StreamStruct:
                 None,
             )
 
-    async def query(self) -> None:
+    def get_statistic_readers(self) -> List[Union["PTStream", "PRStream"]]:
+        """ pt_stream and pr_streams whose tokens go into the statistic snapshot """
+        if not self._pt_stream:
+            return []
+        return [self._pt_stream, *self._pr_streams]
+
+    def aggregate_statistic(self, store: "CounterStore") -> None:
         """
-        aggregate pr_stream data into _stream_statistic
+        build _stream_statistic from the counter store
         pt_stream statistic should calculate in TX Port
-        pr_stream statistic should calculate in RX port
+        pr_stream statistic should calculate in RX port by the counter store
         """
-        pr_streams = [
-            PRStream(self._tx_port, port, self._tpldid) for port in self._rx_ports
-        ]
-        pt_stream = PTStream(self._tx_port, self._stream_id)
-        await asyncio.gather(
-            pt_stream.query(), *[pr_stream.query() for pr_stream in pr_streams]
-        )
         src_addr, dst_addr = self._addr_coll.get_addr_pair_by_protocol(
             self._tx_port.protocol_version
         )
-        self._stream_statistic = StreamStatisticData(
-            src_port_id=self._tx_port.port_identity.name,
-            dest_port_id=self.rx_port.port_identity.name,
-            src_port_addr=str(src_addr),
-            dest_port_addr=str(dst_addr),
-            burst_frames=self._packet_limit,
-        )
+        # TX and RX statistic are read in the same snapshot, but tester may still sample them at slightly different time
+        self._stream_statistic = store.stream_statistic(self, str(src_addr), str(dst_addr))
+        # aggregate data on tx port statistic based on pt_stream
+        self._tx_port.statistic.aggregate_tx_statistic(self._stream_statistic)
 
-        # polling TX and RX statistic not at the same time, may cause the rx statistic larger than tx statistic
-        self._stream_statistic.tx_counter.add_stream_counter(pt_stream.statistic)
-        for pr_stream in pr_streams:
-            # aggregate data on rx port statistic based on pr_stream
-            self._stream_statistic.add_pr_stream_statistic(pr_stream.statistic)
-            async with pr_stream.rx_port.lock:
-                pr_stream.rx_port.statistic.aggregate_rx_statistic(pr_stream.statistic)
-        async with self._tx_port.lock:
-            # aggregate data on tx port statistic based on pt_stream
-            self._tx_port.statistic.aggregate_tx_statistic(self._stream_statistic)
-
-    async def set_packet_header(self) -> None:
+    def packet_header_token(self) -> "misc.Token":
         """
-        get packet header based on segment
+        get packet header from the header template of the port, value ranges advance by one stream
         """
-        # Insert all configured header segments in order
-        profile = self._tx_port.port_conf.profile.copy(deep=True)
-        for index, segment in enumerate(profile.segments):
-            if segment.type.is_ethernet and index == 0:
-                ps.setup_segment_ethernet(
-                    segment,
-                    self._addr_coll.smac,
-                    self._addr_coll.dmac,
-                    self._addr_coll.arp_mac,
-                )
-            if (
-                segment.type.is_ipv4
-                and isinstance(self._addr_coll.src_addr, IPv4Address)
-                and isinstance(self._addr_coll.dst_addr, IPv4Address)
-            ):
-                ps.setup_segment_ipv4(
-                    segment,
-                    self._addr_coll.src_addr,
-                    self._addr_coll.dst_addr,
-                )
-            if (
-                segment.type.is_ipv6
-                and isinstance(self._addr_coll.src_addr, IPv6Address)
-                and isinstance(self._addr_coll.dst_addr, IPv6Address)
-            ):
-                ps.setup_segment_ipv6(
-                    segment,
-                    self._addr_coll.src_addr,
-                    self._addr_coll.dst_addr,
-                )
+        self._packet_header = self._tx_port.header_template.build(
+            self._addr_coll.smac,
+            self._addr_coll.dmac,
+            self._addr_coll.src_addr,
+            self._addr_coll.dst_addr,
+            self._addr_coll.arp_mac,
+        )
+        return self._stream.packet.header.data.set(self._packet_header.hex())    # type: ignore
 
-        self._packet_header = profile.prepare()
-        await self._stream.packet.header.data.set(self._packet_header.hex())    # type: ignore
+    async def configure_modifier_count(self) -> None:
+        await self._stream.packet.header.modifiers.configure(len(self._hw_modifiers))
 
-    async def setup_modifier(self) -> None:
+    def modifier_tokens(self) -> List["misc.Token"]:
         modifiers = self._stream.packet.header.modifiers
-        await modifiers.configure(len(self.hw_modifiers))
-        for mid, hw_modifier in enumerate(self.hw_modifiers):
+        tokens = []
+        for mid, hw_modifier in enumerate(self._hw_modifiers):
             modifier = modifiers.obtain(mid)
-            await modifier.specification.set(
-                position=hw_modifier.byte_segment_position,
-                mask=misc.Hex(f"{hw_modifier.mask}"),    
-                action=hw_modifier.action.to_xmp(),
-                repetition=hw_modifier.repeat,
-            )
-            await modifier.range.set(
-                min_val=hw_modifier.start_value,
-                step=hw_modifier.step_value,
-                max_val=hw_modifier.stop_value,
-            )
+            tokens += [
+                modifier.specification.set(
+                    position=hw_modifier.byte_segment_position,
+                    mask=misc.Hex(f"{hw_modifier.mask}"),    
+                    action=hw_modifier.action.to_xmp(),
+                    repetition=hw_modifier.repeat,
+                ),
+                modifier.range.set(
+                    min_val=hw_modifier.start_value,
+                    step=hw_modifier.step_value,
+                    max_val=hw_modifier.stop_value,
+                ),
+            ]
+        return tokens
 
     async def set_packet_size(
         self, packet_size_type: enums.LengthType, min_size: int, max_size: int
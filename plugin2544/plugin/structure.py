@@ -1,8 +1,10 @@
 import asyncio
-from typing import List, TYPE_CHECKING, Optional, Set, Tuple, Union
+from operator import attrgetter
+from typing import Any, Callable, Dict, List, NamedTuple, TYPE_CHECKING, Optional, Set, Tuple, Union
 from dataclasses import dataclass, field
 from xoa_driver import enums, misc, utils as driver_utils
-from .common import gen_macaddress
+from xoa_driver.lli import commands
+from .common import apply_all, gen_macaddress
 from .data_model import (
     ArpRefreshData,
     RXTableData,
@@ -10,13 +12,12 @@ from .data_model import (
 )
 from .statistics import PortStatistic
 from .stream_struct import StreamStruct
-from ..utils import exceptions, constants as const
+from ..utils import exceptions, constants as const, protocol_segments as ps
 from ..utils.field import MacAddress, IPv4Address, IPv6Address
 from loguru import logger
 if TYPE_CHECKING:
     from xoa_core.core.test_suites.datasets import PortIdentity
     from xoa_driver import ports as xoa_ports, testers as xoa_testers
-    from xoa_driver.lli import commands
     from ..utils.interfaces import TestSuitePipe
     from .test_config import TestConfigData
     from ..model.m_test_config import FrameSize
@@ -29,6 +30,39 @@ if TYPE_CHECKING:
     )
 
 
+class PortSetting(NamedTuple):
+    """ one entry of the port configuration plan """
+    name: str
+    value: Any
+    token: "misc.Token"
+
+
+# port settings read back in PortStruct.prepare: name -> (query, value of the reply to compare with PortSetting.value)
+PORT_SETTING_QUERIES: Dict[str, Tuple[Callable[["xoa_ports.GenericL23Port"], "misc.Token"], Callable[[Any], Any]]] = {
+    "mac_address": (lambda port: port.net_config.mac_address.get(), lambda reply: MacAddress(reply.mac_address)),
+    "speed_mode": (lambda port: port.speed.mode.selection.get(), attrgetter("mode")),
+    "latency_offset": (lambda port: port.latency_config.offset.get(), attrgetter("offset")),
+    "interframe_gap": (lambda port: port.interframe_gap.get(), attrgetter("min_byte_count")),
+    "pause": (lambda port: port.pause.get(), attrgetter("on_off")),
+    "latency_mode": (lambda port: port.latency_config.mode.get(), attrgetter("mode")),
+    "ipv4_arp_reply": (lambda port: port.net_config.ipv4.arp_reply.get(), attrgetter("on_off")),
+    "ipv6_arp_reply": (lambda port: port.net_config.ipv6.arp_reply.get(), attrgetter("on_off")),
+    "ipv4_ping_reply": (lambda port: port.net_config.ipv4.ping_reply.get(), attrgetter("on_off")),
+    "ipv6_ping_reply": (lambda port: port.net_config.ipv6.ping_reply.get(), attrgetter("on_off")),
+    "ipv4_address": (
+        lambda port: port.net_config.ipv4.address.get(),
+        attrgetter("ipv4_address", "subnet_mask", "gateway", "wild"),
+    ),
+    "ipv6_address": (
+        lambda port: port.net_config.ipv6.address.get(),
+        attrgetter("ipv6_address", "gateway", "subnet_prefix", "wildcard_prefix"),
+    ),
+    "max_header_length": (lambda port: port.max_header_length.get(), attrgetter("max_header_length")),
+    "speed_reduction": (lambda port: port.speed.reduction.get(), attrgetter("ppm")),
+    "stagger_step": (lambda port: port.tx_config.delay.get(), attrgetter("delay_val")),
+}
+
+
 class PortStruct:
     def __init__(
         self,
@@ -45,8 +79,8 @@ class PortStruct:
         self._should_stop_on_los = False
         self._port_conf = port_conf
         self.properties = Properties()
-        self.lock = asyncio.Lock()
         self._stream_structs: List["StreamStruct"] = []
+        self._header_template: Optional["ps.HeaderTemplate"] = None
         self._statistic = PortStatistic()  # reset every second
         self.stop = False
 
@@ -116,104 +150,9 @@ class PortStruct:
     async def set_toggle_port_sync(self, state: enums.OnOff) -> None:
         await self.port_ins.tx_config.enable.set(state)
 
-    async def set_broadr_reach_mode(self, broadr_reach_mode: const.BRRModeStr) -> None:
-        if self.port_ins.info.is_brr_mode_supported == enums.YesNo.NO:
-            self._xoa_out.send_warning(
-                exceptions.BroadReachModeNotSupport(self._port_identity.name)
-            )
-        elif isinstance(self.port_ins, const.BrrPorts):
-            await self.port_ins.brr_mode.set(broadr_reach_mode.to_xmp())
-
-    async def set_mdi_mdix_mode(self, mdi_mdix_mode: const.MdiMdixMode) -> None:
-        if self.port_ins.info.capabilities.can_mdi_mdix == enums.YesNo.NO:
-            self._xoa_out.send_warning(
-                exceptions.MdiMdixModeNotSupport(self._port_identity.name)
-            )
-        elif isinstance(self.port_ins, const.MdixPorts):
-            await self.port_ins.mdix_mode.set(mdi_mdix_mode.to_xmp())
-
-    async def set_anlt(self, on_off: bool) -> None:
-        """Thor-400G-7S-1P support ANLT feature"""
-        if not on_off or not isinstance(self.port_ins, const.PCSPMAPorts):
-            return
-
-        if bool(self.port_ins.info.capabilities.can_auto_neg_base_r):
-            await self.port_ins.pcs_pma.auto_neg.settings.set(
-                enums.AutoNegMode.ANEG_ON,
-                enums.AutoNegTecAbility.DEFAULT_TECH_MODE,
-                enums.AutoNegFECOption.DEFAULT_FEC,
-                enums.AutoNegFECOption.DEFAULT_FEC,
-                enums.PauseMode.NO_PAUSE,
-            )
-        else:
-            self._xoa_out.send_warning(
-                exceptions.ANLTNotSupport(self._port_identity.name)
-            )
-        if bool(self.port_ins.info.capabilities.can_set_link_train):
-            await self.port_ins.pcs_pma.link_training.settings.set(
-                enums.LinkTrainingMode.FORCE_ENABLE,
-                enums.PAM4FrameSize.N16K_FRAME,
-                enums.LinkTrainingInitCondition.NO_INIT,
-                enums.NRZPreset.NRZ_NO_PRESET,
-                enums.TimeoutMode.DEFAULT_TIMEOUT,
-            )
-        else:
-            self._xoa_out.send_warning(
-                exceptions.ANLTNotSupport(self._port_identity.name)
-            )
-
-    async def set_auto_negotiation(self, on_off: bool) -> None:
-        """P_AUTONEGSELECTION"""
-        if not on_off:
-            return
-        if not bool(self.port_ins.info.capabilities.can_set_autoneg):
-            self._xoa_out.send_warning(
-                exceptions.AutoNegotiationNotSupport(self._port_identity.name)
-            )
-        elif isinstance(self.port_ins, const.AutoNegPorts):
-            await self.port_ins.autoneg_selection.set_on()  # type:ignore
-
-    async def set_speed_mode(self, port_speed_mode: const.PortSpeedStr) -> None:
-        mode = port_speed_mode.to_xmp()
-        if mode not in self.port_ins.info.port_possible_speed_modes:
-            self._xoa_out.send_warning(exceptions.PortSpeedWarning(mode))
-        else:
-            await self.port_ins.speed.mode.selection.set(mode)
-
     async def set_sweep_reduction(self, ppm: int) -> None:
         await self.port_ins.speed.reduction.set(ppm=ppm)
 
-    async def set_stagger_step(self, port_stagger_steps: int) -> None:
-        if not port_stagger_steps:
-            return
-        await self.port_ins.tx_config.delay.set(port_stagger_steps)  # P_TXDELAY
-
-    async def set_fec_mode(self, fec_mode: const.FECModeStr) -> None:
-        """Loki-100G-5S-2P  module 4 * 25G support FC_FEC mode"""
-        if fec_mode == const.FECModeStr.OFF:
-            return
-        await self.port_ins.fec_mode.set(fec_mode.to_xmp())  # PP_FECMODE
-
-    async def set_max_header(self, header_length: int) -> None:
-        # calculate max header length
-        for p in const.STANDARD_SEGMENT_VALUE:
-            if header_length <= p:
-                header_length = p
-                break
-        await self.port_ins.max_header_length.set(header_length)
-
-    async def set_packet_size_if_mix(self, frame_sizes: "FrameSize") -> None:
-        if not frame_sizes.packet_size_type.is_mix:
-            return
-        await self.port_ins.mix.weights.set(*frame_sizes.mixed_sizes_weights)
-        if frame_sizes.mixed_length_config:
-            dic = frame_sizes.mixed_length_config.dict()
-
-            for k, v in dic.items():
-                position = int(k.split("_")[-1])
-                # logger.debug(f"position: {position} value: {v}")
-                await self.port_ins.mix.lengths[position].set(v)
-
     def send_packet(self, packet: str) -> "misc.Token":
         return self.port_ins.tx_single_pkt.send.set(packet)
 
@@ -226,7 +165,6 @@ class PortStruct:
         tokens = [
             self.port_ins.sync_status.get(),
             self.port_ins.traffic.state.get(),
-            self.port_ins.net_config.mac_address.get(),
             self.port_ins.speed.current.get(),
         ]
         if self.port_ins.is_reserved_by_me():
@@ -236,8 +174,16 @@ class PortStruct:
         tokens.append(self.port_ins.reservation.get())
         tokens.append(self.port_ins.reservation.set_reserve())
         tokens.append(self.port_ins.reset.set())
-
-        (sync, traffic, mac, port_speed, *_) = await driver_utils.apply(*tokens)
+        # read back after the reset, setup_port only writes the settings which differ
+        tokens += [query(self.port_ins) for query, _ in PORT_SETTING_QUERIES.values()]
+
+        (sync, traffic, port_speed, *replies) = await driver_utils.apply(*tokens)
+        self.properties.port_settings = {
+            name: value_of(reply)
+            for (name, (_, value_of)), reply in zip(
+                PORT_SETTING_QUERIES.items(), replies[-len(PORT_SETTING_QUERIES):]
+            )
+        }
         self.port_ins.on_reservation_change(self.__on_reservation_status)
         self.port_ins.on_receive_sync_change(self._change_sync_status)
         self.port_ins.on_traffic_change(self._change_traffic_status)
@@ -245,7 +191,7 @@ class PortStruct:
         self._tester.on_disconnected(self.__on_disconnect_tester)
         self.properties.sync_status = bool(sync.sync_status)
         self.properties.traffic_status = bool(traffic.on_off)
-        self.properties.native_mac_address = MacAddress(mac.mac_address)
+        self.properties.native_mac_address = self.properties.port_settings["mac_address"]
         self.properties.physical_port_speed = port_speed.port_speed * 1e6
 
     async def clear_statistic(self) -> None:
@@ -293,57 +239,9 @@ class PortStruct:
             )
         await self.port_ins.ndp_rx_table.set(ndp_chunk)
 
-    async def set_reply(self) -> None:
-        await driver_utils.apply(
-            self.port_ins.net_config.ipv4.arp_reply.set_on(),  # P_ARPREPLY
-            self.port_ins.net_config.ipv6.arp_reply.set_on(),  # P_ARPV6REPLY
-            self.port_ins.net_config.ipv4.ping_reply.set_on(),  # P_PINGREPLY
-            self.port_ins.net_config.ipv6.ping_reply.set_on(),  # P_PINGV6REPLY
-        )
-
     async def set_tpld_mode(self, use_micro_tpld: bool) -> None:
         await self.port_ins.tpld_mode.set(enums.TPLDMode(int(use_micro_tpld)))
 
-    async def set_latency_offset(self, offset: int) -> None:
-        await self.port_ins.latency_config.offset.set(offset=offset)
-
-    async def set_interframe_gap(self, interframe_gap: int) -> None:
-        await self.port_ins.interframe_gap.set(min_byte_count=interframe_gap)
-
-    async def set_pause_mode(self, pause_mode_enabled: bool):
-        await self.port_ins.pause.set(on_off=enums.OnOff(int(pause_mode_enabled)))
-
-    async def set_latency_mode(self, latency_mode: "const.LatencyModeStr"):
-        await self.port_ins.latency_config.mode.set(latency_mode.to_xmp())
-
-    async def set_ip_address(self) -> None:
-        ip_properties = self._port_conf.ip_address
-        if not ip_properties:
-            return
-        if isinstance(ip_properties.address, IPv4Address) and isinstance(
-            ip_properties.gateway, IPv4Address
-        ):
-            subnet_mask = ip_properties.routing_prefix.to_ipv4()
-            await self.port_ins.net_config.ipv4.address.set(
-                ipv4_address=ip_properties.address,
-                subnet_mask=subnet_mask,
-                gateway=ip_properties.gateway,
-                wild="0.0.0.0",
-            )
-        elif isinstance(ip_properties.address, IPv6Address) and isinstance(
-            ip_properties.gateway, IPv6Address
-        ):
-            await self.port_ins.net_config.ipv6.address.set(
-                ipv6_address=ip_properties.address,
-                gateway=ip_properties.gateway,
-                subnet_prefix=ip_properties.routing_prefix,
-                wildcard_prefix=128,
-            )
-
-    async def set_mac_address(self, mac_addr: str) -> None:
-        await self.port_ins.net_config.mac_address.set(mac_addr)
-        self.properties.native_mac_address = MacAddress(mac_addr)
-
     @property
     def local_states(self):
         return self.port_ins.local_states
@@ -404,6 +302,12 @@ class PortStruct:
     def protocol_version(self) -> "const.PortProtocolVersion":
         return const.PortProtocolVersion[self._port_conf.profile.protocol_version.name]
 
+    @property
+    def header_template(self) -> "ps.HeaderTemplate":
+        if self._header_template is None:
+            self._header_template = ps.HeaderTemplate(self._port_conf.profile)
+        return self._header_template
+
     def add_stream(
         self,
         rx_ports: List["PortStruct"],
@@ -417,13 +321,46 @@ class PortStruct:
         )
         self._stream_structs.append(stream_struct)
 
+    async def create_streams(self) -> None:
+        """ create all streams of the port with one PS_INDICES instead of one PS_CREATE per stream """
+        if not self._stream_structs:
+            return
+        await commands.PS_INDICES(self.port_ins._conn, *self.port_ins.kind).set(
+            [stream_struct.stream_id for stream_struct in self._stream_structs]
+        )
+        await self.port_ins.streams.server_sync()
+        streams = {stream.idx: stream for stream in self.port_ins.streams}
+        for stream_struct in self._stream_structs:
+            stream_struct.bind_stream(streams[stream_struct.stream_id])
+
     async def configure_streams(self, test_conf: "TestConfigData") -> None:
+        """ configure all streams of the port in a few pipelined batches, whatever the number of streams """
         for header_segment in self._port_conf.profile.segments:
             for field_value_range in header_segment.value_ranges:
                 if field_value_range.restart_for_each_port:
                     field_value_range.reset()
+        # build all the tokens before the first await, the value ranges may be shared with other ports
+        tokens = [
+            token
+            for stream_struct in self._stream_structs
+            for token in stream_struct.configuration_tokens(test_conf)
+        ]
+        await asyncio.gather(
+            apply_all(tokens),
+            *[stream_struct.configure_modifier_count() for stream_struct in self._stream_structs],
+        )
+        await apply_all(
+            [
+                token
+                for stream_struct in self._stream_structs
+                for token in stream_struct.modifier_tokens()
+            ]
+        )
         for stream_struct in self._stream_structs:
-            await stream_struct.configure(test_conf)
+            stream_struct.init_rx_tables(
+                test_conf.arp_refresh_enabled,
+                test_conf.use_gateway_mac_as_dmac,
+            )
 
     async def set_streams_packet_size(
         self, packet_size_type: "enums.LengthType", min_size: int, max_size: int
@@ -435,31 +372,189 @@ class PortStruct:
             ]
         )
 
-    async def setup_port(
+    def _brr_mode_settings(self) -> List["PortSetting"]:
+        broadr_reach_mode = self._port_conf.broadr_reach_mode
+        if self.port_ins.info.is_brr_mode_supported == enums.YesNo.NO:
+            self._xoa_out.send_warning(
+                exceptions.BroadReachModeNotSupport(self._port_identity.name)
+            )
+        elif isinstance(self.port_ins, const.BrrPorts):
+            return [PortSetting("brr_mode", broadr_reach_mode, self.port_ins.brr_mode.set(broadr_reach_mode.to_xmp()))]
+        return []
+
+    def _mdi_mdix_mode_settings(self) -> List["PortSetting"]:
+        mdi_mdix_mode = self._port_conf.mdi_mdix_mode
+        if self.port_ins.info.capabilities.can_mdi_mdix == enums.YesNo.NO:
+            self._xoa_out.send_warning(
+                exceptions.MdiMdixModeNotSupport(self._port_identity.name)
+            )
+        elif isinstance(self.port_ins, const.MdixPorts):
+            return [PortSetting("mdi_mdix_mode", mdi_mdix_mode, self.port_ins.mdix_mode.set(mdi_mdix_mode.to_xmp()))]
+        return []
+
+    def _anlt_settings(self) -> List["PortSetting"]:
+        """Thor-400G-7S-1P support ANLT feature"""
+        if not self._port_conf.anlt_enabled or not isinstance(self.port_ins, const.PCSPMAPorts):
+            return []
+        settings = []
+        if bool(self.port_ins.info.capabilities.can_auto_neg_base_r):
+            settings.append(
+                PortSetting(
+                    "anlt_auto_neg",
+                    True,
+                    self.port_ins.pcs_pma.auto_neg.settings.set(
+                        enums.AutoNegMode.ANEG_ON,
+                        enums.AutoNegTecAbility.DEFAULT_TECH_MODE,
+                        enums.AutoNegFECOption.DEFAULT_FEC,
+                        enums.AutoNegFECOption.DEFAULT_FEC,
+                        enums.PauseMode.NO_PAUSE,
+                    ),
+                )
+            )
+        else:
+            self._xoa_out.send_warning(
+                exceptions.ANLTNotSupport(self._port_identity.name)
+            )
+        if bool(self.port_ins.info.capabilities.can_set_link_train):
+            settings.append(
+                PortSetting(
+                    "anlt_link_training",
+                    True,
+                    self.port_ins.pcs_pma.link_training.settings.set(
+                        enums.LinkTrainingMode.FORCE_ENABLE,
+                        enums.PAM4FrameSize.N16K_FRAME,
+                        enums.LinkTrainingInitCondition.NO_INIT,
+                        enums.NRZPreset.NRZ_NO_PRESET,
+                        enums.TimeoutMode.DEFAULT_TIMEOUT,
+                    ),
+                )
+            )
+        else:
+            self._xoa_out.send_warning(
+                exceptions.ANLTNotSupport(self._port_identity.name)
+            )
+        return settings
+
+    def _auto_negotiation_settings(self) -> List["PortSetting"]:
+        """P_AUTONEGSELECTION"""
+        if not self._port_conf.auto_neg_enabled:
+            return []
+        if not bool(self.port_ins.info.capabilities.can_set_autoneg):
+            self._xoa_out.send_warning(
+                exceptions.AutoNegotiationNotSupport(self._port_identity.name)
+            )
+        elif isinstance(self.port_ins, const.AutoNegPorts):
+            return [PortSetting("auto_negotiation", True, self.port_ins.autoneg_selection.set_on())]  # type:ignore
+        return []
+
+    def _speed_mode_settings(self) -> List["PortSetting"]:
+        mode = self._port_conf.port_speed_mode.to_xmp()
+        if mode not in self.port_ins.info.port_possible_speed_modes:
+            self._xoa_out.send_warning(exceptions.PortSpeedWarning(mode))
+            return []
+        return [PortSetting("speed_mode", mode, self.port_ins.speed.mode.selection.set(mode))]
+
+    def _ip_address_settings(self) -> List["PortSetting"]:
+        ip_properties = self._port_conf.ip_address
+        if not ip_properties:
+            return []
+        if isinstance(ip_properties.address, IPv4Address) and isinstance(
+            ip_properties.gateway, IPv4Address
+        ):
+            ipv4 = (
+                ip_properties.address,
+                ip_properties.routing_prefix.to_ipv4(),
+                ip_properties.gateway,
+                IPv4Address("0.0.0.0"),
+            )
+            return [PortSetting("ipv4_address", ipv4, self.port_ins.net_config.ipv4.address.set(*ipv4))]
+        elif isinstance(ip_properties.address, IPv6Address) and isinstance(
+            ip_properties.gateway, IPv6Address
+        ):
+            ipv6 = (
+                ip_properties.address,
+                ip_properties.gateway,
+                ip_properties.routing_prefix,
+                128,
+            )
+            return [PortSetting("ipv6_address", ipv6, self.port_ins.net_config.ipv6.address.set(*ipv6))]
+        return []
+
+    def _max_header_settings(self) -> List["PortSetting"]:
+        # calculate max header length
+        header_length = self._port_conf.profile.packet_header_length
+        for p in const.STANDARD_SEGMENT_VALUE:
+            if header_length <= p:
+                header_length = p
+                break
+        return [PortSetting("max_header_length", header_length, self.port_ins.max_header_length.set(header_length))]
+
+    def _mix_settings(self, frame_sizes: "FrameSize") -> List["PortSetting"]:
+        if not frame_sizes.packet_size_type.is_mix:
+            return []
+        settings = [
+            PortSetting("mix_weights", frame_sizes.mixed_sizes_weights, self.port_ins.mix.weights.set(*frame_sizes.mixed_sizes_weights))
+        ]
+        if frame_sizes.mixed_length_config:
+            dic = frame_sizes.mixed_length_config.dict()
+            for k, v in dic.items():
+                position = int(k.split("_")[-1])
+                settings.append(PortSetting(f"mix_length_{position}", v, self.port_ins.mix.lengths[position].set(v)))
+        return settings
+
+    def configuration_plan(
         self, test_conf: "TestConfigData", latency_mode: "const.LatencyModeStr"
-    ) -> None:
+    ) -> List["PortSetting"]:
+        """ every port setting the test wants, in the order they are written """
+        port = self.port_ins
+        port_conf = self._port_conf
+        plan = []
         if not test_conf.is_stream_based:
             mac = gen_macaddress(
                 test_conf.mac_base_address,
                 self.properties.test_port_index,
             )
-            await self.set_mac_address(str(mac))
-        await self.set_speed_mode(self._port_conf.port_speed_mode)
-        await self.set_latency_offset(self._port_conf.latency_offset_ms)
-        await self.set_interframe_gap(int(self._port_conf.inter_frame_gap))
-        await self.set_pause_mode(self._port_conf.pause_mode_enabled)
-        await self.set_latency_mode(latency_mode)
-        await self.set_reply()
-        await self.set_ip_address()
-        await self.set_broadr_reach_mode(self._port_conf.broadr_reach_mode)
-        await self.set_mdi_mdix_mode(self._port_conf.mdi_mdix_mode)
-        await self.set_fec_mode(self._port_conf.fec_mode)
-        await self.set_anlt(self._port_conf.anlt_enabled)
-        await self.set_auto_negotiation(self._port_conf.auto_neg_enabled)
-        await self.set_max_header(self._port_conf.profile.packet_header_length)
-        await self.set_sweep_reduction(self._port_conf.speed_reduction_ppm)
-        await self.set_stagger_step(test_conf.port_stagger_steps)
-        await self.set_packet_size_if_mix(test_conf.frame_sizes)
+            plan.append(PortSetting("mac_address", mac, port.net_config.mac_address.set(str(mac))))
+        plan += self._speed_mode_settings()
+        plan += [
+            PortSetting("latency_offset", port_conf.latency_offset_ms, port.latency_config.offset.set(offset=port_conf.latency_offset_ms)),
+            PortSetting("interframe_gap", int(port_conf.inter_frame_gap), port.interframe_gap.set(min_byte_count=int(port_conf.inter_frame_gap))),
+            PortSetting("pause", enums.OnOff(int(port_conf.pause_mode_enabled)), port.pause.set(on_off=enums.OnOff(int(port_conf.pause_mode_enabled)))),
+            PortSetting("latency_mode", latency_mode.to_xmp(), port.latency_config.mode.set(latency_mode.to_xmp())),
+            PortSetting("ipv4_arp_reply", enums.OnOff.ON, port.net_config.ipv4.arp_reply.set_on()),  # P_ARPREPLY
+            PortSetting("ipv6_arp_reply", enums.OnOff.ON, port.net_config.ipv6.arp_reply.set_on()),  # P_ARPV6REPLY
+            PortSetting("ipv4_ping_reply", enums.OnOff.ON, port.net_config.ipv4.ping_reply.set_on()),  # P_PINGREPLY
+            PortSetting("ipv6_ping_reply", enums.OnOff.ON, port.net_config.ipv6.ping_reply.set_on()),  # P_PINGV6REPLY
+        ]
+        plan += self._ip_address_settings()
+        plan += self._brr_mode_settings()
+        plan += self._mdi_mdix_mode_settings()
+        if port_conf.fec_mode != const.FECModeStr.OFF:
+            # Loki-100G-5S-2P  module 4 * 25G support FC_FEC mode
+            plan.append(PortSetting("fec_mode", port_conf.fec_mode, port.fec_mode.set(port_conf.fec_mode.to_xmp())))  # PP_FECMODE
+        plan += self._anlt_settings()
+        plan += self._auto_negotiation_settings()
+        plan += self._max_header_settings()
+        plan.append(PortSetting("speed_reduction", port_conf.speed_reduction_ppm, port.speed.reduction.set(ppm=port_conf.speed_reduction_ppm)))
+        if test_conf.port_stagger_steps:
+            plan.append(PortSetting("stagger_step", test_conf.port_stagger_steps, port.tx_config.delay.set(test_conf.port_stagger_steps)))  # P_TXDELAY
+        plan += self._mix_settings(test_conf.frame_sizes)
+        return plan
+
+    async def setup_port(
+        self, test_conf: "TestConfigData", latency_mode: "const.LatencyModeStr"
+    ) -> None:
+        """ write the settings which differ from the ones read back after the port reset, in one batch """
+        current = self.properties.port_settings
+        changed = [
+            setting
+            for setting in self.configuration_plan(test_conf, latency_mode)
+            if setting.name not in current or current[setting.name] != setting.value
+        ]
+        if changed:
+            await driver_utils.apply(*[setting.token for setting in changed])
+        current.update((setting.name, setting.value) for setting in changed)
+        self.properties.native_mac_address = MacAddress(current["mac_address"])
         self._get_use_port_speed()
 
     async def set_rx_tables(self) -> None:
@@ -486,18 +581,16 @@ class PortStruct:
         )
         return self.send_port_speed
 
-    async def query(self) -> None:
-        """ read port statistics """
-        extra = self.port_ins.statistics.rx.extra.get()
-        stream_tasks = [stream_struct.query() for stream_struct in self.stream_structs]
-        extra_tasks = [extra] if self.port_conf.is_rx_port else []
-        results = await asyncio.gather(*extra_tasks, *stream_tasks)
-        if self.port_conf.is_rx_port:
-            # Only the RX port need to read gap data. Gap Monitor is set on the RX port
-            extra_r: commands.PR_EXTRA.GetDataAttr = results[0]
-            self._statistic.fcs_error_frames = extra_r.fcs_error_count
-            self._statistic.gap_duration = extra_r.gap_duration
-            self._statistic.gap_count = extra_r.gap_count
+    def get_extra_tokens(self) -> List["misc.Token"]:
+        """ Only the RX port need to read gap data. Gap Monitor is set on the RX port """
+        if not self.port_conf.is_rx_port:
+            return []
+        return [self.port_ins.statistics.rx.extra.get()]
+
+    def decode_extra(self, extra_r: "commands.PR_EXTRA.GetDataAttr") -> None:
+        self._statistic.fcs_error_frames = extra_r.fcs_error_count
+        self._statistic.gap_duration = extra_r.gap_duration
+        self._statistic.gap_count = extra_r.gap_count
 
 
 TypeConf = Union["ThroughputTest", "LatencyTest", "FrameLossRateTest", "BackToBackTest"]
@@ -516,6 +609,7 @@ class Properties:
     peers: List["PortStruct"] = field(default_factory=list)
     arp_trunks: Set[RXTableData] = field(default_factory=set)
     ndp_trunks: Set[RXTableData] = field(default_factory=set)
+    refresh_streams: List["misc.GenuineStream"] = field(default_factory=list)
 
     rate_percent: float = 0.0
     send_port_speed: float = 0.0
@@ -524,6 +618,7 @@ class Properties:
     traffic_status: bool = False
     sync_status: bool = True
     physical_port_speed: float = 0.0
+    port_settings: Dict[str, Any] = field(default_factory=dict)  # setting name -> value on the port
 
     def get_modifier_range(self, stream_id: int) -> Tuple[int, int]:
         """ calculate modifier range by test_port_index. """
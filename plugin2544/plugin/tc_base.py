@@ -1,8 +1,8 @@
 import asyncio
 import time
-from copy import deepcopy
 import math
-from typing import List, Optional, Generator, TYPE_CHECKING, Tuple
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Generator, TYPE_CHECKING, Tuple
 from .learning import (
     AddressRefreshHandler,
     add_L2L3_learning_preamble_steps,
@@ -17,6 +17,9 @@ from .statistics import FinalStatistic, StatisticParams
 from .tc_throughput import get_initial_throughput_boundaries
 from .tc_back_to_back import get_initial_back_to_back_boundaries, BackToBackBoutEntry
 from .test_result import aggregate_data
+from .result_journal import ResultJournal
+from .accumulator import RepetitionAccumulator
+from .command_trace import trace_phase, traced_phase
 from ..utils import constants as const
 from .test_type_config import (
     LatencyConfig,
@@ -28,6 +31,7 @@ from .test_type_config import (
 from loguru import logger
 
 if TYPE_CHECKING:
+    from .structure import PortStruct
     from .test_resource import ResourceManager
     from .test_config import TestConfigData
     from ..utils.interfaces import TestSuitePipe, PStateConditions
@@ -41,12 +45,16 @@ class TestCaseProcessor:
         test_type_confs: List["AllTestTypeConfig"],
         state_conditions: "PStateConditions",
         xoa_out: "TestSuitePipe",
+        journal: Optional[ResultJournal] = None,
     ) -> None:
         self.resources: "ResourceManager" = resources
         self.xoa_out: "TestSuitePipe" = xoa_out
         self.__test_conf: "TestConfigData" = test_conf
         self.address_refresh_handler: Optional[AddressRefreshHandler] = None
-        self.test_results = {}  # save result to calculate average
+        # accumulate result to calculate average: test type -> frame size -> rate -> accumulator
+        self.test_results: Dict[
+            "const.TestType", Dict[float, Dict[Optional[float], RepetitionAccumulator]]
+        ] = {}
         self._all_test_type_conf: List["AllTestTypeConfig"] = test_type_confs  # all test type that need to run
         self.progress = Progress(
             total=sum(type_conf.process_count for type_conf in self._all_test_type_conf)
@@ -54,6 +62,13 @@ class TestCaseProcessor:
         )
         self._throughput_map = {}   # save throughput rate for latency relative to throughput use
         self.state_conditions = state_conditions
+        self.journal: Optional[ResultJournal] = journal  # a fork shares the journal opened by its parent
+        if self.journal is None and self.__test_conf.result_journal_path:
+            self.journal = ResultJournal(
+                self.__test_conf.result_journal_path,
+                self.__test_conf.resume_from_journal,
+            )
+            self._throughput_map.update(self.journal.throughput_map)
 
     def gen_loop(
         self, type_conf: "AllTestTypeConfig"
@@ -75,11 +90,68 @@ class TestCaseProcessor:
             return None
         self.address_refresh_handler = await setup_address_arp_refresh(self.resources)
 
+    def fork(self, resources: "ResourceManager") -> "TestCaseProcessor":
+        """ processor on a subset of the resources, sharing results and progress with this one """
+        processor = TestCaseProcessor(
+            resources,
+            self.__test_conf,
+            self._all_test_type_conf,
+            self.state_conditions,
+            self.xoa_out,
+            journal=self.journal,
+        )
+        processor.test_results = self.test_results
+        processor.progress = self.progress
+        processor._throughput_map = self._throughput_map
+        return processor
+
+    async def _consume_loop(
+        self,
+        type_conf: "AllTestTypeConfig",
+        loop_items: Deque[Tuple[int, float]],
+    ) -> None:
+        await self.prepare()
+        while loop_items:
+            iteration, current_packet_size = loop_items.popleft()
+            await self.resources.setup_tpld_mode(current_packet_size)
+            await self.resources.setup_packet_size(current_packet_size)
+            await self.run(type_conf, current_packet_size, iteration)
+
+    async def run_on_port_groups(
+        self,
+        type_conf: "AllTestTypeConfig",
+        port_groups: List[List["PortStruct"]],
+    ) -> None:
+        """
+        every independent port group takes the next (repetition, frame size) of the loop,
+        so different frame sizes are searched at the same time, each one on a single port group.
+        """
+        loop_items = deque(self.gen_loop(type_conf))
+        processors = [
+            self.fork(self.resources.create_view(port_group))
+            for port_group in port_groups
+        ]
+        await asyncio.gather(
+            *[processor._consume_loop(type_conf, loop_items) for processor in processors]
+        )
+        # streams were bound to the counter store of each group
+        self.resources.counter_store.build(self.resources.port_structs)
+        if type_conf.repetition > 1:
+            self.cal_average(type_conf)
+
     async def start(self) -> None:
         await self.prepare()
+        port_groups = self.resources.get_independent_port_groups()
         while True:
             self.progress.send(self.xoa_out)
             for type_conf in self._all_test_type_conf:
+                if (
+                    isinstance(type_conf, ThroughputConfig)
+                    and type_conf.use_parallel_port_groups
+                    and len(port_groups) > 1
+                ):
+                    await self.run_on_port_groups(type_conf, port_groups)
+                    continue
                 for iteration, current_packet_size in self.gen_loop(type_conf):
 
                     await self.resources.setup_tpld_mode(current_packet_size)
@@ -100,6 +172,9 @@ class TestCaseProcessor:
             if not self.__test_conf.repeat_test_until_stopped:
                 break
             self.progress.add_loop(self.xoa_out)
+        logger.debug(f"Wait states: {self.resources.readiness.report()}")
+        if self.journal:
+            self.journal.close()
 
     async def run(
         self,
@@ -108,6 +183,8 @@ class TestCaseProcessor:
         iteration: int,
     ) -> None:
         if isinstance(test_type_conf, ThroughputConfig):
+            if self._restore_completed(test_type_conf, current_packet_size, iteration):
+                return
             await self._throughput(
                 test_type_conf, current_packet_size, iteration
             )  # type:ignore
@@ -124,6 +201,7 @@ class TestCaseProcessor:
                 test_type_conf, current_packet_size, iteration
             )  # type:ignore
 
+    @traced_phase("learning")
     async def add_learning_steps(self, current_packet_size: float) -> None:
         await self.resources.stop_traffic()
         await add_L2L3_learning_preamble_steps(self.resources, current_packet_size)
@@ -132,6 +210,7 @@ class TestCaseProcessor:
             self.resources, current_packet_size
         )
 
+    @traced_phase("start_test")
     async def start_test(
         self, test_type_conf: "AllTestTypeConfig", current_packet_size: float
     ) -> None:
@@ -147,7 +226,16 @@ class TestCaseProcessor:
         await self.resources.start_traffic(self.__test_conf.use_port_sync_start)
         await schedule_arp_refresh(self.resources, self.address_refresh_handler)
 
-    async def collect(self, params: "StatisticParams") -> "FinalStatistic":
+    @traced_phase("collect")
+    async def collect(
+        self,
+        params: "StatisticParams",
+        is_certain_failure: Optional[Callable[["FinalStatistic", float], bool]] = None,
+    ) -> "FinalStatistic":
+        """
+        is_certain_failure: optional early termination check on live data,
+        traffic is stopped as soon as the trial can no longer pass.
+        """
         start_time = time.time()
         each_query_fail = False
         final_fail = False
@@ -162,8 +250,15 @@ class TestCaseProcessor:
             self.xoa_out.send_statistics(data)  # send live data
             if should_quit:
                 break
+            elapsed = time.time() - start_time
+            if is_certain_failure and is_certain_failure(data, elapsed):
+                logger.debug(f"Early termination at {params.rate_percent}% after {elapsed:.1f}s")
+                await self.resources.stop_traffic()
+                # rate of final data should base on the time traffic actually ran
+                params = params.copy(update={"duration": min(elapsed, params.duration)})
+                break
             await asyncio.sleep(const.INTERVAL_SEND_STATISTICS)
-        await asyncio.sleep(const.DELAY_STATISTICS)
+        await self.resources.wait_counters_settled()
         final_data = await aggregate_data(self.resources, params, is_final=True)    # handle Final data
         if final_fail:
             final_data.set_result_state(const.ResultState.FAIL)
@@ -182,6 +277,8 @@ class TestCaseProcessor:
         for rate in test_type_conf.rate_sweep_list:
             # tx_rate_nominal_percent = rate_percent
             rate_percent = rate * factor
+            if self._restore_completed(test_type_conf, current_packet_size, repetition, rate_percent):
+                continue
             params = StatisticParams(
                 loop=self.progress.loop,
                 test_case_type=test_type_conf.test_type,
@@ -208,6 +305,8 @@ class TestCaseProcessor:
     ):
         await self.resources.set_gap_monitor(test_type_conf.use_gap_monitor, test_type_conf.gap_monitor_start_microsec, test_type_conf.gap_monitor_stop_frames)
         for rate_percent in test_type_conf.rate_sweep_list:
+            if self._restore_completed(test_type_conf, current_packet_size, repetition, rate_percent):
+                continue
             await self.add_learning_steps(current_packet_size)
             self.resources.set_rate_percent(rate_percent)   # must set rate after learning steps and before start test
             await self.start_test(test_type_conf, current_packet_size)
@@ -242,25 +341,36 @@ class TestCaseProcessor:
             duration=test_type_conf.actual_duration,
             rate_result_scope=test_type_conf.result_scope,
         )
+
+        def is_certain_failure(data: "FinalStatistic", elapsed: float) -> bool:
+            # only stop a trial early when every boundary is going to move its right bound
+            return all(
+                boundary.is_certain_failure(data, elapsed) for boundary in boundaries
+            )
+
         while True:
-            await asyncio.sleep(const.DELAY_STATISTICS)
+            await self.resources.wait_counters_settled()
             should_continue = any(
                 boundary.port_should_continue for boundary in boundaries
             )
             if not should_continue:
                 break
-            for boundary in boundaries:
-                boundary.update_rate()
-            params.set_rate_percent(boundaries[0].rate_percent)
-            self.resources.set_rate_percent(params.rate_percent)
-            await self.start_test(test_type_conf, current_packet_size)
-            result = await self.collect(params)
-            result.is_final = True
-            self.xoa_out.send_statistics(result)  # send intermediate data: is_final = True & result_state = 'PENDING'
+            with trace_phase("search_step"):
+                for boundary in boundaries:
+                    boundary.update_rate()
+                params.set_rate_percent(boundaries[0].rate_percent)
+                self.resources.set_rate_percent(params.rate_percent)
+                await self.start_test(test_type_conf, current_packet_size)
+                result = await self.collect(
+                    params,
+                    is_certain_failure if test_type_conf.use_early_termination else None,
+                )
+                result.is_final = True
+                self.xoa_out.send_statistics(result)  # send intermediate data: is_final = True & result_state = 'PENDING'
 
-            for boundary in boundaries:
-                boundary.update_boundary(result)
-            await self.resources.set_tx_time_limit(0)
+                for boundary in boundaries:
+                    boundary.update_boundary(result)
+                await self.resources.set_tx_time_limit(0)
 
         if not test_type_conf.is_per_source_port:
             final = boundaries[0].best_final_result
@@ -313,6 +423,8 @@ class TestCaseProcessor:
     ) -> None:
         await self.add_learning_steps(current_packet_size)
         for rate_percent in test_type_conf.rate_sweep_list:
+            if self._restore_completed(test_type_conf, current_packet_size, repetition, rate_percent):
+                continue
             result = None
             # logger.debug(f'Rate: {rate_percent}')
             params = StatisticParams(
@@ -331,7 +443,7 @@ class TestCaseProcessor:
                 rate_percent,
             )
             while True:
-                await asyncio.sleep(const.DELAY_STATISTICS)
+                await self.resources.wait_counters_settled()
                 # if not any(boundary.port_should_continue for boundary in boundaries):
                 #     logger.debug('Break Loop')
                 #     break
@@ -340,13 +452,14 @@ class TestCaseProcessor:
                 if not any(port_should_continue):
                     break
                 # logger.debug(f'Packet: {boundaries[0].current}')
-                await self._setup_packet_limit(boundaries)
-                await self.start_test(test_type_conf, current_packet_size)
-                result = await self.collect(params)
-                result.is_final = True
-                self.xoa_out.send_statistics(result)  # send intermediate data: is_final = True & result_state = 'PENDING'
-                for boundary in boundaries:
-                    boundary.update_boundaries(result)
+                with trace_phase("search_step"):
+                    await self._setup_packet_limit(boundaries)
+                    await self.start_test(test_type_conf, current_packet_size)
+                    result = await self.collect(params)
+                    result.is_final = True
+                    self.xoa_out.send_statistics(result)  # send intermediate data: is_final = True & result_state = 'PENDING'
+                    for boundary in boundaries:
+                        boundary.update_boundaries(result)
             if all(boundary.port_test_passed for boundary in boundaries):
                 result.set_result_state(const.ResultState.DONE)
             else:
@@ -358,40 +471,25 @@ class TestCaseProcessor:
         if frame_size not in self._throughput_map:
             self._throughput_map[frame_size] = 0
         self._throughput_map[frame_size] = max(rate, self._throughput_map[frame_size])
-
-    def _average_statistic(
-        self, statistic_lists: List[FinalStatistic]
-    ) -> Optional[FinalStatistic]:
-        final: Optional[FinalStatistic] = None
-        for statistic in statistic_lists:
-            if not final:
-                final = deepcopy(statistic)
-            else:
-                final.sum(statistic)
-        if final:
-            final.repetition = "avg"
-            final.avg(len(statistic_lists))
-        return final
+        if self.journal:
+            self.journal.set_throughput(frame_size, self._throughput_map[frame_size])
 
     def _average_per_frame_size(
         self, test_type_conf: "AllTestTypeConfig", frame_size: float
     ) -> None:
-        final: Optional[FinalStatistic] = None
+        """
+        throughput test calculate average based on same frame size,
+        other tests calculate average based on same frame size and same rate
+        """
         result = self.test_results[test_type_conf.test_type][frame_size]
-        if isinstance(test_type_conf, ThroughputConfig):
-            """throughput test calculate average based on same frame size"""
-            statistic_lists = []
-            for s in result.values():
-                statistic_lists.extend(s)
-            final = self._average_statistic(statistic_lists)
+        for rate, accumulator in result.items():
+            final = accumulator.average()
             if final:
-                self.xoa_out.send_statistics(final) # send average statistics
-        else:
-            """calculate average based on same frame size and same rate"""
-            for statistic_lists in result.values():
-                final = self._average_statistic(statistic_lists)
-                if final:
-                    self.xoa_out.send_statistics(final)  # send average statistics
+                self.xoa_out.send_statistics(final)  # send average statistics
+                logger.info(
+                    f"{test_type_conf.test_type.value} frame size {frame_size} rate {'all' if rate is None else rate}: "
+                    f"{accumulator.count} repetitions, spread {accumulator.summary() or 'none'}"
+                )
 
     def cal_average(
         self, test_type_conf: "AllTestTypeConfig", frame_size: Optional[float] = None
@@ -404,26 +502,49 @@ class TestCaseProcessor:
             for f in result.keys():
                 self._average_per_frame_size(test_type_conf, f)
 
+    def _restore_completed(
+        self,
+        test_type_conf: "AllTestTypeConfig",
+        frame_size: float,
+        repetition: int,
+        rate_percent: Optional[float] = None,
+    ) -> bool:
+        """ resume from journal: reuse the result if this (test type, frame size, rate, repetition) is completed """
+        if not self.journal:
+            return False
+        key = self.journal.make_key(
+            self.progress.loop,
+            test_type_conf.test_type.value,
+            frame_size,
+            repetition,
+            rate_percent,
+        )
+        result = self.journal.get_completed(key)
+        if not result:
+            return False
+        self._save_result(result)
+        self.progress.send(self.xoa_out)
+        return True
+
+    def _save_result(self, result: "FinalStatistic") -> None:
+        """ throughput results of all rates are averaged together, so they share one accumulator """
+        rate_key = None if result.test_case_type.is_throughput else result.tx_rate_percent
+        result_by_rate = self.test_results.setdefault(
+            result.test_case_type, {}
+        ).setdefault(result.frame_size, {})
+        if rate_key not in result_by_rate:
+            result_by_rate[rate_key] = RepetitionAccumulator()
+        result_by_rate[rate_key].add(result)
+
     def _add_result(
         self, result: Optional["FinalStatistic"]
     ) -> None:
         if not (result and result.is_final):
             logger.debug('Add Result: Please check final status')
             return
-        if result.test_case_type not in self.test_results:
-            self.test_results[result.test_case_type] = {}
-        if result.frame_size not in self.test_results[result.test_case_type]:
-            self.test_results[result.test_case_type][result.frame_size] = {}
-        if (
-            result.tx_rate_percent
-            not in self.test_results[result.test_case_type][result.frame_size]
-        ):
-            self.test_results[result.test_case_type][result.frame_size][
-                result.tx_rate_percent
-            ] = []
-        self.test_results[result.test_case_type][result.frame_size][
-            result.tx_rate_percent
-        ].append(result)
+        self._save_result(result)
+        if self.journal:
+            self.journal.append(result)
         self.xoa_out.send_statistics(result)    # send final statistics
         self.progress.send(self.xoa_out)
 
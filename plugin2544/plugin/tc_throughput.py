@@ -5,6 +5,7 @@ from .test_resource import ResourceManager
 
 from .structure import PortStruct
 from .test_type_config import ThroughputConfig
+from ..utils import constants as const
 from loguru import logger
 
 class ThroughputBoutEntry:
@@ -73,6 +74,29 @@ class ThroughputBoutEntry:
         self.rate_percent = self.next
         # logger.debug(f"running rate: {self.current}")
 
+    def is_certain_failure(self, live_result: "FinalStatistic", elapsed: float) -> bool:
+        """
+        live loss frames can not be recovered, so once they exceed the acceptable loss
+        of the frames expected for the whole trial, the trial must fail.
+        """
+        if elapsed < const.MIN_EARLY_TERMINATION_SECOND:
+            return False
+        if self._throughput_conf.is_per_source_port:
+            tx_frames = self._port_struct.statistic.tx_counter.frames
+            loss_frames = self._port_struct.statistic.loss_frames
+        else:
+            tx_frames = live_result.total.tx_counter.frames
+            loss_frames = live_result.total.rx_loss_frames
+        if not tx_frames:
+            return False
+        expected_tx_frames = tx_frames * max(
+            self._throughput_conf.actual_duration / elapsed, 1.0
+        )
+        return (
+            loss_frames * 100.0
+            > self._throughput_conf.acceptable_loss_pct * expected_tx_frames
+        )
+
     def update_boundary(self, result: Optional["FinalStatistic"]) -> None:
         self._port_should_continue = self._port_test_passed = False
         if not result:
@@ -35,6 +35,22 @@ class TestConfigData:
     def repeat_test_until_stopped(self) -> bool:
         return self.__test_conf.test_execution_config.repeat_test_until_stopped
 
+    @property
+    def result_journal_path(self) -> str:
+        return self.__test_conf.test_execution_config.result_journal_path
+
+    @property
+    def resume_from_journal(self) -> bool:
+        return self.__test_conf.test_execution_config.resume_from_journal
+
+    @property
+    def command_trace_path(self) -> str:
+        return self.__test_conf.test_execution_config.command_trace_path
+
+    @property
+    def command_trace_format(self) -> const.TraceFormat:
+        return self.__test_conf.test_execution_config.command_trace_format
+
     @property
     def delay_after_port_reset_second(self) -> int:
         return (
@@ -165,6 +181,10 @@ class TestConfigData:
             self.__test_conf.test_execution_config.l23_learning_options.arp_refresh_period_second
         )
 
+    @property
+    def arp_refresh_mode(self) -> "const.ArpRefreshMode":
+        return self.__test_conf.test_execution_config.l23_learning_options.arp_refresh_mode
+
     @property
     def delay_after_flow_based_learning_ms(self) -> int:
         return (
@@ -183,6 +203,16 @@ class TestConfigData:
             self.__test_conf.test_execution_config.mac_learning_options.mac_learning_frame_count
         )
 
+    @property
+    def mac_learning_round_gap_second(self) -> float:
+        return (
+            self.__test_conf.test_execution_config.mac_learning_options.mac_learning_round_gap_ms / 1000
+        )
+
+    @property
+    def counters_settle_second(self) -> float:
+        return self.__test_conf.test_execution_config.counters_settle_ms / 1000
+
     @property
     def mixed_packet_length(self) -> List[int]:
         mix_size_length_dic = self.frame_sizes.mixed_length_config.dict()
@@ -1,18 +1,24 @@
 from __future__ import annotations
 import asyncio
 import time
-from typing import TYPE_CHECKING, Union, Tuple
+from typing import TYPE_CHECKING, Optional, Union, Tuple
 from xoa_driver import testers as xoa_testers, modules, enums, utils
-from .learning import add_mac_learning_steps
+from .arp_request import ArpResolver
+from .learning import MacLearningFrames, add_mac_learning_steps
 from .config_checkers import check_config
-from .common import get_peers_for_source
+from .common import apply_all, get_peers_for_source
 from .setup_streams import setup_streams
+from .statistic_snapshot import StatisticSnapshot
+from .counter_store import CounterStore
+from .readiness import ReadinessMonitor
 from .structure import PortStruct
 
 from ..utils import constants as const, exceptions
+from ..utils.scheduler import Scheduler
 
 if TYPE_CHECKING:
     from xoa_core.core.test_suites.datasets import PortIdentity
+    from xoa_driver import misc
     from .test_config import TestConfigData
     from ..model.m_port_config import PortConfiguration
     from ..utils.interfaces import TestSuitePipe
@@ -36,6 +42,12 @@ class ResourceManager:
         self.xoa_out: "TestSuitePipe" = xoa_out
         self.__test_conf: "TestConfigData" = test_conf
         self.mapping: dict[str, list[int]] = {}
+        self.last_snapshot: Optional["StatisticSnapshot"] = None
+        self.counter_store = CounterStore()
+        self.readiness = ReadinessMonitor(self)
+        self.scheduler = Scheduler()
+        self.arp_resolver = ArpResolver()
+        self.mac_learning_frames: Optional[MacLearningFrames] = None
 
     @property
     def test_conf(self):
@@ -97,7 +109,8 @@ class ResourceManager:
         await self.setup_ports(latency_mode)
         await self.setup_sweep_reduction()
         await self.add_toggle_port_sync_state_steps()
-        await setup_streams(self.port_structs, self.__test_conf)
+        await setup_streams(self.port_structs, self.__test_conf, self.arp_resolver)
+        self.counter_store.build(self.port_structs)
         await add_mac_learning_steps(self, const.MACLearningMode.ONCE)
 
     async def stop_traffic(self) -> None:
@@ -107,7 +120,7 @@ class ResourceManager:
                 for port_struct in self.port_structs
             ]
         )
-        await asyncio.sleep(const.DELAY_STOPPED_TRAFFIC)
+        await self.readiness.wait_traffic_stopped(const.DELAY_STOPPED_TRAFFIC)
 
     async def setup_sweep_reduction(self) -> None:
         if (
@@ -205,6 +218,40 @@ class ResourceManager:
             for peer_struct in dest_ports:
                 port_struct.properties.register_peer(peer_struct)
 
+    def get_independent_port_groups(self) -> list[list["PortStruct"]]:
+        """
+        split ports into groups which never send traffic to each other,
+        only pair topology can have more than one group
+        """
+        if not self.__test_conf.is_pair_topology:
+            return [self.port_structs]
+        groups: list[list["PortStruct"]] = []
+        for port_struct in self.port_structs:
+            merged = [port_struct, *port_struct.properties.peers]
+            for group in [g for g in groups if any(p in g for p in merged)]:
+                groups.remove(group)
+                merged += group
+            groups.append(merged)
+        groups = [[p for p in self.port_structs if p in group] for group in groups]
+        return sorted(groups, key=lambda group: self.port_structs.index(group[0]))
+
+    def create_view(self, port_structs: list["PortStruct"]) -> "ResourceManager":
+        """ resource manager on a subset of ports, ports and streams are shared with this one """
+        view = ResourceManager(
+            self.__testers,
+            self.all_confs,
+            self.__port_identities,
+            self.__test_conf,
+            self.xoa_out,
+        )
+        view.port_structs = port_structs
+        view.build_map()
+        view.counter_store.build(port_structs)
+        view.readiness.records = self.readiness.records
+        view.scheduler = self.scheduler
+        view.arp_resolver = self.arp_resolver
+        return view
+
     async def setup_tpld_mode(self, current_packet_size: float) -> None:
         """use_micro_tpld_on_demand and can use micro tpld"""
         use_micro_tpld_on_demand = self.test_conf.use_micro_tpld_on_demand
@@ -323,7 +370,38 @@ class ResourceManager:
         await asyncio.gather(
             *[port_struct.clear_statistic() for port_struct in self.port_structs]
         )
-        await asyncio.sleep(const.DELAY_CLEAR_STATISTICS)
+        await self.readiness.wait_counters_cleared(const.DELAY_CLEAR_STATISTICS)
+
+    async def wait_counters_settled(self) -> None:
+        """ wait until traffic stopped and counters stop changing, before reading final statistic """
+        await self.stop_refresh_streams()
+        settle_second = self.__test_conf.counters_settle_second
+        await self.readiness.wait_counters_settled(settle_second, settle_second + const.DELAY_STATISTICS)
+
+    @property
+    def refresh_ports(self) -> list["PortStruct"]:
+        """ rx only ports sending ARP/NDP refresh from their own stream """
+        return [
+            port_struct
+            for port_struct in self.port_structs
+            if port_struct.properties.refresh_streams
+        ]
+
+    async def start_refresh_streams(self) -> None:
+        await self._set_refresh_traffic(enums.StartOrStop.START)
+
+    async def stop_refresh_streams(self) -> None:
+        """ the refresh streams run as long as the test traffic, like the refresh packets do """
+        await self._set_refresh_traffic(enums.StartOrStop.STOP)
+
+    async def _set_refresh_traffic(self, on_off: enums.StartOrStop) -> None:
+        """ one batch of P_TRAFFIC per tester """
+        tokens: dict[str, list["misc.Token"]] = {}
+        for port_struct in self.refresh_ports:
+            tokens.setdefault(port_struct.port_identity.tester_id, []).append(
+                port_struct.set_traffic(on_off)
+            )
+        await asyncio.gather(*[apply_all(tester_tokens) for tester_tokens in tokens.values()])
 
     async def query_traffic_status(self) -> None:
         await asyncio.gather(
@@ -370,8 +448,8 @@ class ResourceManager:
     ) -> None:
         for port_struct in self.port_structs:
             port_struct.init_counter(packet_size, duration, is_final)
-        await asyncio.gather(
-            *[port_struct.query() for port_struct in self.port_structs]
-        )
+        snapshot = StatisticSnapshot(self.port_structs, self.counter_store)
+        await snapshot.take()
+        self.last_snapshot = snapshot
         for port_struct in self.port_structs:
             port_struct.statistic.calculate_rate()
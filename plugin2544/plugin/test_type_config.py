@@ -112,6 +112,14 @@ class ThroughputConfig(BaseTestType):
     @property
     def acceptable_loss_pct(self) -> float:
         return self._conf.acceptable_loss_pct
+
+    @property
+    def use_early_termination(self) -> bool:
+        return self._conf.use_early_termination and self.is_time_duration
+
+    @property
+    def use_parallel_port_groups(self) -> bool:
+        return self._conf.use_parallel_port_groups
     
     @property
     def process_count(self) -> int:
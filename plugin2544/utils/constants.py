@@ -13,6 +13,7 @@ class CaseInsensitiveEnum(Enum):
 
 MICRO_TPLD_LENGTH = 6
 ETHERNET_FCS_LENGTH = 4
+ETHERNET_MIN_FRAME_LENGTH = 64
 STANDARD_TPLD_LENGTH = 20
 MIN_PAYLOAD_LENGTH = 2
 MICRO_TPLD_TOTAL_LENGTH = MICRO_TPLD_LENGTH + ETHERNET_FCS_LENGTH
@@ -20,6 +21,7 @@ STANDARD_TPLD_TOTAL_LENGTH = (
     STANDARD_TPLD_LENGTH + MIN_PAYLOAD_LENGTH + ETHERNET_FCS_LENGTH
 )
 MIN_REFRESH_TIMER_INTERNAL = 100.0
+ARP_SENDER_IP_POSITION = 28  # byte position of the ARP sender IP in an ethernet frame
 DEFAULT_PACKET_SIZE_LIST = (64, 128, 256, 512, 1024, 1280, 1518)
 MIXED_PACKET_SIZE = (
     56,
@@ -69,7 +71,7 @@ AutoNegPorts = (
 PCSPMAPorts = (ports.PThor400G7S1P_c, ports.PThor400G7S1P_b)
 
 # for asyncio.sleep
-DELAY_LEARNING_ARP = 1
+DELAY_LEARNING_ARP = 1  # longest wait between two ARP/NDP request polls
 DELAY_LEARNING_MAC = 1
 DELAY_STATISTICS = 5
 DELAY_STOPPED_TRAFFIC = 1
@@ -78,6 +80,12 @@ DELAY_TEST_MUST_FINISH = 10
 DELAY_CLEAR_STATISTICS = 1
 INTERVAL_CHECK_LEARNING_TRAFFIC = 0.1
 INTERVAL_SEND_STATISTICS = 1
+MIN_EARLY_TERMINATION_SECOND = 2
+INTERVAL_CHECK_READINESS = 0.1
+INTERVAL_ARP_REQUEST_RETRY = 0.05  # first wait between ARP/NDP request polls, doubled on each retry
+ARP_REQUEST_TIMEOUT = 5
+ARP_CACHE_TTL_SECOND = 300
+ARP_RESOLVER_STREAMS_PER_PORT = 4
 
 
 class CounterType(CaseInsensitiveEnum):
@@ -85,6 +93,17 @@ class CounterType(CaseInsensitiveEnum):
     LATENCY = -2147483648
 
 
+class WaitState(Enum):
+    TRAFFIC_STOPPED = "traffic_stopped"
+    COUNTERS_CLEARED = "counters_cleared"
+    COUNTERS_SETTLED = "counters_settled"
+
+
+class TraceFormat(CaseInsensitiveEnum):
+    JSON = "json"
+    CHROME = "chrome_trace"
+
+
 class PortCounterType(CaseInsensitiveEnum):
     TX = 0
     RX = 1
@@ -179,6 +198,15 @@ class MACLearningMode(CaseInsensitiveEnum):
     EVERYTRIAL = "every_trial"
 
 
+class ArpRefreshMode(CaseInsensitiveEnum):
+    PACKETS = "packets"  # P_XMITONE packets sent by the scheduler
+    STREAM = "stream"  # low rate refresh stream generated by the port
+
+    @property
+    def is_stream(self) -> bool:
+        return self == type(self).STREAM
+
+
 class DurationType(CaseInsensitiveEnum):
     TIME = "time"
     FRAME = "frames"
@@ -216,6 +244,10 @@ class TestType(CaseInsensitiveEnum):
     FRAME_LOSS_RATE = "loss"
     BACK_TO_BACK = "back_to_back"
 
+    @property
+    def is_throughput(self) -> bool:
+        return self == type(self).THROUGHPUT
+
     @property
     def is_latency(self) -> bool:
         return self == type(self).LATENCY_JITTER
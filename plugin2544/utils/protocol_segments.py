@@ -1,8 +1,9 @@
-from typing import TYPE_CHECKING, Optional, Union
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Tuple, Union
+from ..utils.field import IPv4Address, IPv6Address
 
 if TYPE_CHECKING:
-    from ..model.m_protocol_segment import ProtocolSegment
-    from ..utils.field import IPv4Address, IPv6Address, MacAddress
+    from ..model.m_protocol_segment import ProtocolSegment, ProtocolSegmentProfileConfig, ValueRange
+    from ..utils.field import MacAddress
 
 
 ETHERNET_ADDRESS_SRC = "Src MAC addr"
@@ -42,3 +43,131 @@ def setup_segment_ipv6(
         segment[IPV6_ADDRESS_SRC] = src_ipv6.to_binary_string()
     if not dst_ipv6 or segment[IPV6_ADDRESS_DST].is_all_zero:
         segment[IPV6_ADDRESS_DST] = dst_ipv6.to_binary_string()
+
+
+class _Slot(NamedTuple):
+    """ field of the header whose value changes from stream to stream """
+    bit_offset: int  # from the start of the header
+    bit_length: int
+    address: str  # key of the stream addresses, empty for a value range
+    value_range: Optional["ValueRange"]
+    checksum_index: int  # index of the checksum of its segment, -1 if the segment has none
+    checksum_weight: int  # 2 ** (bit position in the segment % 16), weight of the field in the checksum
+
+
+class _Checksum(NamedTuple):
+    offset: int  # byte offset of the checksum in the header
+    base: int  # one's complement sum of the segment with the checksum and the stream fields zeroed, modulo 0xFFFF
+    base_is_zero: bool
+
+
+def _patch_bits(header: bytearray, bit_offset: int, bit_length: int, value: int) -> None:
+    if not bit_offset % 8 and not bit_length % 8:
+        start = bit_offset // 8
+        header[start : start + bit_length // 8] = value.to_bytes(bit_length // 8, "big")
+        return
+    first, last = bit_offset // 8, (bit_offset + bit_length + 7) // 8
+    shift = (last - first) * 8 - (bit_offset - first * 8) - bit_length
+    mask = ((1 << bit_length) - 1) << shift
+    current = int.from_bytes(header[first:last], "big")
+    header[first:last] = ((current & ~mask) | (value << shift)).to_bytes(last - first, "big")
+
+
+class HeaderTemplate:
+    """
+    Packet header of a protocol segment profile, compiled once per port.
+    The header of a stream is the template bytes with the stream addresses and the value ranges patched in,
+    and the segment checksums updated from the patched fields only.
+    Same bytes as setting up a deep copy of the profile and preparing it, without copying or re-encoding the profile.
+    """
+
+    def __init__(self, profile: "ProtocolSegmentProfileConfig") -> None:
+        self._slots: List[_Slot] = []
+        self._checksums: List[_Checksum] = []
+        header = bytearray()
+        for index, segment in enumerate(profile.segments):
+            addresses: Dict[str, str] = {}
+            if segment.type.is_ethernet and index == 0:
+                addresses = {ETHERNET_ADDRESS_SRC: "smac", ETHERNET_ADDRESS_DST: "dmac"}
+            elif segment.type.is_ipv4:
+                addresses = {IPV4_ADDRESS_SRC: "src_ipv4", IPV4_ADDRESS_DST: "dst_ipv4"}
+            elif segment.type.is_ipv6:
+                addresses = {IPV6_ADDRESS_SRC: "src_ipv6", IPV6_ADDRESS_DST: "dst_ipv6"}
+            bits: List[str] = []
+            dynamic: List[Tuple[int, int, str, Optional["ValueRange"]]] = []  # bit offset in segment, length, address, value range
+            position = 0
+            for field in segment.fields:
+                address = addresses.get(field.name, "") if field.is_all_zero else ""
+                if field.value_range or address:
+                    dynamic.append((position, field.bit_length, address, field.value_range))
+                    bits.append("0" * field.bit_length)
+                    position += field.bit_length
+                else:
+                    bits.append(field.value)
+                    position += len(field.value)
+            size = (position + 7) // 8
+            data = bytearray(int("".join(bits), 2).to_bytes(size, "big"))
+            padding = size * 8 - position  # prepare() pads the segment on the left
+            checksum_index = -1
+            if segment.checksum_offset:
+                data[segment.checksum_offset : segment.checksum_offset + 2] = b"\x00\x00"
+                checksum_index = len(self._checksums)
+                self._checksums.append(
+                    _Checksum(
+                        offset=len(header) + segment.checksum_offset,
+                        base=int.from_bytes(data, "big") % 0xFFFF,
+                        base_is_zero=not any(data),
+                    )
+                )
+            for bit_offset, bit_length, address, value_range in dynamic:
+                bit_offset += padding
+                self._slots.append(
+                    _Slot(
+                        bit_offset=len(header) * 8 + bit_offset,
+                        bit_length=bit_length,
+                        address=address,
+                        value_range=value_range,
+                        checksum_index=checksum_index,
+                        checksum_weight=1 << ((size * 8 - bit_offset - bit_length) % 16),
+                    )
+                )
+            header.extend(data)
+        self._header = bytes(header)
+
+    def build(
+        self,
+        src_mac: "MacAddress",
+        dst_mac: "MacAddress",
+        src_addr: Union["IPv4Address", "IPv6Address", None],
+        dst_addr: Union["IPv4Address", "IPv6Address", None],
+        arp_mac: Optional["MacAddress"] = None,
+    ) -> bytearray:
+        """ header of one stream, value ranges advance by one stream """
+        dst_mac = dst_mac if not arp_mac or arp_mac.is_empty else arp_mac
+        ip_version = "ipv4" if isinstance(src_addr, IPv4Address) and isinstance(dst_addr, IPv4Address) else ""
+        ip_version = "ipv6" if isinstance(src_addr, IPv6Address) and isinstance(dst_addr, IPv6Address) else ip_version
+        values = {
+            "smac": int(src_mac.to_hexstring() or "0", 16),
+            "dmac": int(dst_mac.to_hexstring() or "0", 16),
+            f"src_{ip_version}": int(src_addr) if ip_version else 0,
+            f"dst_{ip_version}": int(dst_addr) if ip_version else 0,
+        }
+        header = bytearray(self._header)
+        sums = [checksum.base for checksum in self._checksums]
+        non_zero = [not checksum.base_is_zero for checksum in self._checksums]
+        for slot in self._slots:
+            if slot.value_range:
+                value = slot.value_range.get_current_value()
+            else:
+                value = values.get(slot.address, 0)
+            if not value:
+                continue
+            _patch_bits(header, slot.bit_offset, slot.bit_length, value)
+            if slot.checksum_index >= 0:
+                sums[slot.checksum_index] += value * slot.checksum_weight
+                non_zero[slot.checksum_index] = True
+        for checksum, total, is_non_zero in zip(self._checksums, sums, non_zero):
+            # one's complement sum of a non zero segment is in 1..0xFFFF, congruent to the segment modulo 0xFFFF
+            total = (total - 1) % 0xFFFF + 1 if is_non_zero else 0
+            header[checksum.offset : checksum.offset + 2] = (~total & 0xFFFF).to_bytes(2, "big")
+        return header
@@ -1,6 +1,7 @@
 import asyncio
+from dataclasses import dataclass
 from enum import Enum
-from typing import Callable, Dict, Any
+from typing import Callable, Dict, Any, List, Optional, Tuple
 
 
 async def empty(count: int, *args: Any, **kw: Dict[str, Any]) -> bool:
@@ -23,24 +24,140 @@ class TimeType(Enum):
         }[self]
 
 
-async def periodical_job(
-    timing: float,
-    unit: str = "s",
-    do: Callable = empty,
-    *args: Any,
-    **kw: Dict[str, Any]
-) -> None:
-    count = 0
-    time_unit = TimeType(unit).scale
-    while True:
-        count += 1
-        should_quit = await do(count, *args, **kw)
-        await asyncio.sleep(time_unit * timing)
-        if should_quit:
-            break
-
-
-async def schedule(
-    timing: float, unit: str = "s", do: Callable = empty, *args, **kw
-) -> None:
-    asyncio.create_task(periodical_job(timing, unit, do, *args, **kw))
+class OverrunPolicy(Enum):
+    """ what to do with the ticks missed while a job ran longer than its period """
+    SKIP = "skip"  # drop them, the next tick stays on the period grid
+    CATCH_UP = "catch_up"  # run them back to back, the job keeps its average rate
+    RESTART = "restart"  # start a new period grid from the end of the job
+
+
+@dataclass
+class TickMetrics:
+    ticks: int = 0
+    overruns: int = 0
+    skipped_ticks: int = 0
+    max_jitter_second: float = 0.0  # how late a tick started after its deadline
+    total_jitter_second: float = 0.0
+
+    def add_tick(self, jitter_second: float) -> None:
+        self.ticks += 1
+        self.total_jitter_second += jitter_second
+        self.max_jitter_second = max(self.max_jitter_second, jitter_second)
+
+    @property
+    def mean_jitter_second(self) -> float:
+        return self.total_jitter_second / self.ticks if self.ticks else 0.0
+
+
+class PeriodicJob:
+    """
+    Run do(count, *args, **kw) every period until it returns True or the job is cancelled.
+    Ticks are absolute deadlines from the first one, so the period does not drift by the runtime of the job.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        period_second: float,
+        do: Callable,
+        args: Tuple[Any, ...],
+        kw: Dict[str, Any],
+        policy: OverrunPolicy,
+        metrics: TickMetrics,
+    ) -> None:
+        self.name = name
+        self.period_second = period_second
+        self.do = do
+        self.args = args
+        self.kw = kw
+        self.policy = policy
+        self.metrics = metrics
+        self.error: Optional[BaseException] = None
+        self.task: Optional["asyncio.Task"] = None
+
+    def start(self) -> "PeriodicJob":
+        self.task = asyncio.create_task(self.run())
+        return self
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        count = 0
+        try:
+            while True:
+                now = loop.time()
+                if now < deadline:
+                    await asyncio.sleep(deadline - now)
+                    now = loop.time()
+                self.metrics.add_tick(max(now - deadline, 0.0))
+                count += 1
+                if await self.do(count, *self.args, **self.kw):
+                    break
+                deadline += self.period_second
+                now = loop.time()
+                if now <= deadline:
+                    continue
+                self.metrics.overruns += 1
+                if self.policy == OverrunPolicy.SKIP:
+                    missed = int((now - deadline) // self.period_second) + 1
+                    self.metrics.skipped_ticks += missed
+                    deadline += missed * self.period_second
+                elif self.policy == OverrunPolicy.RESTART:
+                    deadline = now
+        except Exception as error:
+            self.error = error
+
+    @property
+    def done(self) -> bool:
+        return self.task is None or self.task.done()
+
+    def cancel(self) -> None:
+        if self.task and not self.task.done():
+            self.task.cancel()
+
+
+class Scheduler:
+    """
+    Registry of the periodic jobs of a test, tick metrics are summed per job name.
+    stop() cancels the jobs still running and raises the first error a job ended with,
+    or only returns the errors with raise_error=False, when another exception is already propagating.
+    """
+
+    def __init__(self) -> None:
+        self.jobs: List[PeriodicJob] = []
+        self.metrics: Dict[str, TickMetrics] = {}
+
+    def schedule(
+        self,
+        timing: float,
+        unit: str = "s",
+        do: Callable = empty,
+        *args: Any,
+        policy: OverrunPolicy = OverrunPolicy.SKIP,
+        **kw: Dict[str, Any]
+    ) -> PeriodicJob:
+        self.jobs = [job for job in self.jobs if not job.done or job.error]
+        name = getattr(do, "__name__", repr(do))
+        job = PeriodicJob(
+            name,
+            timing * TimeType(unit).scale,
+            do,
+            args,
+            kw,
+            policy,
+            self.metrics.setdefault(name, TickMetrics()),
+        )
+        self.jobs.append(job.start())
+        return job
+
+    async def stop(self, raise_error: bool = True) -> List[BaseException]:
+        jobs, self.jobs = self.jobs, []
+        for job in jobs:
+            job.cancel()
+        await asyncio.gather(
+            *[job.task for job in jobs if job.task], return_exceptions=True
+        )
+        errors = [job.error for job in jobs if job.error]
+        if errors and raise_error:
+            raise errors[0]
+        return errors
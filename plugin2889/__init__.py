@@ -1,16 +1,19 @@
 import hashlib
 import traceback
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 from xoa_core.types import PluginAbstract
 
 if TYPE_CHECKING:
-    from plugin2889.dataset import TestSuiteConfiguration2889
+    from plugin2889.dataset import TestSuiteConfiguration2889, UnionTestSuitConfiguration
 
 from plugin2889.plugin.dataset import TestSuiteDataSharing
 from plugin2889.const import TestType
 from plugin2889.util.logger import logger
 from plugin2889.plugin.test_abstract import PluginParameter
+from plugin2889.plugin.command_trace import CommandTracer
+from plugin2889.plugin.test_planner import CombinedProgress, PlannedTestType, plan_test_types, run_concurrently
+from plugin2889.resource.setup_cache import PortSetupCache
 from plugin2889.plugin.test_rate import RateTest
 from plugin2889.plugin.test_congestion_control import CongestionControlTest
 from plugin2889.plugin.test_forward_pressure import ForwardPressureTest
@@ -39,7 +42,7 @@ class TestSuite2889(PluginAbstract["TestSuiteConfiguration2889"]):
     def prepare(self) -> None:
         pass
 
-    async def __do_test(self) -> None:
+    async def __do_test(self, setup_cache: Optional[PortSetupCache]) -> None:
         plugin_params = PluginParameter(
             testers=self.testers,
             port_identities=self.port_identities,
@@ -47,18 +50,57 @@ class TestSuite2889(PluginAbstract["TestSuiteConfiguration2889"]):
             full_test_config=self.cfg,
             data_sharing=TestSuiteDataSharing(),
             state_conditions=self.state_conditions,
+            setup_cache=setup_cache,
         )
-        for test_suit_config in self.cfg.enabled_test_suit_config_list:
-            test_suit_class = TEST_TYPE_CLASS[test_suit_config.test_type]
-            logger.debug(f"init {test_suit_class}")
-            await test_suit_class(plugin_params, test_suit_config).start()
-
-    async def __post_test(self) -> None:
+        if not self.cfg.general_test_configuration.run_test_types_concurrently:
+            for test_suit_config in self.cfg.enabled_test_suit_config_list:
+                await self.__run_test_type(plugin_params, test_suit_config)
+            return
+
+        for step in plan_test_types(self.cfg.enabled_test_suit_config_list, self.cfg.ports_configuration):
+            logger.debug(f"run together {[planned.config.test_type for planned in step]}")
+            if len(step) == 1:
+                await self.__run_test_type(plugin_params, step[0].config)
+                continue
+            progress = CombinedProgress(self.xoa_out, (planned.config.test_type for planned in step))
+            await run_concurrently(self.__run_together(plugin_params, progress, planned) for planned in step)
+
+    async def __run_together(self, plugin_params: PluginParameter, progress: CombinedProgress, planned: PlannedTestType) -> None:
+        test_type = planned.config.test_type
+        await self.__run_test_type(
+            plugin_params.copy(update={
+                "port_identities": planned.port_identities(plugin_params.port_identities),
+                "xoa_out": progress.out(test_type),
+            }),
+            planned.config,
+        )
+        progress.finish(test_type)
+
+    async def __run_test_type(self, plugin_params: PluginParameter, test_suit_config: "UnionTestSuitConfiguration") -> None:
+        test_suit_class = TEST_TYPE_CLASS[test_suit_config.test_type]
+        logger.debug(f"init {test_suit_class}")
+        await test_suit_class(plugin_params, test_suit_config).start()
+
+    async def __post_test(self, setup_cache: Optional[PortSetupCache]) -> None:
+        if setup_cache and setup_cache.kept_setup_seconds:
+            logger.info(
+                f"port setup: {len(setup_cache.full_setup_seconds)} full in {sum(setup_cache.full_setup_seconds):.3f}s, "
+                f"{len(setup_cache.kept_setup_seconds)} kept in {sum(setup_cache.kept_setup_seconds):.3f}s, "
+                f"saved {setup_cache.saved_second}s"
+            )
         logger.info("test finish")
 
     async def start(self) -> None:
-        await self.__do_test()
-        await self.__post_test()
+        general_config = self.cfg.general_test_configuration
+        tracer = CommandTracer().install(self.testers.values()) if general_config.command_trace_path else None
+        setup_cache = PortSetupCache() if general_config.reuse_port_setup else None
+        try:
+            await self.__do_test(setup_cache)
+            await self.__post_test(setup_cache)
+        finally:
+            if tracer:
+                tracer.uninstall()
+                tracer.export(general_config.command_trace_path, general_config.command_trace_format)
 
 
 
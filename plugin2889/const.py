@@ -15,13 +15,15 @@ DELAY_LEARNING_ADDRESS = 1
 DELAY_CREATE_PORT_PAIR = 3
 DELAY_WAIT_RESET_PORT = 5
 DELAY_WAIT_RESET_STATS = 2
-INTERVAL_CHECK_SHOULD_STOP_TRAFFIC = 0.01
+DELAY_WAIT_TRAFFIC_END = 5  # after the duration, for the ports to report traffic off (port sync start is delayed by 2s)
 INTERVAL_CHECK_PORT_SYNC = 1
 INTERVAL_CHECK_PORT_RESERVE = 0.5
 INTERVAL_CLEAR_STATISTICS = 0.01
 INTERVAL_INJECT_FCS_ERROR = 0.2
 
 CHECK_SYNC_MAX_RETRY = 30
+MAX_TRAFFIC_SAMPLING_RATE = 100  # live statistics samples per second
+MAX_TOKENS_PER_APPLY = 200  # limit of xoa_driver utils.apply
 
 # https://en.wikipedia.org/wiki/Ethernet_frame
 # 20 = Preamble + Start frame delimiter + Interpacket gap
@@ -205,6 +207,11 @@ class TestType(Enum):
     ERRORED_FRAMES_FILTERING = "errored_frames_filtering"
     BROADCAST_FORWARDING = "broadcast_forwarding"
 
+    @property
+    def is_flooding_dut(self) -> bool:
+        """ the test floods frames to all the ports of the DUT, or fills its address table """
+        return self in (type(self).ADDRESS_CACHING_CAPACITY, type(self).ADDRESS_LEARNING_RATE, type(self).BROADCAST_FORWARDING)
+
 
 class TrafficDirection(Enum):
     EAST_TO_WEST = "east_to_west"
@@ -340,6 +347,11 @@ class TidAllocationScope(Enum):
         return self == TidAllocationScope.CONFIGURATION_SCOPE
 
 
+class TraceFormat(Enum):
+    JSON = "json"
+    CHROME = "chrome_trace"
+
+
 class FECModeStr(Enum):
     ON = "ON"
     OFF = "OFF"
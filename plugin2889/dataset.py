@@ -60,6 +60,7 @@ from plugin2889.const import (
     TestTopology,
     LatencyMode,
     TidAllocationScope,
+    TraceFormat,
     TrafficDirection,
 )
 
@@ -480,6 +481,10 @@ class GeneralTestConfiguration(BaseModel):
     port_stagger_steps: int
     use_micro_tpld_on_demand: bool
     tid_allocation_scope: TidAllocationScope
+    command_trace_path: str = ""  # empty string means no command trace
+    command_trace_format: TraceFormat = TraceFormat.JSON
+    run_test_types_concurrently: bool = False  # test types on disjoint ports run at the same time
+    reuse_port_setup: bool = False  # ports keep their reset settings and streams for the next test type with the same port config
     tpld_id_controller: Any = None
 
     def __init__(self, **data: Any):
@@ -1,11 +1,22 @@
 import re
-from typing import List, Optional
+from typing import List, NamedTuple, Optional, Tuple
 from pydantic import BaseModel
 from pydantic.class_validators import validator
 from xoa_driver.enums import ProtocolOption, ModifierAction
 from plugin2889.const import Enum
 
 
+def ones_complement_sum(data: bytes) -> int:
+    """
+    one's complement sum of the big endian 16 bit words of data.
+    2 ** 16 is 1 modulo 0xFFFF, so the sum is the whole data as one int modulo 0xFFFF, computed in C,
+    except that data which is not all zero sums to 0xFFFF rather than 0.
+    """
+    padded = int.from_bytes(data, 'big') << (8 * (len(data) % 2))  # odd length is padded with a zero byte
+    total = padded % 0xFFFF
+    return 0xFFFF if not total and padded else total
+
+
 class BinaryString(str):
     @classmethod
     def __get_validators__(cls):
@@ -158,10 +169,21 @@ class SegmentField(BaseModel):
         return self.value.is_all_zero
 
 
+class PackedLayout(NamedTuple):
+    """segment packed into an int, built from the field values once"""
+    values: Tuple[str, ...]  # field values the layout was built from
+    packed: int
+    byte_length: int
+
+
 class ProtocolSegment(BaseModel):
     segment_type: SegmentType
     fields: List[SegmentField]
     checksum_offset: Optional[int]
+    _packed_layout: Optional[PackedLayout] = None
+
+    class Config:
+        underscore_attrs_are_private = True
 
     @validator('checksum_offset')
     def is_digit(cls, value):
@@ -170,22 +192,25 @@ class ProtocolSegment(BaseModel):
         return value
 
     def __wrap_add_16(self, data: bytearray, offset_num: int) -> bytearray:
-        checksum = 0
-        data[offset_num + 0] = 0
-        data[offset_num + 1] = 0
-        for i in range(0, len(data), 2):
-            w = (data[i + 0] << 8) + data[i + 1]
-            checksum += w
-            if checksum > 0xFFFF:
-                checksum = (1 + checksum) & 0xFFFF  # add carry back in as lsb
-        data[offset_num + 0] = 0xFF + 1 + (~(checksum >> 8))
-        data[offset_num + 1] = 0xFF + 1 + (~(checksum & 0xFF))
+        data[offset_num:offset_num + 2] = b'\x00\x00'
+        checksum = ones_complement_sum(data)
+        data[offset_num:offset_num + 2] = (~checksum & 0xFFFF).to_bytes(2, 'big')
         return data
 
+    def __get_packed_layout(self) -> PackedLayout:
+        values = tuple([f.value for f in self.fields])
+        if self._packed_layout is None or self._packed_layout.values != values:
+            packed = 0
+            bit_length = 0
+            for value in values:
+                packed = (packed << len(value)) | int(value, 2)
+                bit_length += len(value)
+            self._packed_layout = PackedLayout(values=values, packed=packed, byte_length=(bit_length + 7) // 8)
+        return self._packed_layout
+
     def prepare(self) -> bytearray:
-        result = ''.join(f.prepare() for f in self.fields)
-        result = int(result, 2).to_bytes((len(result) + 7) // 8, byteorder='big')
-        result = bytearray(result)
+        layout = self.__get_packed_layout()
+        result = bytearray(layout.packed.to_bytes(layout.byte_length, byteorder='big'))
         if self.checksum_offset:
             result = self.__wrap_add_16(result, self.checksum_offset)
         return result
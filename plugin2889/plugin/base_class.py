@@ -38,6 +38,7 @@ from plugin2889.dataset import (
     UnionTestSuitConfiguration,
 )
 from plugin2889.plugin.utils import sleep_log, create_port_pair, group_by_port_property
+from plugin2889.plugin.command_trace import trace_phase, traced_phase
 from plugin2889.resource.manager import ResourcesManager
 from plugin2889.model.protocol_segment import ModifierActionOption
 from plugin2889.plugin.test_abstract import PluginParameter, TestSuitAbstract
@@ -230,7 +231,8 @@ class TestBase(TestSuitAbstract[TCONFIG]):
             self.testers,
             self.full_test_config,
             self.port_identities,
-            port_pairs=self.create_port_pairs()
+            port_pairs=self.create_port_pairs(),
+            setup_cache=self.plugin_params.setup_cache,
         )
         self.create_statistics()
 
@@ -282,11 +284,13 @@ class TestBase(TestSuitAbstract[TCONFIG]):
 
     async def do_test_logic(self) -> None:
         async with L23TestManager(self.resources) as self.test_manager:
-            await self.setup_resources()
+            with trace_phase("setup_ports"):
+                await self.setup_resources()
             for run_props in self.do_testing_cycle():
                 await self.plugin_params.state_conditions.wait_if_paused()
                 await self.plugin_params.state_conditions.stop_if_stopped()
-                await self.run_test(run_props)
+                with trace_phase("search_step"):
+                    await self.run_test(run_props)
 
     @property
     def traffic_duration(self) -> int:
@@ -296,7 +300,8 @@ class TestBase(TestSuitAbstract[TCONFIG]):
         async for duration_progress in self.test_manager.generate_traffic(self.traffic_duration, sampling_rate=sample_rate):
             if self.is_stop_on_los:
                 raise exceptions.StopTestByLossSignal()
-            result = await self.staticstics_collect(is_live=True)
+            with trace_phase("collect"):
+                result = await self.staticstics_collect(is_live=True)
             self.xoa_out.send_progress(duration_progress)
             self.xoa_out.send_statistics(self.reprocess_result(result, is_live=True))
             yield TrafficInfo(progress=duration_progress, result=result)
@@ -310,7 +315,8 @@ class TestBase(TestSuitAbstract[TCONFIG]):
 
     async def send_final_staticstics(self) -> "ResultData":
         await sleep_log(const.DELAY_WAIT_TRAFFIC_STOP)
-        result = self.reprocess_result(await self.staticstics_collect(is_live=False))
+        with trace_phase("collect"):
+            result = self.reprocess_result(await self.staticstics_collect(is_live=False))
         self.xoa_out.send_statistics(result)
         logger.debug(result)
         return result
@@ -429,11 +435,13 @@ class AddressLearningBase(TestBase[TCFG], BinarySearchMixin[T]):
         result.extra['binary_search'] = self.binary_search
         return result
 
+    @traced_phase("learning")
     async def setup_learning_traffic(self, port_name: str) -> None:
         await self.set_learning_modifiers(port_name)
         await self.set_learning_limit(port_name)
         self.resources.enable_single_port_traffic(port_name)
 
+    @traced_phase("learning")
     async def reset_DUT_mac_address_table(self) -> None:
         await self.toggle_port_sync_state(
             is_need_toggle=self.test_suit_config.toggle_sync_state,
@@ -487,7 +495,8 @@ class AddressLearningBase(TestBase[TCFG], BinarySearchMixin[T]):
 
         await sleep_log(const.DELAY_WAIT_TRAFFIC_STOP)
         await sleep_log(const.DELAY_LEARNING_ADDRESS)
-        result = await self.staticstics_collect(is_live=False)
+        with trace_phase("collect"):
+            result = await self.staticstics_collect(is_live=False)
 
         await self.switch_port_roles()
         assert result
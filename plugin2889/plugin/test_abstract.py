@@ -1,11 +1,12 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Generator, Generic, List, Protocol, Type, TypeVar, runtime_checkable
+from typing import Any, Dict, Generator, Generic, List, Optional, Protocol, Type, TypeVar, runtime_checkable
 from pydantic import BaseModel
 from loguru import logger
 from xoa_core.types import PortIdentity
 
 from plugin2889.const import TestStatus
 from plugin2889.plugin.dataset import BaseRunProps, TestSuiteDataSharing
+from plugin2889.resource.setup_cache import PortSetupCache
 from plugin2889.dataset import (
     TestSuiteConfiguration2889,
     UnionTestSuitConfiguration,
@@ -43,6 +44,7 @@ class PluginParameter(BaseModel):
     full_test_config: TestSuiteConfiguration2889
     data_sharing: TestSuiteDataSharing
     state_conditions: PStateConditions
+    setup_cache: Optional[PortSetupCache] = None
 
     class Config:
         arbitrary_types_allowed = True
@@ -20,6 +20,7 @@ class AddressLearningRateTest(AddressLearningBase[AddressLearningRateConfigurati
             test_config=self.full_test_config,
             port_pairs=self.create_port_pairs(),
             get_mac_address_function=self.get_mac_address,
+            setup_cache=self.plugin_params.setup_cache,
         )
         self.create_statistics()
 
@@ -29,6 +29,7 @@ class BroadcastForwardingTest(TestBase[BroadcastForwardingConfiguration], Binary
             port_identities=self.port_identities,
             test_config=self.full_test_config,
             port_pairs=self.create_port_pairs(),
+            setup_cache=self.plugin_params.setup_cache,
         )
         self.create_statistics()
 
@@ -29,6 +29,7 @@ class CongestionControlTest(TestBase[CongestionControlConfiguration]):
             self.full_test_config,
             port_identities=self.port_identities,
             port_pairs=self.__create_port_pairs(),
+            setup_cache=self.plugin_params.setup_cache,
         )
         self.create_statistics()
 
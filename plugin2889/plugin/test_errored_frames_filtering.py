@@ -46,6 +46,7 @@ class ErroredFramesFilteringTest(TestBase[ErroredFramesFilteringConfiguration]):
             port_identities=self.port_identities,
             test_config=self.full_test_config,
             port_pairs=self.create_port_pairs(),
+            setup_cache=self.plugin_params.setup_cache,
         )
         self.create_statistics()
 
@@ -59,6 +59,7 @@ class ForwardPressureTest(TestBase[ForwardPressureConfiguration]):
             self.full_test_config,
             self.port_identities,
             port_pairs=self.__create_port_pair(),
+            setup_cache=self.plugin_params.setup_cache,
         )
         self.interframe_gap = TestInterframeGap(delta=int(self.test_suit_config.interframe_gap_delta))
         self.port_rate_average = PortRateAverage()
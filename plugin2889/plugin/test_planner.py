@@ -0,0 +1,133 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Dict, FrozenSet, Iterable, List, Optional
+from xoa_core.types import PortIdentity
+
+from plugin2889.plugin.test_abstract import PXOAOut
+
+from plugin2889.const import TestType
+from plugin2889.dataset import (
+    AddressLearningRateConfiguration,
+    MaxForwardingRateConfiguration,
+    PortConfiguration,
+    RateTestConfiguration,
+    UnionTestSuitConfiguration,
+)
+
+
+@dataclass
+class PlannedTestType:
+    config: UnionTestSuitConfiguration
+    port_names: Optional[FrozenSet[str]]  # None when the test type has no port roles and may use every port
+
+    def port_identities(self, port_identities: List[PortIdentity]) -> List[PortIdentity]:
+        if self.port_names is None:
+            return port_identities
+        return [port_identity for port_identity in port_identities if port_identity.name in self.port_names]
+
+
+def used_port_names(test_suit_config: UnionTestSuitConfiguration, ports_configuration: Dict[str, PortConfiguration]) -> Optional[FrozenSet[str]]:
+    if isinstance(test_suit_config, RateTestConfiguration):
+        port_role_handlers = [sub_test.port_role_handler for sub_test in test_suit_config.sub_test if sub_test.enabled]
+    else:
+        port_role_handlers = [test_suit_config.port_role_handler]
+
+    uuid_port_name = {port_config.item_id: port_name for port_name, port_config in ports_configuration.items()}
+    port_names = set()
+    for port_role_handler in port_role_handlers:
+        if port_role_handler is None:
+            return None
+        for guid, port_role_config in port_role_handler.role_map.items():
+            port_name = uuid_port_name.get(guid.split("guid_", 1)[1])
+            if port_role_config.is_used and port_name:
+                port_names.add(port_name)
+    return frozenset(port_names)
+
+
+def depends_on(test_suit_config: UnionTestSuitConfiguration, other: UnionTestSuitConfiguration) -> bool:
+    """ the test type starts from a result of the other one, shared through TestSuiteDataSharing """
+    if isinstance(test_suit_config, MaxForwardingRateConfiguration) and test_suit_config.use_throughput_as_start_value:
+        return other.test_type == TestType.RATE_TEST
+    if isinstance(test_suit_config, AddressLearningRateConfiguration) and (test_suit_config.only_use_capacity or test_suit_config.set_end_address_to_capacity):
+        return other.test_type == TestType.ADDRESS_CACHING_CAPACITY
+    return False
+
+
+def can_run_together(planned: PlannedTestType, other: PlannedTestType) -> bool:
+    if planned.port_names is None or other.port_names is None or planned.port_names & other.port_names:
+        return False
+    if planned.config.test_type.is_flooding_dut or other.config.test_type.is_flooding_dut:
+        return False
+    return not depends_on(planned.config, other.config) and not depends_on(other.config, planned.config)
+
+
+def plan_test_types(
+    test_suit_configs: Iterable[UnionTestSuitConfiguration],
+    ports_configuration: Dict[str, PortConfiguration],
+) -> List[List[PlannedTestType]]:
+    """
+    Group the enabled test types, in their order, into steps run one after another.
+    A test type joins the last step when it can run together with every test type of it:
+    disjoint ports, no DUT flooding and no shared result between them.
+    """
+    steps: List[List[PlannedTestType]] = []
+    for test_suit_config in test_suit_configs:
+        planned = PlannedTestType(test_suit_config, used_port_names(test_suit_config, ports_configuration))
+        if steps and all(can_run_together(planned, other) for other in steps[-1]):
+            steps[-1].append(planned)
+        else:
+            steps.append([planned])
+    return steps
+
+
+class CombinedProgress:
+    """
+    Test types running together share one message pipe, their own progress interleaved there would jump back and forth.
+    Each of them reports here instead and the step sends the mean progress of its test types.
+    """
+
+    def __init__(self, xoa_out: PXOAOut, test_types: Iterable[TestType]) -> None:
+        self.__xoa_out = xoa_out
+        self.__progress: Dict[TestType, int] = dict.fromkeys(test_types, 0)
+
+    def update(self, test_type: TestType, progress: int) -> None:
+        self.__progress[test_type] = progress
+        self.__xoa_out.send_progress(sum(self.__progress.values()) // len(self.__progress))
+
+    def finish(self, test_type: TestType) -> None:
+        self.update(test_type, 100)
+
+    def out(self, test_type: TestType) -> "TestTypeOut":
+        return TestTypeOut(self.__xoa_out, self, test_type)
+
+
+class TestTypeOut:
+    """ the xoa_out of a test type running together with others, statistics already carry their test type """
+
+    def __init__(self, xoa_out: PXOAOut, combined: CombinedProgress, test_type: TestType) -> None:
+        self.__xoa_out = xoa_out
+        self.__combined = combined
+        self.__test_type = test_type
+
+    def send_statistics(self, data) -> None:
+        self.__xoa_out.send_statistics(data)
+
+    def send_warning(self, warning: Exception) -> None:
+        self.__xoa_out.send_warning(warning)
+
+    def send_progress(self, progress: int) -> None:
+        self.__combined.update(self.__test_type, progress)
+
+    def send_error(self, error: Exception) -> None:
+        self.__xoa_out.send_error(error)
+
+
+async def run_concurrently(coroutines: Iterable[Awaitable[None]]) -> None:
+    """ the first error cancels the other test types, their resources are released on the way out """
+    tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -1,4 +1,5 @@
 import os
+import time
 import asyncio
 import inspect
 import struct
@@ -23,6 +24,7 @@ from plugin2889.model import exceptions
 from plugin2889.dataset import IPv4Address, IPv6Address, MacAddress, PortPair
 from plugin2889.dataset import PortConfiguration, PortRoleHandler
 from plugin2889.model.protocol_segment import SegmentType, PortProtocolVersion
+from plugin2889.plugin.command_trace import trace_sleep
 from plugin2889.const import (
     PortGroup,
     TestTopology,
@@ -317,7 +319,9 @@ async def sleep_log(duration: float) -> None:
     caller_frame = inspect.stack()[1]
     message = f"\x1b[33;20m{caller_frame.filename.rsplit(os.path.sep, 1)[1]}:{caller_frame.lineno} {caller_frame.function} {duration}\x1B[0m"
     logger.debug(message)
+    start = time.perf_counter()
     await asyncio.sleep(duration)
+    trace_sleep(caller_frame.function, start)
 
 
 def is_ip_segment_exists(header_segments: List["ProtocolSegment"]) -> bool:
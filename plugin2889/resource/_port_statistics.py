@@ -1,13 +1,16 @@
 import asyncio
 import functools
+import sys
 from typing import (
+    Any,
     Callable,
     Dict,
-    Generator,
     List,
+    Optional,
     Set,
     TYPE_CHECKING,
     Tuple,
+    Type,
 )
 from decimal import Decimal
 from dataclasses import dataclass, fields
@@ -15,7 +18,7 @@ from xoa_driver import utils, ports
 
 from plugin2889.dataset import PortJitter, PortLatency, StatisticsData, TxStream, RxTPLDId
 from plugin2889.util.logger import logger
-from plugin2889.const import DEFAULT_INTERFRAME_GAP
+from plugin2889.const import DEFAULT_INTERFRAME_GAP, MAX_TOKENS_PER_APPLY
 
 if TYPE_CHECKING:
     from plugin2889.resource.test_resource import TestResource
@@ -53,8 +56,80 @@ def _bps_l2_to_bps_l1(bps: int, packet_size: int) -> int:
     return int(bps * (packet_size + DEFAULT_INTERFRAME_GAP) / packet_size)
 
 
+async def _apply_all(tokens: List[Any]) -> List[Any]:
+    replies: List[Any] = []
+    for start in range(0, len(tokens), MAX_TOKENS_PER_APPLY):
+        replies.extend(await utils.apply(*tokens[start:start + MAX_TOKENS_PER_APPLY]))
+    return replies
+
+
+def _to_microsecond(nanosecond: int) -> Decimal:
+    # the same value and exponent as round(Decimal(nanosecond) / Decimal(1000), 3)
+    return Decimal(nanosecond).scaleb(-3)
+
+
+class LatencyAccumulator:
+    """
+    Minimum, maximum and per tpld id average latency (or jitter) of a sample, in the integer nanoseconds read
+    from the tester. Converted once per sample to the Decimal microseconds of PortLatency,
+    the result is the same as setting every reading with the PortLatency setters.
+    """
+    __slots__ = ("check_value", "minimum", "maximum", "maximum_is_set", "average")
+
+    def __init__(self, check_value: bool) -> None:
+        self.check_value = check_value
+        self.minimum = 0
+        self.maximum = 0
+        self.maximum_is_set = False
+        self.average: Dict[int, int] = {}
+
+    def __valid(self, nanosecond: int) -> int:
+        return nanosecond if not self.check_value or nanosecond > ~sys.maxsize * 1000 else 0
+
+    def add(self, tpld_id: int, min_val: int, max_val: int, avg_val: int) -> None:
+        if min_val := self.__valid(min_val):
+            self.minimum = min(min_val, self.minimum) if self.minimum else min_val
+        max_val = self.__valid(max_val)
+        if max_val >= self.maximum:
+            self.maximum = max_val
+            self.maximum_is_set = True
+        if avg_val := self.__valid(avg_val):
+            self.average[tpld_id] = avg_val
+
+    def to_port_latency(self, latency_type: Type[PortLatency]) -> PortLatency:
+        return latency_type(
+            average_={tpld_id: _to_microsecond(value) for tpld_id, value in self.average.items()},
+            minimum_=_to_microsecond(self.minimum) if self.minimum else Decimal(0),
+            maximum_=_to_microsecond(self.maximum) if self.maximum_is_set else Decimal(0),
+        )
+
+
+class RxTpldSlot:
+    """ a tpld id received on the port: its statistics accessor and the counters of the last sample """
+    __slots__ = ("tpld_id", "stream", "statistics", "packet", "pps")
+
+    def __init__(self, port: "ports.GenericL23Port", stream: "StreamManager") -> None:
+        self.tpld_id = stream.tpld_id
+        self.stream = stream
+        self.statistics = port.statistics.rx.access_tpld(stream.tpld_id)
+        self.packet = 0
+        self.pps = 0
+
+
+class TxStreamSlot:
+    """ a stream sent out of the port: its statistics accessor and the counters of the last sample """
+    __slots__ = ("index", "stream", "statistics", "packet", "pps")
+
+    def __init__(self, port: "ports.GenericL23Port", index: int, stream: "StreamManager") -> None:
+        self.index = index
+        self.stream = stream
+        self.statistics = port.statistics.tx.obtain_from_stream(index)
+        self.packet = 0
+        self.pps = 0
+
+
 class PortStatistics:
-    __slots__ = ("__tx_resources", "__port", "max", "__streams_sending_out", "__tx_tpld_ids", "__only_collect_rx_total", "__port_name", "__collect_rx_function")
+    __slots__ = ("__tx_resources", "__port", "max", "__streams_sending_out", "__tx_tpld_ids", "__only_collect_rx_total", "__port_name", "__collect_rx_function", "__rx_slots", "__tx_slots")
 
     def __init__(self, port: "ports.GenericL23Port", streams: List["StreamManager"], port_name: str) -> None:
         self.__port = port
@@ -65,6 +140,8 @@ class PortStatistics:
         self.max = PortMax()
         self.__only_collect_rx_total: bool = False  # do not collect data from each tpld_id
         self.__collect_rx_function: Callable = self.collect_rx_by_streams
+        self.__rx_slots: Optional[List[RxTpldSlot]] = None  # built on the first sample after the tx resources changed
+        self.__tx_slots: List[TxStreamSlot] = []
 
     async def clear(self) -> None:
         logger.debug("invoked")
@@ -73,63 +150,61 @@ class PortStatistics:
         )
 
     @property
-    def __streams_sending_in(self) -> Generator["StreamManager", None, None]:
-        if self.__only_collect_rx_total:
-            return None
-        for resource in self.__tx_resources:
-            for stream in resource.streams:
-                if stream.tpld_id in self.__tx_tpld_ids:
-                    yield stream
-
-    async def collect_rx_single_stream(self, rx_tpld_statistics, packet_size, tpld_id) -> Tuple[int, int, int, int, int, int]:
-        receive, latency, jitter, error = await utils.apply(
-            rx_tpld_statistics.traffic.get(),
-            rx_tpld_statistics.latency.get(),
-            rx_tpld_statistics.jitter.get(),
-            rx_tpld_statistics.errors.get(),
+    def __rx_index(self) -> List[RxTpldSlot]:
+        if self.__rx_slots is None:
+            # one slot per tpld id, a source port sending to several destinations may repeat its tpld id
+            slots: Dict[int, RxTpldSlot] = {}
+            for resource in self.__tx_resources:
+                for stream in resource.streams:
+                    if stream.tpld_id in self.__tx_tpld_ids and stream.tpld_id not in slots:
+                        slots[stream.tpld_id] = RxTpldSlot(self.__port, stream)
+            self.__rx_slots = list(slots.values())
+        return self.__rx_slots
 
-        )
-        return packet_size, tpld_id, receive, latency, jitter, error
+    @property
+    def __tx_index(self) -> List[TxStreamSlot]:
+        # streams are only appended to a port
+        for index in range(len(self.__tx_slots), len(self.__streams_sending_out)):
+            self.__tx_slots.append(TxStreamSlot(self.__port, index, self.__streams_sending_out[index]))
+        return self.__tx_slots
 
     async def collect_rx_by_streams(self, statistics: StatisticsData, packet_size: int) -> None:
         rx_bit_count_last_sec = rx_packet_count_last_sec = non_incre_seq_event_count = rx_packet = rx_bps_l1 = 0
 
-        port_latency = PortLatency()
-        port_jitter = PortJitter()
-        per_rx_tpld_id: Dict[int, RxTPLDId]  = {}
-        coroutines = []
-        for rx_stream in self.__streams_sending_in:
-            rx_tpld_statistics = self.__port.statistics.rx.access_tpld(rx_stream.tpld_id)
-            coroutines.append(self.collect_rx_single_stream(rx_tpld_statistics=rx_tpld_statistics, packet_size=rx_stream.packet_size, tpld_id=rx_stream.tpld_id))
-
-        for (stream_packet_size, tpld_id, receive, latency, jitter, error) in await asyncio.gather(*coroutines):
-            rx_bps_l1 += _bps_l2_to_bps_l1(receive.bit_count_last_sec, stream_packet_size or packet_size)
-            self.max.update_rx_bps_l1(rx_bps_l1)
-
-            rx_packet += int(receive.packet_count_since_cleared)
+        port_latency = LatencyAccumulator(check_value=PortLatency.check_value_)
+        port_jitter = LatencyAccumulator(check_value=PortJitter.check_value_)
+        slots = self.__rx_index
+        tokens = []
+        for slot in slots:
+            tokens.append(slot.statistics.traffic.get())
+            tokens.append(slot.statistics.latency.get())
+            tokens.append(slot.statistics.jitter.get())
+            tokens.append(slot.statistics.errors.get())
+        replies = await _apply_all(tokens)
+
+        for index, slot in enumerate(slots):
+            receive, latency, jitter, error = replies[index * 4:index * 4 + 4]
+            slot.packet = int(receive.packet_count_since_cleared)
+            slot.pps = receive.packet_count_last_sec
+            rx_bps_l1 += _bps_l2_to_bps_l1(receive.bit_count_last_sec, slot.stream.packet_size or packet_size)
+            rx_packet += slot.packet
             rx_bit_count_last_sec += receive.bit_count_last_sec
             rx_packet_count_last_sec += receive.packet_count_last_sec
             non_incre_seq_event_count += int(error.non_incre_seq_event_count)
 
-            port_latency.minimum = latency.min_val
-            port_latency.maximum = latency.max_val
-            port_latency.set_average(tpld_id, latency.avg_val)
-
-            port_jitter.minimum = jitter.min_val
-            port_jitter.maximum = jitter.max_val
-            port_jitter.set_average(tpld_id, jitter.avg_val)
-
-            per_rx_tpld_id[tpld_id] = RxTPLDId(packet=int(receive.packet_count_since_cleared), pps=receive.packet_count_last_sec)
+            port_latency.add(slot.tpld_id, latency.min_val, latency.max_val, latency.avg_val)
+            port_jitter.add(slot.tpld_id, jitter.min_val, jitter.max_val, jitter.avg_val)
 
+        self.max.update_rx_bps_l1(rx_bps_l1)
         self.max.update_rx_bps_l2(rx_bit_count_last_sec)
         self.max.update_rx_pps(rx_packet_count_last_sec)
-        statistics.rx_packet = sum(rx_tpld.packet for rx_tpld in per_rx_tpld_id.values())
+        statistics.rx_packet = rx_packet
         statistics.rx_bps_l1 = self.max.rx_bps_l1
         statistics.loss = non_incre_seq_event_count
         statistics.rx_bps_l2 = self.max.rx_bps_l2
-        statistics.per_rx_tpld_id = per_rx_tpld_id
-        statistics.latency = port_latency
-        statistics.jitter = port_jitter
+        statistics.per_rx_tpld_id = {slot.tpld_id: RxTPLDId.construct(packet=slot.packet, pps=slot.pps) for slot in slots}
+        statistics.latency = port_latency.to_port_latency(PortLatency)
+        statistics.jitter = port_jitter.to_port_latency(PortJitter)
 
     async def collect_rx_misc_by_port(self, statistics: StatisticsData) -> None:
         extra, no_tpld = await utils.apply(
@@ -141,29 +216,25 @@ class PortStatistics:
 
     async def collect_tx_by_streams(self, statistics: StatisticsData, packet_size: int) -> None:
         tx_bit_count_last_sec = tx_packet_count_last_sec = tx_packet = tx_bps_l1 = 0
-        per_tx_stream = {}
-        tx_coroutines = []
-        for idx, tx_stream in enumerate(self.__streams_sending_out):
-            tx_coroutines.append(self.__port.statistics.tx.obtain_from_stream(idx).get())
-
-        for idx, transmit in enumerate(await asyncio.gather(*tx_coroutines)):
-            tx_stream = self.__streams_sending_out[idx]
-            tx_packet += int(transmit.packet_count_since_cleared)
+        slots = self.__tx_index
+        for slot, transmit in zip(slots, await _apply_all([slot.statistics.get() for slot in slots])):
+            slot.packet = int(transmit.packet_count_since_cleared)
+            tx_packet += slot.packet
             tx_packet_count_last_sec += transmit.packet_count_last_sec
-            self.max.update_tx_pps(tx_packet_count_last_sec)
-            per_tx_stream[idx] = TxStream(tpld_id=tx_stream.tpld_id, packet=int(transmit.packet_count_since_cleared), pps=tx_packet_count_last_sec)
-
+            slot.pps = tx_packet_count_last_sec
             tx_bit_count_last_sec += transmit.bit_count_last_sec
-            self.max.update_tx_bps_l2(tx_bit_count_last_sec)
-
             # we will calculate separately if stream have specific valid packet size
-            tx_bps_l1 += _bps_l2_to_bps_l1(transmit.bit_count_last_sec, tx_stream.packet_size or packet_size)
-            self.max.update_tx_bps_l1(tx_bps_l1)
+            tx_bps_l1 += _bps_l2_to_bps_l1(transmit.bit_count_last_sec, slot.stream.packet_size or packet_size)
 
+        self.max.update_tx_pps(tx_packet_count_last_sec)
+        self.max.update_tx_bps_l2(tx_bit_count_last_sec)
+        self.max.update_tx_bps_l1(tx_bps_l1)
         statistics.tx_packet = tx_packet
         statistics.tx_bps_l1 = self.max.tx_bps_l1
         statistics.tx_bps_l2 = self.max.tx_bps_l2
-        statistics.per_tx_stream = per_tx_stream
+        statistics.per_tx_stream = {
+            slot.index: TxStream.construct(tpld_id=slot.stream.tpld_id, packet=slot.packet, pps=slot.pps) for slot in slots
+        }
 
     async def collect_rx_port_total(self, statistics: StatisticsData, packet_size: int) -> None:
         total = await self.__port.statistics.rx.total.get()
@@ -199,6 +270,7 @@ class PortStatistics:
         if resource not in self.__tx_resources:
             self.__tx_resources.append(resource)
         self.__tx_tpld_ids.add(tpld_id)
+        self.__rx_slots = None
 
     def enable_only_collect_tx_total(self) -> None:
         self.__only_collect_rx_total = True
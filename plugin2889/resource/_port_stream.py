@@ -10,6 +10,7 @@ if TYPE_CHECKING:
     from .test_resource import TestResource
 
 from plugin2889.dataset import RateDefinition
+from plugin2889.resource.setup_cache import StreamSetup
 from plugin2889.plugin import rate_helper
 from plugin2889.plugin import utils
 from plugin2889.dataset import AddressCollection, IPv4Address, IPv6Address, MacAddress
@@ -59,32 +60,58 @@ class StreamManager:
     def total_stream_count(self) -> int:
         return len(self.__resource.port.streams)
 
-    async def setup_stream(self) -> None:
+    def stream_setup(self) -> "StreamSetup":
+        return StreamSetup(
+            tpld_id=self.tpld_id,
+            protocol=self.__resource.port_config.profile.segment_id_list,
+            header=self.header,
+            comment=f"Stream {self.stream_id} / {self.tpld_id}",
+        )
+
+    async def setup_stream(self, kept: Optional["StreamSetup"] = None) -> "StreamSetup":
+        """create the stream, or apply what differs on the one kept on the port since the previous test type"""
         port = self.__resource.port
-        stream = await port.streams.create()
+        setup = self.stream_setup()
+        stream = await port.streams.create() if kept is None else port.streams.obtain(self.stream_id)
         self.__stream = stream
         assert stream
-        await apply(
-            stream.tpld_id.set(self.tpld_id),
-            stream.packet.header.protocol.set(self.__resource.port_config.profile.segment_id_list),
-            stream.packet.header.data.set(self.header),
-            stream.payload.content.set_inc_byte(f"{'0'*36}"),
-            stream.insert_packets_checksum.set_on(),
-            stream.enable.set_on(),
-            stream.comment.set(f"Stream {self.stream_id} / {self.tpld_id}")
-        )
+        tokens = []
+        if kept is None or kept.tpld_id != setup.tpld_id:
+            tokens.append(stream.tpld_id.set(setup.tpld_id))
+        if kept is None or kept.protocol != setup.protocol:
+            tokens.append(stream.packet.header.protocol.set(setup.protocol))
+        if kept is None or kept.header != setup.header:
+            tokens.append(stream.packet.header.data.set(setup.header))
+        if kept is None:
+            tokens.extend((
+                stream.payload.content.set_inc_byte(f"{'0'*36}"),
+                stream.insert_packets_checksum.set_on(),
+                stream.enable.set_on(),
+            ))
+        if kept is None or kept.comment != setup.comment:
+            tokens.append(stream.comment.set(setup.comment))
+        if kept is None:
+            await apply(*tokens)
+        else:  # clear what the previous test type may have changed, a new stream starts without it
+            tokens.extend((stream.packet.limit.set(-1), stream.enable.set_on()))
+            await asyncio.gather(apply(*tokens), stream.packet.header.modifiers.clear())
         logger.debug(f'{port.kind}, {stream.kind}, {self.tpld_id}, from {self.__resource.mac_address} to {self.__peer_mac}')
+        return setup
+
+    def stream_rate_ppm(self, rate: Decimal) -> int:
+        """ rate percent of the port split equally over its streams, in the ppm the tester takes """
+        return math.floor(rate / self.total_stream_count * 10000)
 
     async def set_rate_fraction(self, rate: Decimal):
-        rate /= self.total_stream_count  # set streams rate equally
-        await asyncio.gather(*[s.rate.fraction.set(math.floor(rate * 10000)) for s in self.__resource.port.streams])
+        rate_ppm = self.stream_rate_ppm(rate)
+        await asyncio.gather(*[s.rate.fraction.set(rate_ppm) for s in self.__resource.port.streams])
 
     async def configure_stream(self, size: int, rate: Decimal) -> None:
-        rate /= self.total_stream_count  # set streams rate equally
+        rate_ppm = self.stream_rate_ppm(rate)
         coroutines = []
         for stream in self.__resource.port.streams:
             coroutines.append(stream.packet.length.set_fixed(size, size))
-            coroutines.append(stream.rate.fraction.set(math.floor(rate * 10000)))
+            coroutines.append(stream.rate.fraction.set(rate_ppm))
         await asyncio.gather(*coroutines)
 
     def is_match_peer_mac_address(self, mac_address: Optional["MacAddress"] = None) -> bool:
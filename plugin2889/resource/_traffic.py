@@ -18,6 +18,9 @@ class Traffic:
     async def get_time_elipsed(self) -> int:
         return int((await self.__port.tx_config.time.get()).microseconds / 1e6)
 
+    async def get_time_elipsed_second(self) -> float:
+        return (await self.__port.tx_config.time.get()).microseconds / 1e6
+
     async def set_frame_duration(self, packets_limit: int) -> None:
         await self.__port.tx_config.packet_limit.set(packets_limit)
 
@@ -1,9 +1,12 @@
 import asyncio
+import time
+import weakref
 from collections import defaultdict
 from decimal import Decimal
 from functools import partial
 from typing import (
     TYPE_CHECKING,
+    Awaitable,
     Callable,
     Dict,
     Generator,
@@ -18,21 +21,39 @@ from xoa_core.types import PortIdentity
 from xoa_driver import testers, modules, enums
 
 if TYPE_CHECKING:
+    from xoa_driver import ports
+    from xoa_driver.lli import commands
     from plugin2889.resource._port_stream import StreamManager
+    from plugin2889.resource.setup_cache import PortSetup, PortSetupCache, StreamSetup
 
 from plugin2889.model import exceptions
 from plugin2889.const import DELAY_CREATE_PORT_PAIR, DELAY_WAIT_RESET_PORT, INTERVAL_CHECK_PORT_SYNC, CHECK_SYNC_MAX_RETRY, PacketSizeType
-from plugin2889.dataset import MacAddress, PortPair
+from plugin2889.dataset import MacAddress, PortConfiguration, PortPair
 from plugin2889.dataset import TestSuiteConfiguration2889
 from plugin2889.plugin.utils import sleep_log
 from plugin2889.resource.test_resource import TestResource
 
 
 T = TypeVar("T", bound="ResourcesManager")
+TrafficListener = Callable[["ports.GenericL23Port", "commands.P_TRAFFIC.GetDataAttr"], Awaitable[None]]
+
+# the driver cannot unsubscribe a callback, so each port subscribes once and the event goes to the manager using it now
+_traffic_listeners: "weakref.WeakKeyDictionary[ports.GenericL23Port, Optional[TrafficListener]]" = weakref.WeakKeyDictionary()
+
+
+async def _dispatch_traffic_change(port: "ports.GenericL23Port", get_attr: "commands.P_TRAFFIC.GetDataAttr") -> None:
+    if listener := _traffic_listeners.get(port):
+        await listener(port, get_attr)
+
+
+def _listen_traffic_change(port: "ports.GenericL23Port", listener: Optional[TrafficListener]) -> None:
+    if port not in _traffic_listeners:
+        port.on_traffic_change(_dispatch_traffic_change)
+    _traffic_listeners[port] = listener
 
 
 class ResourcesManager:
-    __slots__ = ("__testers", "__resources", "__port_identities", "__port_pairs", "__test_config", "__tester_module_ports", "__get_mac_address")
+    __slots__ = ("__testers", "__resources", "__port_identities", "__port_pairs", "__test_config", "__tester_module_ports", "__get_mac_address", "__traffic_changed", "__traffic_started", "__setup_cache", "__kept_setups", "__setup_started")
 
     def __init__(
         self,
@@ -41,14 +62,20 @@ class ResourcesManager:
         port_identities: List["PortIdentity"],
         port_pairs: Iterable["PortPair"],
         get_mac_address_function: Optional[Callable[["TestResource", "MacAddress"], "MacAddress"]] = None,
+        setup_cache: Optional["PortSetupCache"] = None,
     ) -> None:
         self.__testers = testers
         self.__test_config = test_config
         self.__port_identities = port_identities
-        self.__port_pairs = port_pairs or []
+        self.__port_pairs = tuple(port_pairs or ())
         self.__resources: Dict[str, "TestResource"] = {}
         self.__tester_module_ports: Dict["testers.L23Tester", List[int]] = defaultdict(list)  # it is only for calling tester.traffic_sync
         self.__get_mac_address = get_mac_address_function
+        self.__traffic_changed = asyncio.Event()
+        self.__traffic_started: Dict["ports.GenericL23Port", bool] = {}  # ports reported traffic on since start_traffic -> still on
+        self.__setup_cache = setup_cache
+        self.__kept_setups: Dict[str, "PortSetup"] = {}  # port name -> setup kept since the previous test type
+        self.__setup_started = 0.0
 
     async def setup(self) -> None:
         await asyncio.gather(*self.__testers.values())
@@ -65,33 +92,94 @@ class ResourcesManager:
                 raise exceptions.WrongModuleTypeError(module)
 
             port = module.ports.obtain(port_identity.port_index)
+            _listen_traffic_change(port, self.__on_traffic_change)
+            port_config = self.__test_config.ports_configuration[port_identity.name]
             coroutines.append(TestResource(
                 tester=tester,
                 port=port,
                 port_name=port_identity.name,
-                port_config=self.__test_config.ports_configuration[port_identity.name],
+                port_config=port_config,
                 get_mac_address_function=self.__get_mac_address,
+                keep_setup=self.__take_kept_setup(port_identity, port_config),
             ))
             self.__tester_module_ports[tester].extend([port.kind.module_id, port.kind.port_id])
 
         for resource in await asyncio.gather(*coroutines):
             self.__resources[resource.port_name] = resource
 
+        for port_name, kept_setup in list(self.__kept_setups.items()):
+            resource = self[port_name]
+            if resource.setup_kept and len(resource.port.streams) == len(kept_setup.streams):
+                continue
+            del self.__kept_setups[port_name]
+            if resource.setup_kept:  # streams changed behind the cache
+                await resource.reserve()
+
         logger.debug(self.__resources.items())
         # await self.map_pairs()
         self.__set_start_traffic_function()
 
+    def __take_kept_setup(self, port_identity: "PortIdentity", port_config: "PortConfiguration") -> bool:
+        """the port is set up again by this test type, it is kept in the cache again by map_pairs"""
+        if self.__setup_cache is None:
+            return False
+        kept_setup = self.__setup_cache.kept_setup(port_identity, port_config, self.__pairs_of(port_identity.name))
+        self.__setup_cache.forget(port_identity)
+        if kept_setup:
+            self.__kept_setups[port_identity.name] = kept_setup
+        return kept_setup is not None
+
+    def __pairs_of(self, port_name: str) -> List["PortPair"]:
+        return [pair for pair in self.__port_pairs if port_name in pair.names]
+
+    def __kept_stream(self, port_name: str, stream_id: int) -> Optional["StreamSetup"]:
+        kept_setup = self.__kept_setups.get(port_name)
+        if kept_setup and stream_id < len(kept_setup.streams):
+            return kept_setup.streams[stream_id]
+        return None
+
+    def __skip_setup_wait(self, second: float) -> None:
+        logger.info(f"port setup kept on {list(self.__kept_setups)}, skipped {second}s wait")
+
     async def map_pairs(self) -> None:
         coroutines = []
+        source_port_names = []
+        kept_streams = []
         stream_id_counter = defaultdict(int)
         for port_pair in self.__port_pairs:
             source_resource = self[port_pair.west]
             destination_resource = self[port_pair.east]
             tpld_id = self.__test_config.general_test_configuration.alloc_new_tpld_id(source_resource.port, destination_resource.port)
-            coroutines.append(source_resource.set_peer(stream_id_counter[port_pair.west], tpld_id, destination_resource))
+            kept_stream = self.__kept_stream(port_pair.west, stream_id_counter[port_pair.west])
+            coroutines.append(source_resource.set_peer(stream_id_counter[port_pair.west], tpld_id, destination_resource, kept_stream))
+            source_port_names.append(port_pair.west)
+            kept_streams.append(kept_stream)
             stream_id_counter[port_pair.west] += 1
-        await asyncio.gather(*coroutines)
-        await sleep_log(DELAY_CREATE_PORT_PAIR)
+
+        for port_name in self.__kept_setups:
+            streams = self[port_name].port.streams
+            for position in reversed(range(stream_id_counter[port_name], len(streams))):
+                await streams.remove(position)
+
+        stream_setups = await asyncio.gather(*coroutines)
+        if self.__setup_cache is None or None in kept_streams:
+            await sleep_log(DELAY_CREATE_PORT_PAIR)
+        else:
+            self.__skip_setup_wait(DELAY_CREATE_PORT_PAIR)
+
+        if self.__setup_cache is not None and self.__get_mac_address is None:  # learning addresses and modifiers are not undone, the next test type resets
+            port_stream_setups = defaultdict(list)
+            for port_name, stream_setup in zip(source_port_names, stream_setups):
+                port_stream_setups[port_name].append(stream_setup)
+            for port_identity in self.__port_identities:
+                self.__setup_cache.keep(
+                    port_identity,
+                    self[port_identity.name].port_config,
+                    self.__pairs_of(port_identity.name),
+                    port_stream_setups[port_identity.name],
+                )
+        if self.__setup_cache is not None:  # reset_ports to map_pairs is the setup the cache shortens
+            self.__setup_cache.add_setup_time(time.perf_counter() - self.__setup_started, kept=bool(self.__kept_setups))
 
     def __iter__(self) -> Iterator[TestResource]:
         return iter(self.__resources.values())
@@ -103,6 +191,9 @@ class ResourcesManager:
         if not self.__testers:
             return None
         await asyncio.gather(*[resource.release() for resource in self])
+        for resource in self:
+            if _traffic_listeners.get(resource.port) == self.__on_traffic_change:
+                _listen_traffic_change(resource.port, None)
         # seessions_to_close = [
         #     tester.session.logoff() for tester in self.__testers.values()
         # ]
@@ -110,10 +201,37 @@ class ResourcesManager:
         self.__resources.clear()
         # self.__testers.clear()
 
+    async def __on_traffic_change(self, port: "ports.GenericL23Port", get_attr: "commands.P_TRAFFIC.GetDataAttr") -> None:
+        if get_attr.on_off == enums.TrafficOnOff.ON:
+            self.__traffic_started[port] = True
+        elif port in self.__traffic_started:
+            self.__traffic_started[port] = False
+        self.__traffic_changed.set()
+
+    async def wait_traffic_change(self, timeout: float) -> bool:
+        """ wait for a port to report its traffic on or off, False on timeout """
+        try:
+            await asyncio.wait_for(self.__traffic_changed.wait(), max(timeout, 0))
+        except asyncio.TimeoutError:
+            return False
+        self.__traffic_changed.clear()
+        return True
+
+    @property
+    def traffic_is_over(self) -> bool:
+        """ the ports started by start_traffic all report their traffic off again """
+        return bool(self.__traffic_started) and not any(self.__traffic_started.values())
+
     @property
     def all_traffic_is_stop(self) -> bool:
         return all(r.traffic_is_off for r in self)
 
+    @property
+    def traffic_reference(self) -> Optional[TestResource]:
+        """ the port the elapsed traffic time is read from, the first one started """
+        started = next(iter(self.__traffic_started), None)
+        return next((r for r in self if r.port is started), None) or next((r for r in self if r.streams), None)
+
     @property
     def all_ports_is_sync(self) -> bool:
         return all(r.is_sync for r in self)
@@ -124,6 +242,10 @@ class ResourcesManager:
     async def get_time_elipsed(self) -> int:
         return max(await asyncio.gather(*[r.traffic.get_time_elipsed() for r in self]))
 
+    async def get_reference_time_elipsed(self) -> float:
+        reference = self.traffic_reference
+        return await reference.traffic.get_time_elipsed_second() if reference else 0.0
+
     async def set_frame_limit(self, duration: int) -> None:
         await asyncio.gather(*[r.traffic.set_frame_duration(duration) for r in self])
 
@@ -141,6 +263,8 @@ class ResourcesManager:
                     tester_already_set[resource.tester] = True
 
     async def start_traffic(self) -> None:
+        self.__traffic_started.clear()
+        self.__traffic_changed.clear()
         await asyncio.gather(*[r.traffic.start() for r in self if r.streams])
 
     async def stop_traffic(self) -> None:
@@ -290,19 +414,30 @@ class ResourcesManager:
         await asyncio.gather(*coroutines)
 
     async def reset_ports(self) -> None:
-        coroutines = (
-            self.stop_traffic(),
-            self.set_port_reset(),
-            self.set_port_speed_selection(),
-            self.set_port_autoneg(),
-            self.set_port_anlt(),
-            self.set_port_mdi_mdix(),
-            self.set_port_brr(),
-            self.set_port_fec(),
-            self.set_tpld_mode(),
-        )
+        """the ports keeping the setup of the previous test type only stop their traffic and clear its tx limits"""
+        self.__setup_started = time.perf_counter()
+        use_micro_tpld = self.__test_config.general_test_configuration.use_micro_tpld_on_demand
+        resources = [r for r in self if r.port_name not in self.__kept_setups]
+        coroutines = [self.stop_traffic()]
+        for r in self:
+            if r.port_name in self.__kept_setups:  # P_RESET would clear them
+                coroutines.extend((r.traffic.set_time_duration(0), r.traffic.set_frame_duration(0)))
+        for r in resources:
+            coroutines.extend((
+                r.port.reset.set(),
+                r.set_port_speed_selection(),
+                r.set_port_autoneg(),
+                r.set_port_anlt(),
+                r.set_port_mdi_mdix(),
+                r.set_port_brr(),
+                r.set_port_fec(),
+                r.set_tpld_mode(use_micro_tpld),
+            ))
         await asyncio.gather(*coroutines)
-        await sleep_log(DELAY_WAIT_RESET_PORT)
+        if self.__setup_cache is None or resources:
+            await sleep_log(DELAY_WAIT_RESET_PORT)
+        else:
+            self.__skip_setup_wait(DELAY_WAIT_RESET_PORT)
 
     async def set_stream_packet_limit(self, limit: int) -> None:
         await asyncio.gather(*[r.set_packet_limit(limit) for r in self])
@@ -0,0 +1,80 @@
+import hashlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+from xoa_core.types import PortIdentity
+from xoa_driver.enums import ProtocolOption
+
+from plugin2889.dataset import PortConfiguration, PortPair
+
+
+PortKey = Tuple[str, int, int]  # tester id, module index, port index
+
+
+@dataclass
+class StreamSetup:
+    """ what StreamManager.setup_stream applied on a stream """
+    tpld_id: int
+    protocol: List[ProtocolOption]
+    header: str
+    comment: str
+
+
+@dataclass
+class PortSetup:
+    setup_hash: str
+    streams: List[StreamSetup] = field(default_factory=list)  # in stream id order
+
+
+def port_setup_hash(port_config: PortConfiguration, port_pairs: Sequence[PortPair]) -> str:
+    """ the port config and the pairs the port is in, in stream order """
+    data = port_config.json() + "".join(f"|{pair.west}>{pair.east}" for pair in port_pairs)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class PortSetupCache:
+    """
+    Setup the previous test types left on the ports, shared by the test types of a test suite run.
+    A port keeps its reset settings and streams for the next test type using the same port config and port pairs,
+    only the stream settings which differ are applied again.
+    The setup time of every test type is measured, the saving is the mean time of the setups which reset all
+    their ports minus the time of the setups which kept some.
+    """
+    ports: Dict[PortKey, PortSetup] = field(default_factory=dict)
+    full_setup_seconds: List[float] = field(default_factory=list)
+    kept_setup_seconds: List[float] = field(default_factory=list)
+
+    @staticmethod
+    def port_key(port_identity: PortIdentity) -> PortKey:
+        return (port_identity.tester_id, port_identity.module_index, port_identity.port_index)
+
+    def kept_setup(
+        self, port_identity: PortIdentity, port_config: PortConfiguration, port_pairs: Sequence[PortPair]
+    ) -> Optional[PortSetup]:
+        port_setup = self.ports.get(self.port_key(port_identity))
+        if port_setup and port_setup.setup_hash == port_setup_hash(port_config, port_pairs):
+            return port_setup
+        return None
+
+    def forget(self, port_identity: PortIdentity) -> None:
+        self.ports.pop(self.port_key(port_identity), None)
+
+    def keep(
+        self,
+        port_identity: PortIdentity,
+        port_config: PortConfiguration,
+        port_pairs: Sequence[PortPair],
+        streams: List[StreamSetup],
+    ) -> None:
+        self.ports[self.port_key(port_identity)] = PortSetup(port_setup_hash(port_config, port_pairs), streams)
+
+    def add_setup_time(self, second: float, kept: bool) -> None:
+        (self.kept_setup_seconds if kept else self.full_setup_seconds).append(second)
+
+    @property
+    def saved_second(self) -> Optional[float]:
+        """ None until a setup without kept ports has been measured """
+        if not self.full_setup_seconds:
+            return None
+        full_mean = sum(self.full_setup_seconds) / len(self.full_setup_seconds)
+        return round(full_mean * len(self.kept_setup_seconds) - sum(self.kept_setup_seconds), 3)
@@ -5,6 +5,7 @@ from decimal import Decimal
 
 if TYPE_CHECKING:
     from xoa_driver import ports, testers
+    from plugin2889.resource.setup_cache import StreamSetup
 
 from xoa_driver import enums
 from xoa_driver.utils import apply
@@ -35,6 +36,7 @@ class TestResource:
         "interframe_gap",
         "port_config",
         "__port_speed",
+        "setup_kept",
     )
 
     def __init__(
@@ -45,6 +47,7 @@ class TestResource:
         port_config: PortConfiguration,
         mac_address: Optional[MacAddress] = None,
         get_mac_address_function: Optional[Callable[["TestResource", "MacAddress"], "MacAddress"]] = None,
+        keep_setup: bool = False,
     ) -> None:
         self.tester = tester
         self.port = port
@@ -59,6 +62,7 @@ class TestResource:
         self.__get_mac_address_function = get_mac_address_function
         self.interframe_gap = self.port_config.interframe_gap
         self.__port_speed: float = 0  # P_SPPED
+        self.setup_kept = keep_setup  # reserve without reset, the port keeps the setup of the previous test type
 
     @property
     def __sync_status(self) -> "enums.SyncStatus":
@@ -87,7 +91,7 @@ class TestResource:
 
     async def __prepare(self) -> "TestResource":
         await self.set_mac_address()
-        await self.reserve()
+        await self.reserve(reset=not self.setup_kept)
         return self
 
     @property
@@ -117,23 +121,29 @@ class TestResource:
 
         return Decimal(port_speed)
 
-    async def set_peer(self, stream_id: int, tpld_id: int, peer: "TestResource") -> None:
+    async def set_peer(self, stream_id: int, tpld_id: int, peer: "TestResource", kept: Optional["StreamSetup"] = None) -> "StreamSetup":
         assert peer.mac_address is not None
         stream = StreamManager(stream_id, tpld_id, self, peer_resource=peer)
-        await stream.setup_stream()
+        setup = await stream.setup_stream(kept)
         self.streams.append(stream)
         peer.statistics.add_tx_resources(self, stream.tpld_id)
         self.peers.append(peer)
+        return setup
 
-    async def reserve(self) -> None:
+    async def reserve(self, reset: bool = True) -> None:
         if self.__reservation_status == enums.ReservedStatus.RESERVED_BY_YOU:
             await self.port.reservation.set_release()
         elif self.__reservation_status == enums.ReservedStatus.RESERVED_BY_OTHER:
+            reset = True  # the other user may have changed the port
             await self.port.reservation.set_relinquish()
             while self.__reservation_status != enums.ReservedStatus.RELEASED:
                 await self.port.reservation.set_relinquish()
                 await sleep_log(INTERVAL_CHECK_PORT_RESERVE)
-        await apply(self.port.reservation.set_reserve(), self.port.reset.set())
+        if reset:
+            await apply(self.port.reservation.set_reserve(), self.port.reset.set())
+        else:
+            await apply(self.port.reservation.set_reserve())
+        self.setup_kept = not reset
         await self.port.streams.server_sync()
 
     async def release(self) -> None:
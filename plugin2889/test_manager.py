@@ -1,11 +1,11 @@
 import asyncio
 import contextlib
-import time
 from typing import Awaitable, TypeVar, AsyncGenerator
 
-from plugin2889.const import DELAY_WAIT_RESET_STATS, INTERVAL_CHECK_SHOULD_STOP_TRAFFIC
+from plugin2889.const import DELAY_WAIT_RESET_STATS, DELAY_WAIT_TRAFFIC_END, MAX_TRAFFIC_SAMPLING_RATE
 from plugin2889.resource.manager import ResourcesManager
 from plugin2889.plugin.utils import sleep_log
+from plugin2889.plugin.command_trace import trace_phase
 from plugin2889.util.logger import logger
 
 
@@ -37,9 +37,10 @@ class L23TestManager:
     @contextlib.asynccontextmanager
     async def __traffic_runner(self) -> AsyncGenerator[None, None]:
         logger.debug("\033[31mStart traffic...\x1B[0m")
-        await self.__resources.clear_statistic_counters()
-        await sleep_log(DELAY_WAIT_RESET_STATS)
-        await self.__resources.start_traffic()
+        with trace_phase("start_test"):
+            await self.__resources.clear_statistic_counters()
+            await sleep_log(DELAY_WAIT_RESET_STATS)
+            await self.__resources.start_traffic()
         try:
             yield
         finally:
@@ -48,19 +49,31 @@ class L23TestManager:
                 await self.__resources.stop_traffic()
 
     async def generate_traffic(self, duration: int, *, sampling_rate: float = 1.0) -> AsyncGenerator[int, None]:
-        # await self.__resources.set_time_limit(duration)
-        # await self.__resources.set_frame_limit(duration)
-        time_clock = 0
-        start_ts = time.time()
-        time_step = 1.0 / sampling_rate
-        duration_accived = False
+        """
+        Yield the traffic progress in percent, sampling_rate times per second (at most MAX_TRAFFIC_SAMPLING_RATE).
+        The samples are on an absolute schedule from the traffic start, a late sample skips the ticks it missed
+        instead of shifting the following ones. The elapsed time of one port only gives the progress,
+        the last sample is taken as soon as all the ports started report their traffic off (or on timeout).
+        """
+        loop = asyncio.get_running_loop()
+        time_step = 1.0 / min(sampling_rate, MAX_TRAFFIC_SAMPLING_RATE)
         async with self.__traffic_runner():
-            while time.time() - start_ts <= duration + 2:  # traffic stop delay
-                begin = time.time()
-                time_clock = await self.__resources.get_time_elipsed()
-                if time_clock == 0 or duration_accived:
-                    await sleep_log(INTERVAL_CHECK_SHOULD_STOP_TRAFFIC)
+            start = loop.time()
+            timeout = start + duration + DELAY_WAIT_TRAFFIC_END
+            deadline = start
+            traffic_is_over = False
+            while not traffic_is_over and loop.time() < timeout:
+                deadline += time_step
+                now = loop.time()
+                if now > deadline:
+                    deadline += ((now - deadline) // time_step + 1) * time_step
+                wake_up = min(deadline, timeout)
+                while not traffic_is_over and loop.time() < wake_up:
+                    if await self.__resources.wait_traffic_change(wake_up - loop.time()):
+                        traffic_is_over = self.__resources.traffic_is_over
+                if not traffic_is_over and loop.time() < timeout:
+                    time_elipsed = await self.__resources.get_reference_time_elipsed()
+                    if time_elipsed:  # 0 until started, port sync start is delayed
+                        yield min(int(time_elipsed / duration * 100), 99)  # other ports may still be sending
                     continue
-                duration_accived = time_clock == duration
-                yield int(time_clock / (duration) * 100)
-                await sleep_log(round(time_step - (time.time() - begin), 3))
+                yield 100
@@ -4,6 +4,7 @@ from .utils.constants import (
     STANDARD_TPLD_TOTAL_LENGTH,
     MulticastRole,
 )
+from .plugin.command_trace import CommandTracer
 from .plugin.config_checker import ConfigChecker
 from .plugin.type_aggregated_multicast_throughput_test import AggregatedThroughputTest
 from .plugin.type_burdened_group_join_delay_test import BurdenedGroupJoinDelayTest
@@ -116,8 +117,15 @@ class TestSuite3918(PluginAbstract["Model3918"]):
                 await test.run()
 
     async def start(self):
-        resource_manager = await ResourceManager(
-            self.testers, self.port_identities, self.cfg
-        )
-        ConfigChecker(self.cfg, resource_manager).check_config()
-        await self.run_test_cases(resource_manager)
+        test_conf = self.cfg.test_configuration
+        tracer = CommandTracer().install(self.testers.values()) if test_conf.command_trace_path else None
+        try:
+            resource_manager = await ResourceManager(
+                self.testers, self.port_identities, self.cfg
+            )
+            ConfigChecker(self.cfg, resource_manager).check_config()
+            await self.run_test_cases(resource_manager)
+        finally:
+            if tracer:
+                tracer.uninstall()
+                tracer.export(test_conf.command_trace_path, test_conf.command_trace_format)
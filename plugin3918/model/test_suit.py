@@ -1,5 +1,5 @@
 from pydantic import BaseModel, NonNegativeInt 
-from ..utils.constants import DisplayUnit, FlowCreationType, LatencyMode, TidAllocationScope
+from ..utils.constants import DisplayUnit, FlowCreationType, LatencyMode, TidAllocationScope, TraceFormat
 from .test_config import FrameSizeConfiguration
 
 
@@ -21,5 +21,7 @@ class TestConfiguration3918(BaseModel):
     sync_off_duration: int
     tid_allocation_scope: TidAllocationScope
     frame_sizes: FrameSizeConfiguration
+    command_trace_path: str = ""  # empty string means no command trace
+    command_trace_format: TraceFormat = TraceFormat.JSON
 
 
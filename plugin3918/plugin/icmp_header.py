@@ -1,4 +1,4 @@
-from typing import Union
+from typing import Dict, List, Optional, Tuple, Union
 from ..model.mc_uc_definition import McDefinition
 from ..model.protocol_segments import HeaderSegment
 from ..utils.field import MacAddress, NewIPv4Address, NewIPv6Address
@@ -321,3 +321,69 @@ class IgmpMld:
         )
         igmp_header.segment_value = igmp_header.segment_value + group_record_value.hex()
         return igmp_header
+
+
+PacketKey = Tuple[
+    IgmpRequestType,
+    IgmpVersion,
+    Union[NewIPv4Address, NewIPv6Address],
+    Union[NewIPv4Address, NewIPv6Address],
+    Optional[NewIPv4Address],
+    MacAddress,
+]
+
+
+class IgmpPacketCache:
+    """
+    IGMP/MLD packets of a multicast definition, built once and reused by all the join/leave cycles and bouts.
+    Keyed by request type, IGMP version, group, source address, destination address (IGMP only) and MAC address.
+    """
+
+    def __init__(self, mc_definition: McDefinition) -> None:
+        self.mc_definition = mc_definition
+        self._packets: Dict[PacketKey, str] = {}
+
+    def get_packets(
+        self,
+        request_type: IgmpRequestType,
+        group_addresses: List[Union[NewIPv4Address, NewIPv6Address]],
+        mc_src_ip: Union[NewIPv4Address, NewIPv6Address],
+        mc_dest_ip: Optional[NewIPv4Address],
+        mc_dest_mac: MacAddress,
+    ) -> List[str]:
+        """hex packets of the groups, a group without packet for this request type is left out"""
+        packets = []
+        for group_address in group_addresses:
+            key = (
+                request_type,
+                self.mc_definition.igmp_version,
+                group_address,
+                mc_src_ip,
+                mc_dest_ip,
+                mc_dest_mac,
+            )
+            packet = self._packets.get(key)
+            if packet is None:
+                packet = self._packets[key] = self._build_packet(
+                    request_type, group_address, mc_src_ip, mc_dest_ip, mc_dest_mac
+                )
+            if packet:
+                packets.append(packet)
+        return packets
+
+    def _build_packet(
+        self,
+        request_type: IgmpRequestType,
+        group_address: Union[NewIPv4Address, NewIPv6Address],
+        mc_src_ip: Union[NewIPv4Address, NewIPv6Address],
+        mc_dest_ip: Optional[NewIPv4Address],
+        mc_dest_mac: MacAddress,
+    ) -> str:
+        if isinstance(group_address, NewIPv6Address):
+            return IgmpMld.get_mld_packet(
+                request_type, group_address, mc_src_ip, self.mc_definition, mc_dest_mac
+            )
+        assert mc_dest_ip is not None
+        return IgmpMld.get_igmp_packet(
+            request_type, group_address, mc_src_ip, mc_dest_ip, self.mc_definition, mc_dest_mac
+        )
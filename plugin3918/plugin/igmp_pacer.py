@@ -0,0 +1,84 @@
+import time
+from asyncio import Semaphore, Task, create_task, gather, sleep
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Iterable, NamedTuple, Set
+from ..utils.constants import IGMP_PACER_BUCKET_SIZE, IGMP_PACER_PIPELINE_DEPTH
+
+if TYPE_CHECKING:
+    from .resource_manager import PortInstance
+
+
+class IgmpRequest(NamedTuple):
+    dest_instance: "PortInstance"
+    packet: str  # hex string of the IGMP/MLD packet
+
+
+@dataclass
+class PacerReport:
+    requested_rate: float  # requests per second
+    sent: int = 0
+    busy_second: float = 0.0  # time spent sending the bundles, the intervals between them excluded
+
+    @property
+    def achieved_rate(self) -> float:
+        return self.sent / self.busy_second if self.busy_second else 0.0
+
+
+class IgmpPacer:
+    """
+    Token bucket pacing the IGMP/MLD requests at the join/leave rate.
+    The send time of every request is taken from the monotonic clock, a late wake-up is caught up
+    (up to the bucket size) instead of delaying all the following requests,
+    and up to pipeline_depth requests per destination port wait for their reply at the same time.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        pipeline_depth: int = IGMP_PACER_PIPELINE_DEPTH,
+        bucket_size: int = IGMP_PACER_BUCKET_SIZE,
+    ) -> None:
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self.pipeline_depth = pipeline_depth
+        self.bucket_size = bucket_size
+        self.report = PacerReport(rate)
+        self._next_send = 0.0
+        self._in_flight: Dict["PortInstance", Semaphore] = {}
+
+    async def _take_token(self) -> None:
+        now = time.monotonic()
+        # unused tokens pile up to the bucket size at most
+        self._next_send = max(self._next_send, now - (self.bucket_size - 1) * self.interval)
+        if self._next_send > now:
+            await sleep(self._next_send - now)
+        self._next_send += self.interval
+
+    async def _send(
+        self,
+        semaphore: Semaphore,
+        send: Callable[[IgmpRequest], Awaitable[None]],
+        request: IgmpRequest,
+    ) -> None:
+        try:
+            await send(request)
+        finally:
+            semaphore.release()
+
+    async def pace(
+        self, requests: Iterable[IgmpRequest], send: Callable[[IgmpRequest], Awaitable[None]]
+    ) -> None:
+        """ send the requests at the rate, returns when all of them are replied """
+        start = time.monotonic()
+        pending: Set[Task] = set()
+        for request in requests:
+            await self._take_token()
+            semaphore = self._in_flight.setdefault(
+                request.dest_instance, Semaphore(self.pipeline_depth)
+            )
+            await semaphore.acquire()
+            task = create_task(self._send(semaphore, send, request))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+            self.report.sent += 1
+        await gather(*pending)
+        self.report.busy_second += time.monotonic() - start
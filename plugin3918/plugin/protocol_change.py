@@ -1,6 +1,7 @@
 from copy import deepcopy
 from enum import Enum
-from typing import List, Optional, Union
+from functools import lru_cache
+from typing import List, Optional, Tuple, Union
 from pydantic import ConfigError
 from ..utils.constants import (
     ETHER_TYPE_IPV4,
@@ -23,12 +24,29 @@ class ParseMode(Enum):
     BYTE = 1
 
 
+@lru_cache(maxsize=None)
+def _default_segment(protocol: ProtocolOption) -> Tuple[SegmentDefinition, int, int]:
+    """segment definition, default value as an int and its bit length, built once per protocol"""
+    segment_def = ProtocolChange.get_segment_definition_by_protocol(protocol)
+    default_value_bin = segment_def.default_value_bin
+    return segment_def, _bin_list_to_int(default_value_bin), len(default_value_bin)
+
+
+def _bin_list_to_int(bin_list: List[int]) -> int:
+    return int("".join(str(i) for i in bin_list), 2) if bin_list else 0
+
+
 class ProtocolChange:
+    """
+    Segment value kept as one packed int of value_bit_length bits, the first bit being the most significant.
+    Fields are written with masked shifts, value_bin is only built when asked for.
+    """
+
     def __init__(self, protocol: Union[ProtocolOption, str]) -> None:
-        self.segment_def = type(self).get_segment_definition_by_protocol(
+        # the definition is shared by all the instances of a protocol, it is never modified
+        self.segment_def, self.value_int, self.value_bit_length = _default_segment(
             ProtocolOption(protocol)
         )
-        self.value_bin = self.segment_def.default_value_bin
 
     @property
     def header(self) -> "HeaderSegment":
@@ -39,11 +57,9 @@ class ProtocolChange:
     @classmethod
     def read_segment(cls, segment: "HeaderSegment") -> "ProtocolChange":
         instance = ProtocolChange(segment.type)
-        instance.value_bin = [
-            int(p)
-            for i in bytes.fromhex(segment.segment_value)
-            for p in bin(i).replace("0b", "").zfill(8)
-        ]
+        value = bytes.fromhex(segment.segment_value)
+        instance.value_int = int.from_bytes(value, "big")
+        instance.value_bit_length = len(value) * 8
         return instance
 
     @classmethod
@@ -187,9 +203,7 @@ class ProtocolChange:
         if segment.type != ProtocolOption.ICMPV6:
             patched_value = bytearray.fromhex(value)
             offset_num = (
-                ProtocolChange.get_segment_definition_by_protocol(
-                    segment.type
-                ).checksum_offset
+                _default_segment(segment.type)[0].checksum_offset
                 if segment.type.value in DEFAULT_SEGMENT_DIC
                 else -1
             )
@@ -242,17 +256,12 @@ class ProtocolChange:
 
     @classmethod
     def wrap_add_16(cls, data: bytearray, offset_num: int) -> bytearray:
-        # Needs validation
-        checksum = 0
-        data[offset_num + 0] = 0
-        data[offset_num + 1] = 0
-        for i in range(0, len(data), 2):
-            w = (data[i + 0] << 8) + data[i + 1]
-            checksum += w
-            if checksum > 0xFFFF:
-                checksum = (1 + checksum) & 0xFFFF  # add carry back in as lsb
-        data[offset_num + 0] = 0xFF + 1 + (~(checksum >> 8))
-        data[offset_num + 1] = 0xFF + 1 + (~(checksum & 0xFF))
+        data[offset_num : offset_num + 2] = b"\x00\x00"
+        # one's complement sum of the 16 bit words: 2 ** 16 is 1 modulo 0xFFFF,
+        # so it is the data as one int modulo 0xFFFF, except that data not all zero sums to 0xFFFF
+        padded = int.from_bytes(data, "big") << (8 * (len(data) % 2))
+        checksum = padded % 0xFFFF or (0xFFFF if padded else 0)
+        data[offset_num : offset_num + 2] = (~checksum & 0xFFFF).to_bytes(2, "big")
         return data
 
     @classmethod
@@ -271,40 +280,38 @@ class ProtocolChange:
         # add spece for Ethernet FCS
         return packet_header_list + bytearray([0, 0, 0, 0])
 
+    @property
+    def value_bin(self) -> List[int]:
+        return [int(i) for i in self.bin_str]
+
+    @value_bin.setter
+    def value_bin(self, bin_list: List[int]) -> None:
+        self.value_int = _bin_list_to_int(bin_list)
+        self.value_bit_length = len(bin_list)
+
     @property
     def bin_int_list(self) -> List[int]:
         return self.value_bin
 
     @property
     def bin_str(self) -> str:
-        return "".join(str(i) for i in self.value_bin)
+        return format(self.value_int, "b").zfill(self.value_bit_length)
 
     @property
     def bytes_int_list(self) -> List[int]:
-        return type(self).bin_to_bytes_int_list(self.value_bin)
+        return list(self.bytearrays)
 
     @classmethod
     def bin_to_bytes_int_list(cls, bin_list: List[int]) -> List[int]:
-        length = len(bin_list)
-        step = 8
-        modulus = length % step
-        short_len = length // step
-        long_len = short_len * step if not modulus else (short_len + 1) * step
-        new_bin = cls.patch_bin_list(bin_list, long_len)
-        result = []
-        for i in range(0, length, step):
-            part = new_bin[i : i + step]
-            part_str = "".join(str(m) for m in part)
-            result.append(int(part_str, 2))
-        return result
+        return list(_bin_list_to_int(bin_list).to_bytes((len(bin_list) + 7) // 8, "big"))
 
     @property
     def bytearrays(self) -> bytearray:
-        return bytearray(self.bytes_int_list)
+        return bytearray(self.byte)
 
     @property
     def byte(self) -> bytes:
-        return bytes(self.bytearrays)
+        return self.value_int.to_bytes((self.value_bit_length + 7) // 8, "big")
 
     @property
     def hexstring(self) -> str:
@@ -322,10 +329,10 @@ class ProtocolChange:
     def find_value_as_bytearray(self, key: str) -> bytearray:
         field = self.find_field(key)
         if field:
-            bins = self.value_bin[
-                field.bit_offset : field.bit_offset + field.bit_length
-            ]
-            return bytearray(type(self).bin_to_bytes_int_list(bins))
+            end = min(field.bit_offset + field.bit_length, self.value_bit_length)
+            bit_length = max(end - field.bit_offset, 0)
+            value = (self.value_int >> (self.value_bit_length - end)) & ((1 << bit_length) - 1)
+            return bytearray(value.to_bytes((bit_length + 7) // 8, "big"))
         return bytearray()
 
     def change_segments(self, **dic) -> "ProtocolChange":
@@ -340,35 +347,33 @@ class ProtocolChange:
         value: Union[str, list, bytearray, bytes, int],
         mode: Union[ParseMode, int] = ParseMode.BIT.value,
     ) -> "ProtocolChange":
-        value_bin = self.value_bin
         mode_enum = ParseMode(mode)
         field_def = self.find_field(key)
         assert field_def, f'Cannot find the field named "{key}". '
         bit_offset = field_def.bit_offset
         bit_length = field_def.bit_length
-        new_value = [0 for _ in range(bit_length)]
+        new_value, new_bit_length = 0, bit_length
         if isinstance(value, (str, list, bytearray, bytes)):
             if mode_enum == ParseMode.BIT:
-                new_value = [int(i) for i in value]
+                bin_list = [int(i) for i in value]
                 assert all(
-                    i in range(2) for i in new_value
+                    i in range(2) for i in bin_list
                 ), "Not all elements are '0' or '1'!"
+                new_value, new_bit_length = _bin_list_to_int(bin_list), len(bin_list)
             elif mode_enum == ParseMode.BYTE:
-                if isinstance(value, str):
-                    temp = [int(i) for i in bytes.fromhex(value)]
-                else:
-                    temp = list(value)
-                new_value = [
-                    int(i) for b in temp for i in bin(b).replace("0b", "").zfill(8)
-                ]
+                temp = bytes.fromhex(value) if isinstance(value, str) else bytes(value)
+                new_value, new_bit_length = int.from_bytes(temp, "big"), len(temp) * 8
 
         elif isinstance(value, int):
-            new_value = [int(i) for i in bin(value).replace("0b", "")]
-
-        result = type(self).patch_bin_list(new_value, bit_length)
-        assert bit_offset + len(result) <= len(value_bin), "Modified value too long. "
-        value_bin[bit_offset : bit_offset + len(result)] = result
-        self.value_bin = value_bin
+            new_value, new_bit_length = value, max(value.bit_length(), 1)
+
+        if not new_bit_length:
+            return self
+        # longer values keep their last bits, shorter ones are padded with leading zeros
+        mask = (1 << bit_length) - 1
+        assert bit_offset + bit_length <= self.value_bit_length, "Modified value too long. "
+        shift = self.value_bit_length - bit_offset - bit_length
+        self.value_int = (self.value_int & ~(mask << shift)) | ((new_value & mask) << shift)
         return self
 
     @classmethod
@@ -1,10 +1,13 @@
 from asyncio import gather, sleep, Lock as AsyncLock
+from functools import partial
+from itertools import islice
 from typing import (
     TYPE_CHECKING,
     Dict,
     Iterable,
     Generator,
     List,
+    Optional,
     Tuple,
     Union,
     Protocol as Interface,
@@ -19,11 +22,11 @@ from xoa_driver.enums import (
     PacketType,
 )
 from xoa_driver.lli import commands
-from xoa_driver.misc import Token
 from ..utils.field import MacAddress, NewIPv6Address
-from ..utils.scheduler import schedule
+from ..utils.scheduler import OverrunPolicy, Scheduler
 from ..plugin.mc_operations import get_multicast_mac_for_ip
-from .icmp_header import IgmpMld
+from .icmp_header import IgmpPacketCache
+from .igmp_pacer import IgmpPacer, IgmpRequest, PacerReport
 from .protocol_change import ProtocolChange
 from ..utils.constants import (
     HW_PACKET_MAX_SIZE,
@@ -48,6 +51,7 @@ from ..utils.errors import LossSync, UcTypeError, UnableToObtainDmac
 from .id_control import IDControl
 from .l3_learning import make_address_collection, send_gateway_learning_request
 from .fast_access import Data3918
+from .command_trace import trace_phase, traced_phase
 from .test_result import BoutInfo
 
 if TYPE_CHECKING:
@@ -80,11 +84,15 @@ class BaseTestType:
             self.model_data.get_tid_allocation_scope(),
         )
         self.igmp_request_queue = None
+        self.igmp_pacer = IgmpPacer(0)
+        self.igmp_pacer_reports: Dict[IgmpRequestType, PacerReport] = {}
+        self.igmp_packet_cache = IgmpPacketCache(self.model_data.mc_definition)
         self.igmp_request_inactive = True
         self.igmp_request_sending = AsyncLock()
         self.multicast_group_check_map = {}
         self.want_igmp_request_tx_time = False
         self.counter_poll_active = False
+        self.scheduler = Scheduler()
         self.src_port_type = StreamTypeInfo.MULTICAST
         self.xoa_out = xoa_out
 
@@ -145,6 +153,7 @@ class BaseTestType:
             ]
         )
 
+    @traced_phase("setup_ports")
     async def configure_ports(self) -> None:
         tokens = []
         for src_instance in self.resource_manager.port_instances():
@@ -211,6 +220,7 @@ class BaseTestType:
                     tokens.append(port.mix.lengths[position].set(v))
         await apply(*tokens)
 
+    @traced_phase("learning")
     async def add_l3_learning_steps(self) -> None:
         address_refresh_map = {}
         for name, arp_object in self.resource_manager.arp_map().items():
@@ -277,7 +287,8 @@ class BaseTestType:
         for bout_info in self.gen_bout_info():
             self.bout_info = bout_info
             await self.add_toggle_port_sync_state_step()
-            await self.add_iteration_step()
+            with trace_phase("search_step"):
+                await self.add_iteration_step()
 
     def allocate_new_test_result(self) -> None:
         self.resource_manager.set_test_result_bout_info(self.bout_info)
@@ -586,12 +597,21 @@ class BaseTestType:
 
     async def send_igmp(self, request_type: IgmpRequestType) -> None:
         self.igmp_request_queue = self.init_igmp_request_bundle(request_type)
+        self.igmp_pacer = IgmpPacer(self.model_data.get_igmp_join_leave_rate())
+        self.igmp_pacer_reports[request_type] = self.igmp_pacer.report
         interval = (
             self.model_data.get_igmp_join_interval()
             if request_type == IgmpRequestType.JOIN
             else self.model_data.get_igmp_leave_interval()
         )
-        await schedule(interval, "s", self.send_request_bundle, request_type)
+        # the bundles are paced over the interval, missed ticks run at once to keep the rate
+        self.scheduler.schedule(
+            interval,
+            "s",
+            self.send_request_bundle,
+            request_type,
+            policy=OverrunPolicy.CATCH_UP,
+        )
 
     async def send_request_bundle(
         self, count: int, request_type: IgmpRequestType
@@ -605,21 +625,43 @@ class BaseTestType:
                 else self.model_data.get_igmp_leave_interval()
             )
             join_leave_each = self.model_data.get_igmp_join_leave_rate() * interval
-            for _ in range(join_leave_each):
-                request, dest_instance, is_time_request = next(
-                    self.igmp_request_queue)
-                result = await request
-                if is_time_request and self.want_igmp_request_tx_time:
-                    if request_type == IgmpRequestType.JOIN:
-                        dest_instance.test_result.set_join_sent_timestamp(
-                            result.nanoseconds
-                        )
-                    else:
-                        dest_instance.test_result.set_leave_sent_timestamp(
-                            result.nanoseconds
-                        )
+            await self.igmp_pacer.pace(
+                islice(self.igmp_request_queue, join_leave_each),
+                partial(self.send_igmp_request, request_type),
+            )
         return self.igmp_request_inactive
 
+    async def send_igmp_request(
+        self, request_type: IgmpRequestType, request: IgmpRequest
+    ) -> None:
+        port = request.dest_instance.port
+        if not self.want_igmp_request_tx_time:
+            await port.tx_single_pkt.send.set(request.packet)
+            return
+        # in one batch, so the tx time read is the one of this packet
+        _, tx_time = await apply(
+            port.tx_single_pkt.send.set(request.packet),
+            port.tx_single_pkt.time.get(),
+        )
+        if request_type == IgmpRequestType.JOIN:
+            request.dest_instance.test_result.set_join_sent_timestamp(
+                tx_time.nanoseconds
+            )
+        else:
+            request.dest_instance.test_result.set_leave_sent_timestamp(
+                tx_time.nanoseconds
+            )
+
+    def igmp_rate_results(self) -> Dict[str, float]:
+        """ requested and achieved IGMP/MLD request rates of the bout """
+        results = {}
+        for request_type, report in self.igmp_pacer_reports.items():
+            results["IGMP Requested Rate(Pps)"] = report.requested_rate
+            results[
+                f"IGMP {request_type.name.capitalize()} Rate(Pps)"
+            ] = report.achieved_rate
+        return results
+
     async def send_igmp_join(self) -> None:
         self.igmp_request_inactive = False
         await self.send_igmp(IgmpRequestType.JOIN)
@@ -630,45 +672,47 @@ class BaseTestType:
 
     def init_igmp_request_bundle(
         self, request_type: IgmpRequestType
-    ) -> Generator[Tuple[Token, PortInstance, bool], None, None]:
-        mc_def = self.model_data.mc_definition
-        mc_start_address = mc_def.mc_ip_start_address
-        while True:
-            for resource in self.resource_manager.send_resources_mc():
-                mc_src_port = resource.src_instance
-                mc_dest_port = resource.dest_instance
-                for mc_address_index in range(self.bout_info.mc_group_count):
-                    group_address = mc_start_address + mc_address_index
-                    if isinstance(mc_start_address, NewIPv6Address):
-                        igmp_packet = IgmpMld.get_mld_packet(
-                            request_type,
-                            group_address,
-                            mc_src_port.config.ipv6_properties.address,
-                            mc_def,
-                            mc_dest_port.native_mac_address,
-                        )
-                    else:
-                        igmp_packet = IgmpMld.get_igmp_packet(
-                            request_type,
-                            group_address,
-                            mc_src_port.config.ipv4_properties.address,
-                            mc_dest_port.config.ipv4_properties.address,
-                            mc_def,
-                            mc_dest_port.native_mac_address,
-                        )
-                    if igmp_packet:
-                        yield (
-                            mc_dest_port.port.tx_single_pkt.send.set(
-                                igmp_packet),
-                            mc_dest_port,
-                            False,
-                        )
-                        if self.want_igmp_request_tx_time:
-                            yield (
-                                mc_dest_port.port.tx_single_pkt.time.get(),
-                                mc_dest_port,
-                                True,
-                            )
+    ) -> Optional[Generator[IgmpRequest, None, None]]:
+        """
+        all the packets of the bout are built, or taken from the packet cache, before the first request is sent,
+        the requests then cycle over them. None if there is no packet to send (IGMPv1 leave).
+        """
+        mc_start_address = self.model_data.mc_definition.mc_ip_start_address
+        group_addresses = [
+            mc_start_address + mc_address_index
+            for mc_address_index in range(self.bout_info.mc_group_count)
+        ]
+        bundles: List[Tuple[PortInstance, List[str]]] = []
+        for resource in self.resource_manager.send_resources_mc():
+            mc_src_port = resource.src_instance
+            mc_dest_port = resource.dest_instance
+            if isinstance(mc_start_address, NewIPv6Address):
+                packets = self.igmp_packet_cache.get_packets(
+                    request_type,
+                    group_addresses,
+                    mc_src_port.config.ipv6_properties.address,
+                    None,
+                    mc_dest_port.native_mac_address,
+                )
+            else:
+                packets = self.igmp_packet_cache.get_packets(
+                    request_type,
+                    group_addresses,
+                    mc_src_port.config.ipv4_properties.address,
+                    mc_dest_port.config.ipv4_properties.address,
+                    mc_dest_port.native_mac_address,
+                )
+            bundles.append((mc_dest_port, packets))
+        if not any(packets for _, packets in bundles):
+            return None
+
+        def cycle_requests() -> Generator[IgmpRequest, None, None]:
+            while True:
+                for mc_dest_port, packets in bundles:
+                    for igmp_packet in packets:
+                        yield IgmpRequest(mc_dest_port, igmp_packet)
+
+        return cycle_requests()
 
     def test_src_ports(self) -> List[PortInstance]:
         if self.src_port_type == StreamTypeInfo.UNICAST_BURDEN:
@@ -679,6 +723,7 @@ class BaseTestType:
             port_instances = self.resource_manager.mc_src_ports()
         return port_instances
 
+    @traced_phase("start_test")
     async def start_traffic(self, port_sync=False, set_time_limit=False) -> None:
         tokens = []
         port_instances = self.test_src_ports()
@@ -724,6 +769,7 @@ class BaseTestType:
             tokens.append(port_ins.port.statistics.tx.clear.set())
         await apply(*tokens)
 
+    @traced_phase("learning")
     async def send_mac_learning_packets(self) -> None:
         tokens = []
         p_instance = self.resource_manager.port_instances()
@@ -741,7 +787,7 @@ class BaseTestType:
 
     async def start_counter_poll(self) -> None:
         self.counter_poll_active = True
-        await schedule(1, "s", self.read_counters)
+        self.scheduler.schedule(1, "s", self.read_counters)
 
     def stop_counter_poll(self) -> None:
         self.counter_poll_active = False
@@ -749,6 +795,7 @@ class BaseTestType:
     def show_results(self):
         pass
 
+    @traced_phase("collect")
     async def read_counters(self, count: int = 0) -> bool:
         await self.resource_manager.query(self.src_port_type)
         self.show_results()
@@ -758,7 +805,14 @@ class BaseTestType:
         self.init_test_plan_data()
         await self.configure_ports()
         await self.add_l3_learning_steps()
-        await self.test_loop()
+        try:
+            await self.test_loop()
+        except BaseException:
+            # the periodic job errors must not replace the exception of the test
+            for error in await self.scheduler.stop(raise_error=False):
+                self.xoa_out.send_warning(error)
+            raise
+        await self.scheduler.stop()
 
     async def get_final_counters(self) -> bool:
         return False
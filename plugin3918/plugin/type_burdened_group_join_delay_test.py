@@ -81,6 +81,7 @@ class BurdenedGroupJoinDelayTest(BaseTestType):
             "Tx(Packets)": self.resource_manager.test_result.total_tx_frames,
             "Rx(Packets)": self.resource_manager.test_result.total_rx_frames,
             "Is Final": self.bout_info.is_final,
+            **self.igmp_rate_results(),
             "Source Ports": [],
             "Destination Ports": [],
         }
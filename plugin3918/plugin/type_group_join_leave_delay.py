@@ -153,6 +153,7 @@ class GroupJoinLeaveDelayTest(BaseTestType):
             "Group Count": self.bout_info.mc_group_count,
             "Result State": self.bout_info.result_state.value,
             "Is Final": self.bout_info.is_final,
+            **self.igmp_rate_results(),
             "Source Ports": [],
             "Destination Ports": [],
         }
@@ -5,7 +5,6 @@ from xoa_driver.utils import apply, apply_iter
 from .resource_manager import PortInstance, ResourceManager
 from .type_base import BaseTestType, PPipeFacade
 from ..utils.constants import ResultState
-from ..utils.scheduler import schedule
 
 if TYPE_CHECKING:
     from ...plugin3918 import Model3918
@@ -105,7 +104,7 @@ class MulticastGroupCapacityTest(BaseTestType):
 
     async def setup_capacity_capture(self):
         self.capture_switch.capture_check_enabled = True
-        await schedule(1, "s", self.check_capacity)
+        self.scheduler.schedule(1, "s", self.check_capacity)
 
     async def check_capacity(self, count: int) -> bool:
         if not self.capture_switch.capture_check_enabled:
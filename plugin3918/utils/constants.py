@@ -40,6 +40,9 @@ MIN_REFRESH_TIMER_INTERNAL = 100.0
 HW_PACKET_MIN_SIZE = 64
 HW_PACKET_MAX_SIZE = 1500
 
+IGMP_PACER_PIPELINE_DEPTH = 16  # IGMP/MLD requests per destination port waiting for their reply
+IGMP_PACER_BUCKET_SIZE = 8  # IGMP/MLD requests sent back to back to catch up a late wake-up
+
 IP_V4_MULTICAST_MAC_BASE_ADDRESS = "01005e000000"
 IP_V6_MULTICAST_MAC_BASE_ADDRESS = "333300000000"
 
@@ -319,6 +322,11 @@ class TidAllocationScope(Enum):
     SOURCE_PORT_ID = "source_port_id"
 
 
+class TraceFormat(Enum):
+    JSON = "json"
+    CHROME = "chrome_trace"
+
+
 class MdiMdixMode(Enum):
     AUTO = "auto"
     MDI = "mdi"
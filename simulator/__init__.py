@@ -0,0 +1,11 @@
+from .chassis import SimulatedChassis, SimulatedNetwork, SimulatorConfig
+from .dut import DutModel
+from .tester import SimulatedL23Tester
+
+__all__ = (
+    "DutModel",
+    "SimulatedChassis",
+    "SimulatedL23Tester",
+    "SimulatedNetwork",
+    "SimulatorConfig",
+)
@@ -0,0 +1,271 @@
+"""
+Run a plugin against simulated testers, once per enabled test type, and report
+the commands issued, the round trips, the wall-clock and the CPU time of every test type.
+
+    python -m simulator.benchmark plugin2544 config.json
+
+The config file has the same layout as the test parameters of xoa-core:
+{"username": ..., "port_identities": [{"tester_id": ..., "module_index": ..., "port_index": ...}], "config": {...}}
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import time
+import traceback
+from collections import Counter
+from copy import deepcopy
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, NamedTuple, Tuple
+from xoa_core.types import PortIdentity, TestParameters
+from .chassis import SimulatedNetwork, SimulatorConfig
+from .dut import DutModel
+from .tester import SimulatedL23Tester
+
+
+class PluginEntry(NamedTuple):
+    entry_module: str
+    entry_object: str
+    model_module: str
+    data_model: str
+    test_types_section: str
+
+
+PLUGINS = {
+    "plugin2544": PluginEntry(
+        "plugin2544.entry", "TestSuite2544", "plugin2544.dataset", "PluginModel2544", "test_types_configuration"
+    ),
+    "plugin2889": PluginEntry(
+        "plugin2889", "TestSuite2889", "plugin2889.dataset", "TestSuiteConfiguration2889", "test_suites_configuration"
+    ),
+    "plugin3918": PluginEntry(
+        "plugin3918", "TestSuite3918", "plugin3918", "Model3918", "test_types_configuration"
+    ),
+}
+DEFAULT_MODULE_REVISION = "Odin-10G-1S-6P[b]"
+
+
+@dataclass
+class BenchmarkResult:
+    test_type: str
+    wall_second: float = 0.0
+    cpu_second: float = 0.0
+    simulator_cpu_second: float = 0.0
+    batch_count: int = 0
+    commands: Counter = field(default_factory=Counter)
+    messages: Counter = field(default_factory=Counter)
+    error: str = ""
+
+    @property
+    def command_count(self) -> int:
+        return sum(self.commands.values())
+
+    @property
+    def plugin_cpu_second(self) -> float:
+        return self.cpu_second - self.simulator_cpu_second
+
+
+class PipeStandIn:
+    """ counts the messages a plugin sends to xoa-core """
+
+    def __init__(self, messages: Counter, verbose: bool = False) -> None:
+        self.messages = messages
+        self.verbose = verbose
+
+    def _send(self, kind: str, data: Any) -> None:
+        self.messages[kind] += 1
+        if self.verbose:
+            print(kind, data)
+
+    def send_statistics(self, data: Any) -> None:
+        self._send("statistics", data)
+
+    def send_progress(self, current: int, total: int = 100, *loop: int) -> None:
+        self._send("progress", f"{current}/{total}")
+
+    def send_warning(self, warning: Exception) -> None:
+        self._send("warning", warning)
+
+    def send_error(self, error: Exception) -> None:
+        self._send("error", error)
+
+
+class StateConditionsStandIn:
+    async def wait_if_paused(self) -> None:
+        return None
+
+    async def stop_if_stopped(self) -> None:
+        return None
+
+
+def iter_single_test_types(config: Dict[str, Any], section: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """ one copy of the config per enabled test type, with all the other test types disabled """
+    test_types = config[section]
+    enabled = [
+        name
+        for name, test_type in test_types.items()
+        if test_type and test_type.get("enabled", True)
+    ]
+    for name in enabled:
+        single = deepcopy(config)
+        for other, test_type in single[section].items():
+            if other == name or not test_type:
+                continue
+            if "enabled" in test_type:
+                test_type["enabled"] = False
+            else:
+                single[section][other] = None
+        yield name, single
+
+
+def chassis_layouts(
+    port_identities: List["PortIdentity"], module_revision: str, base: "SimulatorConfig"
+) -> Dict[str, "SimulatorConfig"]:
+    port_counts: Dict[str, Dict[int, int]] = {}
+    for identity in port_identities:
+        modules = port_counts.setdefault(identity.tester_id, {})
+        modules[identity.module_index] = max(modules.get(identity.module_index, 6), identity.port_index + 1)
+    return {
+        tester_id: SimulatorConfig(
+            modules={index: (module_revision, count) for index, count in modules.items()},
+            port_speed_mbps=base.port_speed_mbps,
+            round_trip_second=base.round_trip_second,
+            command_second=base.command_second,
+        )
+        for tester_id, modules in port_counts.items()
+    }
+
+
+async def run_test_type(
+    plugin: "PluginEntry",
+    test_type: str,
+    params: Dict[str, Any],
+    dut: "DutModel",
+    base: "SimulatorConfig",
+    module_revision: str,
+    verbose: bool,
+) -> "BenchmarkResult":
+    entry_class = getattr(importlib.import_module(plugin.entry_module), plugin.entry_object)
+    model_class = getattr(importlib.import_module(plugin.model_module), plugin.data_model)
+    port_identities = [PortIdentity(**identity) for identity in params["port_identities"]]
+    network = SimulatedNetwork(deepcopy(dut))
+    testers = {}
+    for tester_id, config in chassis_layouts(port_identities, module_revision, base).items():
+        testers[tester_id] = await SimulatedL23Tester(network, tester_id, config, params.get("username", "xoa"))
+    for tester in testers.values():  # only the plugin is measured, not connecting to the testers
+        tester.chassis.command_count.clear()
+        tester.chassis.batch_count = 0
+        tester.chassis.cpu_second = 0.0
+
+    result = BenchmarkResult(test_type)
+    test_params = TestParameters(
+        username=params.get("username", "xoa"),
+        port_identities=port_identities,
+        config=model_class.parse_obj(params["config"]),
+    )
+    suite = entry_class(StateConditionsStandIn(), PipeStandIn(result.messages, verbose), testers, test_params)
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    try:
+        await suite.start()
+    except Exception as error:
+        result.error = repr(error)
+        if verbose:
+            traceback.print_exc()
+    result.wall_second = time.perf_counter() - wall_start
+    result.cpu_second = time.process_time() - cpu_start
+    for tester in testers.values():
+        result.commands.update(tester.chassis.command_count)
+        result.batch_count += tester.chassis.batch_count
+        result.simulator_cpu_second += tester.chassis.cpu_second
+        await tester.session.logoff()
+    return result
+
+
+def print_report(results: List["BenchmarkResult"], top: int) -> None:
+    print(
+        f"{'test type':<32}{'commands':>10}{'batches':>10}{'wall s':>10}"
+        f"{'cpu s':>10}{'plugin cpu s':>14}{'messages':>10}"
+    )
+    for result in results:
+        print(
+            f"{result.test_type:<32}{result.command_count:>10}{result.batch_count:>10}"
+            f"{result.wall_second:>10.3f}{result.cpu_second:>10.3f}"
+            f"{result.plugin_cpu_second:>14.3f}{sum(result.messages.values()):>10}"
+        )
+        if result.error:
+            print(f"    failed: {result.error}")
+        for name, count in result.commands.most_common(top):
+            print(f"    {name:<28}{count:>10}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark a plugin against simulated testers")
+    parser.add_argument("plugin", choices=sorted(PLUGINS))
+    parser.add_argument("config", help="json file with username, port_identities and config")
+    parser.add_argument("--round-trip-ms", type=float, default=0.5, help="latency of one batch of commands")
+    parser.add_argument("--command-us", type=float, default=5.0, help="service time of one command")
+    parser.add_argument("--port-speed-mbps", type=int, default=10000)
+    parser.add_argument("--module-revision", default=DEFAULT_MODULE_REVISION)
+    parser.add_argument("--dut-capacity-pct", type=float, default=100.0)
+    parser.add_argument("--dut-loss-ratio", type=float, default=0.0)
+    parser.add_argument("--dut-latency-ns", type=int, default=1000)
+    parser.add_argument("--dut-jitter-ns", type=int, default=0)
+    parser.add_argument("--test-type", action="append", help="only run these test types")
+    parser.add_argument("--together", action="store_true", help="run the enabled test types in one plugin run")
+    parser.add_argument("--top", type=int, default=10, help="most issued commands to list per test type")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--verbose", action="store_true", help="print the messages sent by the plugin")
+    args = parser.parse_args()
+
+    plugin = PLUGINS[args.plugin]
+    with open(args.config) as config_file:
+        params = json.load(config_file)
+    dut = DutModel(
+        capacity_pct=args.dut_capacity_pct,
+        loss_ratio=args.dut_loss_ratio,
+        latency_ns=args.dut_latency_ns,
+        jitter_ns=args.dut_jitter_ns,
+    )
+    base = SimulatorConfig(
+        port_speed_mbps=args.port_speed_mbps,
+        round_trip_second=args.round_trip_ms / 1e3,
+        command_second=args.command_us / 1e6,
+    )
+    results = []
+    runs = iter_single_test_types(params["config"], plugin.test_types_section)
+    if args.together:
+        runs = iter([("all enabled", params["config"])])
+    for test_type, config in runs:
+        if args.test_type and test_type not in args.test_type:
+            continue
+        single = {**params, "config": config}
+        results.append(
+            asyncio.run(
+                run_test_type(plugin, test_type, single, dut, base, args.module_revision, args.verbose)
+            )
+        )
+    print_report(results, args.top)
+    if args.json:
+        with open(args.json, "w") as json_file:
+            json.dump(
+                [
+                    {
+                        "test_type": result.test_type,
+                        "commands": dict(result.commands),
+                        "command_count": result.command_count,
+                        "batch_count": result.batch_count,
+                        "wall_second": result.wall_second,
+                        "cpu_second": result.cpu_second,
+                        "simulator_cpu_second": result.simulator_cpu_second,
+                        "messages": dict(result.messages),
+                        "error": result.error,
+                    }
+                    for result in results
+                ],
+                json_file,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
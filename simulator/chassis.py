@@ -0,0 +1,903 @@
+import math
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from xoa_driver.internals.core.transporter.protocol._constants import CommandStatus
+from .dut import DutModel
+from .protocol import XmpRequest, encode_status, encode_values, pack_fields
+
+
+NO_LATENCY = -2147483648  # tester reports these when there is no delay data
+NO_JITTER = -1
+FIRMWARE_VERSION = (460, 0)  # driver requires at least 446.5
+PREAMBLE_IFG_BYTES = 20
+UNLIMITED = math.inf
+ETHERTYPE_VLAN = 0x8100
+ETHERTYPE_IPV4 = 0x0800
+ETHERTYPE_IPV6 = 0x86DD
+ETHERTYPE_ARP = 0x0806
+
+ParamKey = Tuple[str, Optional[int], Optional[int], Tuple[int, ...]]
+
+DEFAULT_CAPABILITIES: Dict[str, Any] = {
+    "max_speed": 10000,
+    "max_speed_reduction": 1000,
+    "min_interframe_gap": 16,
+    "max_interframe_gap": 56,
+    "max_streams_per_port": 256,
+    "max_percent": 100,
+    "max_tpld_stats": 1024,
+    "min_packet_length": 56,
+    "max_packet_length": 16360,
+    "max_header_length": 2048,
+    "max_protocol_segments": 32,
+    "max_pattern_length": 18,
+    "max_modifiers": 16,
+    "max_repeat": 256,
+    "max_tpid": 8,
+    "max_captured_packets": 4096,
+    "max_xmit_one_packet_length": 1536,
+    "can_tcp_checksum": 1,
+    "can_udp_checksum": 1,
+    "can_micro_tpld": 1,
+    "can_sync_traffic_start": 1,
+    "can_dyn_traffic_change": 1,
+}
+
+
+@dataclass
+class SimulatorConfig:
+    """ layout and timing of one simulated chassis """
+    modules: Dict[int, Tuple[str, int]] = field(
+        default_factory=lambda: {0: ("Odin-10G-1S-6P[b]", 6)}
+    )  # module index -> (module revision, port count)
+    port_speed_mbps: int = 10000
+    interface: str = "SFP+"
+    capabilities: Dict[str, Any] = field(default_factory=dict)
+    round_trip_second: float = 0.0005  # latency of one batch of commands
+    command_second: float = 0.000005  # service time of every command in a batch
+
+
+@dataclass
+class TrafficRun:
+    """ traffic of one port from start to stop """
+    start: float
+    end: float  # time when the time limit or all the packet limits are reached
+    pps: Dict[int, float]  # stream index -> packets per second
+    limits: Dict[int, float]  # stream index -> packet limit
+    port_limit: float
+    drop_ratio: Dict[Tuple[int, str], float] = field(default_factory=dict)  # (stream index, rx port) -> drop ratio
+
+    def frames(self, stream_index: int, now: float) -> int:
+        elapsed = max(0.0, min(now, self.end) - self.start)
+        frames = min(self.pps[stream_index] * elapsed, self.limits[stream_index])
+        if self.port_limit != UNLIMITED:
+            total_pps = sum(self.pps.values())
+            port_frames = min(total_pps * elapsed, self.port_limit)
+            frames = min(frames, port_frames * self.pps[stream_index] / total_pps)
+        return int(frames)
+
+
+@dataclass
+class SimStream:
+    index: int
+    sent: int = 0  # frames sent in finished runs
+    delivered: Counter = field(default_factory=Counter)  # rx port name -> frames delivered in finished runs
+
+
+@dataclass
+class CapturedPacket:
+    data: bytes
+    timestamp: float
+
+
+class SimPort:
+    """ one simulated L23 port, its streams and its traffic state """
+
+    def __init__(self, chassis: "SimulatedChassis", module_index: int, port_index: int) -> None:
+        self.chassis = chassis
+        self.module_index = module_index
+        self.port_index = port_index
+        self.name = f"{chassis.name}/{module_index}/{port_index}"
+        self.streams: Dict[int, SimStream] = {}
+        self.run: Optional[TrafficRun] = None
+        self.run_stopper: Optional[Any] = None
+        self.xmit_count = 0
+        self.tx_baseline: Dict[Optional[int], int] = {}  # stream index (None is the port total) -> frames at PT_CLEAR
+        self.rx_baseline: Dict[Optional[int], int] = {}  # tpld id (None is the port total) -> frames at PR_CLEAR
+        self.rx_extra: Counter = Counter()
+        self.captured: List[CapturedPacket] = []
+        self.capture_start = 0.0
+        self.is_capturing = False
+        self.mac_address = bytes([0x04, 0xF4, 0xBC, chassis.index, module_index, port_index])
+
+    def param(self, name: str, *indices: int) -> Optional[Any]:
+        return self.chassis.param(name, self.module_index, self.port_index, indices)
+
+    @property
+    def speed_bps(self) -> int:
+        return self.chassis.config.port_speed_mbps * 1_000_000
+
+    @property
+    def is_running(self) -> bool:
+        return self.run is not None
+
+    def frame_size(self, stream_index: int) -> float:
+        length = self.param("PS_PACKETLENGTH", stream_index)
+        if length is None:
+            return 64.0
+        if length.length_type == 0:  # fixed
+            return float(length.min_val)
+        return (length.min_val + length.max_val) / 2
+
+    def header(self, stream_index: int) -> bytes:
+        header = self.param("PS_PACKETHEADER", stream_index)
+        return bytes.fromhex(header.hex_data) if header else b""
+
+    def tpld_id(self, stream_index: int) -> int:
+        tpld = self.param("PS_TPLDID", stream_index)
+        return tpld.test_payload_identifier if tpld else -1
+
+    def stream_pps(self, stream_index: int) -> float:
+        rate_command = self.chassis.rate_commands.get((self.name, stream_index))
+        rate = self.param(rate_command, stream_index) if rate_command else None
+        frame_bits = (self.frame_size(stream_index) + PREAMBLE_IFG_BYTES) * 8
+        if rate is None:
+            return 0.0
+        if rate_command == "PS_RATEPPS":
+            return float(rate.stream_rate_pps)
+        if rate_command == "PS_RATEL2BPS":
+            return rate.l2_bps / (self.frame_size(stream_index) * 8)
+        return rate.stream_rate_ppm / 1_000_000 * self.speed_bps / frame_bits
+
+    def is_stream_enabled(self, stream_index: int) -> bool:
+        enable = self.param("PS_ENABLE", stream_index)
+        return bool(enable) and enable.state == 1
+
+    # region traffic
+
+    def start_traffic(self, now: float) -> None:
+        if self.run is not None:
+            return
+        tx_enable = self.param("P_TXENABLE")
+        if tx_enable is not None and not tx_enable.on_off:
+            return
+        pps: Dict[int, float] = {}
+        limits: Dict[int, float] = {}
+        for index in self.streams:
+            if not self.is_stream_enabled(index):
+                continue
+            pps[index] = self.stream_pps(index)
+            limit = self.param("PS_PACKETLIMIT", index)
+            limits[index] = (
+                limit.packet_count if limit and limit.packet_count > 0 else UNLIMITED
+            )
+        time_limit = self.param("P_TXTIMELIMIT")
+        port_limit = self.param("P_TXPACKETLIMIT")
+        end = (
+            now + time_limit.microseconds / 1e6
+            if time_limit and time_limit.microseconds > 0
+            else UNLIMITED
+        )
+        port_frame_limit = (
+            port_limit.packet_count_limit
+            if port_limit and port_limit.packet_count_limit > 0
+            else UNLIMITED
+        )
+        if port_frame_limit != UNLIMITED and sum(pps.values()):
+            end = min(end, now + port_frame_limit / sum(pps.values()))
+        if limits and all(limit != UNLIMITED for limit in limits.values()):
+            end = min(
+                end,
+                now + max(limits[i] / pps[i] if pps[i] else 0.0 for i in limits),
+            )
+        self.run = TrafficRun(now, end, pps, limits, port_frame_limit)
+        self.chassis.network.on_traffic_change()
+        for index in pps:
+            self.chassis.network.capture_first_packet(self, index, now)
+        if end != UNLIMITED:
+            self.run_stopper = self.chassis.call_at(end, self.finish_traffic)
+        self.chassis.push_port_event(self, "P_TRAFFIC", {"on_off": 1})
+
+    def stop_traffic(self, now: float) -> None:
+        run = self.run
+        if run is None:
+            return
+        for index, stream in self.streams.items():
+            if index not in run.pps:
+                continue
+            frames = run.frames(index, now)
+            stream.sent += frames
+            for rx_port in self.chassis.network.route(self, index):
+                stream.delivered[rx_port.name] += self.delivered(run, index, rx_port, frames)
+        self.run = None
+        if self.run_stopper is not None:
+            self.run_stopper.cancel()
+            self.run_stopper = None
+        self.chassis.network.on_traffic_change()
+        self.chassis.push_port_event(self, "P_TRAFFIC", {"on_off": 0})
+
+    def finish_traffic(self) -> None:
+        self.run_stopper = None
+        self.stop_traffic(self.chassis.now())
+
+    def delivered(self, run: "TrafficRun", stream_index: int, rx_port: "SimPort", frames: int) -> int:
+        key = (stream_index, rx_port.name)
+        if key not in run.drop_ratio:
+            # decided on the first read, when all ports started in the same batch are running
+            utilization = self.chassis.network.utilization_pct(rx_port)
+            run.drop_ratio[key] = self.chassis.network.dut.drop_ratio(
+                utilization, self.frame_size(stream_index)
+            )
+        return int(frames * (1 - run.drop_ratio[key]))
+
+    def elapsed_microseconds(self, now: float) -> int:
+        if self.run is None:
+            return 0
+        return int((min(now, self.run.end) - self.run.start) * 1e6)
+
+    # endregion
+
+    # region counters
+
+    def sent_frames(self, stream_index: int, now: float) -> int:
+        stream = self.streams[stream_index]
+        if self.run is not None and stream_index in self.run.pps:
+            return stream.sent + self.run.frames(stream_index, now)
+        return stream.sent
+
+    def delivered_frames(self, stream_index: int, rx_port: "SimPort", now: float) -> int:
+        stream = self.streams[stream_index]
+        frames = stream.delivered[rx_port.name]
+        if self.run is not None and stream_index in self.run.pps:
+            frames += self.delivered(self.run, stream_index, rx_port, self.run.frames(stream_index, now))
+        return frames
+
+    def running_pps(self, stream_index: int, now: float) -> float:
+        run = self.run
+        if run is None or stream_index not in run.pps or now >= run.end:
+            return 0.0
+        return run.pps[stream_index]
+
+    def tx_counters(self, stream_index: Optional[int], now: float) -> Dict[str, int]:
+        """ PT_STREAM of one stream, or PT_TOTAL when stream_index is None """
+        indices = [stream_index] if stream_index is not None else list(self.streams)
+        frames = octets = bits_last_sec = pps = 0.0
+        for index in indices:
+            if index not in self.streams:
+                continue
+            size = self.frame_size(index)
+            sent = self.sent_frames(index, now)
+            running_pps = self.running_pps(index, now)
+            frames += sent
+            octets += sent * size
+            pps += running_pps
+            bits_last_sec += running_pps * size * 8
+        if stream_index is None:
+            frames += self.xmit_count
+        baseline = self.tx_baseline.get(stream_index, 0)
+        if frames and baseline:
+            octets -= octets * baseline / frames
+        return {
+            "packet_count_since_cleared": int(frames - baseline),
+            "byte_count_since_cleared": int(octets),
+            "packet_count_last_sec": int(pps),
+            "bit_count_last_sec": int(bits_last_sec),
+        }
+
+    def clear_tx(self, now: float) -> None:
+        self.tx_baseline = {index: self.sent_frames(index, now) for index in self.streams}
+        self.tx_baseline[None] = sum(self.tx_baseline.values()) + self.xmit_count
+
+    def clear_rx(self, now: float) -> None:
+        received = self.chassis.network.received(self, now)
+        self.rx_baseline = {tpld: counters[0] for tpld, counters in received.items()}
+        self.rx_baseline[None] = sum(counters[0] for counters in received.values())
+        self.rx_extra.clear()
+
+    def rx_counters(self, tpld_id: Optional[int], now: float) -> Tuple[int, int, float, float, int]:
+        """ frames, bytes, pps and bps since cleared, and lost frames, of one tpld id or the port total """
+        received = self.chassis.network.received(self, now)
+        if tpld_id is None:
+            totals = [sum(values) for values in zip(*received.values())] or [0, 0, 0, 0, 0]
+        else:
+            totals = list(received.get(tpld_id, (0, 0, 0, 0, 0)))
+        frames, octets, pps, bps, lost = totals
+        baseline = self.rx_baseline.get(tpld_id, 0)
+        if frames and baseline:
+            octets -= octets * baseline // frames
+        return int(frames - baseline), int(octets), pps, bps, int(lost)
+
+    # endregion
+
+    def deliver_packet(self, data: bytes, now: float) -> None:
+        if self.is_capturing and len(self.captured) < self.chassis.capabilities["max_captured_packets"]:
+            self.captured.append(CapturedPacket(data, now))
+
+    def reset(self, now: float) -> None:
+        self.stop_traffic(now)
+        self.streams.clear()
+        self.chassis.drop_params(self.module_index, self.port_index, "PS_")
+        self.chassis.drop_params(self.module_index, self.port_index, "P_TX")  # tx limits, delay and enable back to default
+
+
+class SimulatedNetwork:
+    """ all simulated ports of all chassis, connected by the DUT """
+
+    def __init__(self, dut: Optional["DutModel"] = None) -> None:
+        self.dut = dut or DutModel()
+        self.chassis: List["SimulatedChassis"] = []
+        self._route_cache: Dict[Tuple[str, int, bytes], List["SimPort"]] = {}
+        self._received_cache: Dict[str, Tuple[float, Dict[int, Tuple[int, int, float, float, int]]]] = {}
+
+    @property
+    def ports(self) -> List["SimPort"]:
+        return [port for chassis in self.chassis for port in chassis.ports.values()]
+
+    def add_chassis(self, chassis: "SimulatedChassis") -> int:
+        self.chassis.append(chassis)
+        return len(self.chassis) - 1
+
+    def on_traffic_change(self) -> None:
+        self._received_cache.clear()
+
+    def invalidate(self) -> None:
+        self._route_cache.clear()
+        self._received_cache.clear()
+
+    @staticmethod
+    def _destination_ip(header: bytes) -> Tuple[int, bytes]:
+        offset = 12
+        ether_type = int.from_bytes(header[offset : offset + 2], "big")
+        while ether_type == ETHERTYPE_VLAN:
+            offset += 4
+            ether_type = int.from_bytes(header[offset : offset + 2], "big")
+        ip_offset = offset + 2
+        if ether_type == ETHERTYPE_IPV4:
+            return ether_type, header[ip_offset + 16 : ip_offset + 20]
+        if ether_type == ETHERTYPE_IPV6:
+            return ether_type, header[ip_offset + 24 : ip_offset + 40]
+        return ether_type, b""
+
+    def _port_ip(self, port: "SimPort", ether_type: int) -> bytes:
+        if ether_type == ETHERTYPE_IPV4:
+            address = port.param("P_IPADDRESS")
+            return address.ipv4_address.packed if address else b""
+        address = port.param("P_IPV6ADDRESS")
+        return address.ipv6_address.packed if address else b""
+
+    def route(self, tx_port: "SimPort", stream_index: int) -> List["SimPort"]:
+        """ ports receiving a stream: by destination MAC, by destination IP behind the DUT, otherwise flooded """
+        header = tx_port.header(stream_index)
+        key = (tx_port.name, stream_index, header)
+        if key in self._route_cache:
+            return self._route_cache[key]
+        destination_mac = header[:6]
+        others = [port for port in self.ports if port is not tx_port]
+        ports = [port for port in others if port.mac_address == destination_mac]
+        if not ports and destination_mac == self.dut.mac_address:
+            ether_type, destination_ip = self._destination_ip(header)
+            ports = [
+                port
+                for port in others
+                if destination_ip and self._port_ip(port, ether_type) == destination_ip
+            ]
+        if not ports:
+            ports = others
+        self._route_cache[key] = ports
+        return ports
+
+    def utilization_pct(self, rx_port: "SimPort") -> float:
+        bits = 0.0
+        for port in self.ports:
+            if port.run is None:
+                continue
+            for index, pps in port.run.pps.items():
+                if rx_port in self.route(port, index):
+                    bits += pps * (port.frame_size(index) + PREAMBLE_IFG_BYTES) * 8
+        return bits / rx_port.speed_bps * 100
+
+    def received(self, rx_port: "SimPort", now: float) -> Dict[int, Tuple[int, int, float, float, int]]:
+        """ tpld id -> (frames, bytes, pps, bps, lost frames) received on the port since the streams were created """
+        cached = self._received_cache.get(rx_port.name)
+        if cached and cached[0] == now:
+            return cached[1]
+        received: Dict[int, Tuple[int, int, float, float, int]] = {}
+        for port in self.ports:
+            for index in port.streams:
+                if rx_port not in self.route(port, index):
+                    continue
+                tpld_id = port.tpld_id(index)
+                frames = port.delivered_frames(index, rx_port, now)
+                lost = port.sent_frames(index, now) - frames
+                pps = port.running_pps(index, now)
+                if pps and port.run is not None:
+                    pps *= 1 - port.run.drop_ratio.get((index, rx_port.name), 0.0)
+                size = port.frame_size(index)
+                previous = received.get(tpld_id, (0, 0, 0.0, 0.0, 0))
+                received[tpld_id] = (
+                    previous[0] + frames,
+                    previous[1] + int(frames * size),
+                    previous[2] + pps,
+                    previous[3] + pps * size * 8,
+                    previous[4] + lost,
+                )
+        self._received_cache[rx_port.name] = (now, received)
+        return received
+
+    def capture_first_packet(self, tx_port: "SimPort", stream_index: int, now: float) -> None:
+        header = tx_port.header(stream_index)
+        for rx_port in self.route(tx_port, stream_index):
+            rx_port.deliver_packet(header, now + self.dut.latency_ns / 1e9)
+
+    def transmit_packet(self, tx_port: "SimPort", data: bytes, now: float) -> None:
+        """ packet sent by P_XMITONE, the DUT replies to ARP requests """
+        tx_port.xmit_count += 1
+        ether_type = int.from_bytes(data[12:14], "big")
+        if ether_type == ETHERTYPE_ARP and data[20:22] == b"\x00\x01":
+            reply = (
+                data[6:12]
+                + self.dut.mac_address
+                + data[12:20]
+                + b"\x00\x02"
+                + self.dut.mac_address
+                + data[38:42]
+                + data[22:28]
+                + data[28:32]
+            )
+            tx_port.rx_extra["rx_arp_reply_count"] += 1
+            tx_port.deliver_packet(reply, now + self.dut.latency_ns / 1e9)
+            return
+        destination_mac = data[:6]
+        for port in self.ports:
+            if port is not tx_port and (port.mac_address == destination_mac or destination_mac[0] & 1):
+                port.deliver_packet(data, now + self.dut.latency_ns / 1e9)
+
+
+class SimulatedChassis:
+    """
+    Command handling of one simulated chassis.
+    Parameters are kept as the raw value bytes of the last set command, and returned by the get command,
+    traffic, statistics, reservation and capture commands are simulated.
+    """
+
+    def __init__(
+        self,
+        network: "SimulatedNetwork",
+        name: str,
+        config: Optional["SimulatorConfig"] = None,
+    ) -> None:
+        self.network = network
+        self.name = name
+        self.config = config or SimulatorConfig()
+        self.index = network.add_chassis(self)
+        self.capabilities = {
+            **DEFAULT_CAPABILITIES,
+            "max_speed": self.config.port_speed_mbps,
+            **self.config.capabilities,
+        }
+        self.ports: Dict[Tuple[int, int], "SimPort"] = {
+            (module_index, port_index): SimPort(self, module_index, port_index)
+            for module_index, (_, port_count) in self.config.modules.items()
+            for port_index in range(port_count)
+        }
+        self.params: Dict[ParamKey, bytes] = {}
+        self.rate_commands: Dict[Tuple[str, int], str] = {}  # (port name, stream index) -> last rate command
+        self.owner = ""
+        self.reservations: Dict[Tuple[Optional[int], Optional[int]], int] = {}
+        self.command_count: Counter = Counter()
+        self.batch_count = 0
+        self.cpu_second = 0.0
+        self.push: Callable[[bytes], None] = lambda data: None
+        self.call_at: Callable[[float, Callable[[], None]], Any] = self._call_at
+
+    @staticmethod
+    def now() -> float:
+        return time.monotonic()
+
+    def _call_at(self, when: float, callback: Callable[[], None]) -> Any:
+        """ replaced by the transport with the event loop scheduler """
+        return None
+
+    # region parameters
+
+    def param(
+        self,
+        name: str,
+        module_index: Optional[int],
+        port_index: Optional[int],
+        indices: Tuple[int, ...] = (),
+    ) -> Optional[Any]:
+        from xoa_driver.internals import commands
+
+        data = self.params.get((name, module_index, port_index, tuple(indices)))
+        if data is None:
+            return None
+        return getattr(commands, name).GetDataAttr(data)
+
+    def drop_params(self, module_index: int, port_index: int, prefix: str) -> None:
+        for key in [
+            key
+            for key in self.params
+            if key[1] == module_index and key[2] == port_index and key[0].startswith(prefix)
+        ]:
+            del self.params[key]
+        self.network.invalidate()
+
+    def push_port_event(self, port: "SimPort", name: str, values: Dict[str, Any]) -> None:
+        from xoa_driver.internals import commands
+
+        command = getattr(commands, name)
+        event = XmpRequest(0, 0, command.code, port.module_index, port.port_index, (), b"")
+        self.push(encode_values(event, pack_fields(command.GetDataAttr, values), request_id=0))
+
+    # endregion
+
+    def handle(self, requests: List["XmpRequest"]) -> bytes:
+        """ process one batch of requests in order and return all the replies """
+        cpu_start = time.process_time()
+        self.batch_count += 1
+        now = self.now()
+        replies = []
+        for request in requests:
+            self.command_count[request.name] += 1
+            try:
+                replies.append(self._handle_one(request, now))
+            except _StatusError as error:
+                replies.append(encode_status(request, error.status))
+        self.cpu_second += time.process_time() - cpu_start
+        return b"".join(replies)
+
+    def _port(self, request: "XmpRequest") -> "SimPort":
+        port = self.ports.get((request.module_index, request.port_index))
+        if port is None:
+            raise _StatusError(CommandStatus.BADPORT)
+        return port
+
+    def _stream(self, request: "XmpRequest") -> "SimStream":
+        port = self._port(request)
+        if request.indices[0] not in port.streams:
+            raise _StatusError(CommandStatus.BADINDEX)
+        return port.streams[request.indices[0]]
+
+    def _handle_one(self, request: "XmpRequest", now: float) -> bytes:
+        name = request.name
+        key = (name, request.module_index, request.port_index, request.indices)
+        if request.is_query:
+            get_data = getattr(request.command, "GetDataAttr", None)
+            if get_data is None:
+                raise _StatusError(CommandStatus.NOTREADABLE)
+            query = getattr(self, f"_get_{name.lower()}", None)
+            if query is not None:
+                return encode_values(request, pack_fields(get_data, query(request, now)))
+            if name.startswith("PS_"):
+                self._stream(request)
+            if key in self.params:
+                return encode_values(request, self.params[key])
+            return encode_values(request, pack_fields(get_data, {}))
+        command = getattr(self, f"_set_{name.lower()}", None)
+        if command is not None:
+            command(request, now)
+        if name.startswith("PS_") and name not in ("PS_CREATE", "PS_DELETE", "PS_INDICES"):
+            self._stream(request)
+            if name in ("PS_RATEFRACTION", "PS_RATEPPS", "PS_RATEL2BPS"):
+                self.rate_commands[(self._port(request).name, request.indices[0])] = name
+            if name in ("PS_PACKETHEADER", "PS_TPLDID"):
+                self.network.invalidate()
+        if name in ("P_MACADDRESS", "P_IPADDRESS", "P_IPV6ADDRESS"):
+            self.network.invalidate()
+        if getattr(request.command, "GetDataAttr", None) is not None and request.values:
+            self.params[key] = request.values
+        return encode_status(request, CommandStatus.OK)
+
+    # region chassis
+
+    def _set_c_owner(self, request: "XmpRequest", now: float) -> None:
+        self.owner = request.values.partition(b"\0")[0].decode()
+
+    def _get_c_owner(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        return {"username": self.owner}
+
+    def _get_c_portcounts(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        slots = max(self.config.modules) + 1 if self.config.modules else 0
+        return {
+            "port_counts": [
+                self.config.modules[i][1] if i in self.config.modules else 0
+                for i in range(slots)
+            ]
+        }
+
+    def _get_c_model(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        return {"model": "Simulated L23 Tester"}
+
+    def _get_c_versionno(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        return {"chassis_major_version": FIRMWARE_VERSION[0], "pci_driver_version": 0}
+
+    def _get_c_versionno_minor(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        return {"chassis_minor_version": FIRMWARE_VERSION[1]}
+
+    def _get_c_buildstring(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        return {"build_string": f"sim-{FIRMWARE_VERSION[0]}.{FIRMWARE_VERSION[1]}"}
+
+    def _get_c_name(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        return {"chassis_name": self.name}
+
+    def _get_c_time(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        return {"local_time": int(time.time())}
+
+    def _get_c_reservation(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        return {"operation": self.reservations.get((None, None), 0)}
+
+    def _set_c_reservation(self, request: "XmpRequest", now: float) -> None:
+        self.reservations[(None, None)] = _reserved_status(request.values[0])
+
+    def _set_c_traffic(self, request: "XmpRequest", now: float) -> None:
+        self._traffic_of_module_ports(request.values[0], request.values[1:], now)
+
+    def _set_c_trafficsync(self, request: "XmpRequest", now: float) -> None:
+        on_off = request.values[0]
+        timestamp = int.from_bytes(request.values[1:9], "big", signed=True)
+        module_ports = request.values[9:]
+        delay = max(0.0, timestamp - time.time())
+        if delay:
+            self.call_at(
+                now + delay,
+                lambda: self._traffic_of_module_ports(on_off, module_ports, self.now()),
+            )
+        else:
+            self._traffic_of_module_ports(on_off, module_ports, now)
+
+    def _traffic_of_module_ports(self, on_off: int, module_ports: bytes, now: float) -> None:
+        numbers = [
+            int.from_bytes(module_ports[i : i + 4], "big")
+            for i in range(0, len(module_ports) - len(module_ports) % 4, 4)
+        ]
+        for module_index, port_index in zip(numbers[::2], numbers[1::2]):
+            port = self.ports.get((module_index, port_index))
+            if port is None:
+                continue
+            if on_off:
+                port.start_traffic(now)
+            else:
+                port.stop_traffic(now)
+
+    # endregion
+
+    # region module
+
+    def _get_m_revision(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        if request.module_index not in self.config.modules:
+            raise _StatusError(CommandStatus.BADMODULE)
+        return {"revision": self.config.modules[request.module_index][0]}
+
+    def _get_m_model(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        return {"model": self._get_m_revision(request, now)["revision"]}
+
+    # endregion
+
+    # region port
+
+    def _get_p_capabilities(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        self._port(request)
+        return self.capabilities
+
+    def _get_p_interface(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        return {"interface": self.config.interface}
+
+    def _get_p_speed(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        return {"port_speed": self.config.port_speed_mbps}
+
+    def _get_p_receivesync(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        return {"sync_status": 1}
+
+    def _get_p_macaddress(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        return {"mac_address": self._port(request).mac_address}
+
+    def _set_p_macaddress(self, request: "XmpRequest", now: float) -> None:
+        self._port(request).mac_address = request.values[:6]
+
+    def _get_p_reservation(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        return {"status": self.reservations.get((request.module_index, request.port_index), 0)}
+
+    def _get_p_reservedby(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        is_reserved = self.reservations.get((request.module_index, request.port_index), 0)
+        return {"username": self.owner if is_reserved else ""}
+
+    def _set_p_reservation(self, request: "XmpRequest", now: float) -> None:
+        port = self._port(request)
+        status = _reserved_status(request.values[0])
+        self.reservations[(request.module_index, request.port_index)] = status
+        self.push_port_event(port, "P_RESERVATION", {"status": status})
+
+    def _set_p_reset(self, request: "XmpRequest", now: float) -> None:
+        self._port(request).reset(now)
+
+    def _get_p_traffic(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        port = self._port(request)
+        if port.run is not None and now >= port.run.end:
+            port.stop_traffic(now)
+        return {"on_off": int(port.is_running)}
+
+    def _set_p_traffic(self, request: "XmpRequest", now: float) -> None:
+        port = self._port(request)
+        if request.values[0]:
+            port.start_traffic(now)
+        else:
+            port.stop_traffic(now)
+
+    def _get_p_txtime(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        return {"microseconds": self._port(request).elapsed_microseconds(now)}
+
+    def _set_p_xmitone(self, request: "XmpRequest", now: float) -> None:
+        self.network.transmit_packet(self._port(request), request.values, now)
+
+    # endregion
+
+    # region streams
+
+    def _set_ps_create(self, request: "XmpRequest", now: float) -> None:
+        port = self._port(request)
+        index = request.indices[0]
+        if index in port.streams:
+            raise _StatusError(CommandStatus.NOTVALID)
+        port.streams[index] = SimStream(index)
+
+    def _set_ps_delete(self, request: "XmpRequest", now: float) -> None:
+        port = self._port(request)
+        index = request.indices[0]
+        if port.streams.pop(index, None) is None:
+            raise _StatusError(CommandStatus.BADINDEX)
+        for key in [
+            key
+            for key in self.params
+            if key[1:3] == (port.module_index, port.port_index)
+            and key[0].startswith("PS_")
+            and key[3][:1] == (index,)
+        ]:
+            del self.params[key]
+        self.network.invalidate()
+
+    def _get_ps_indices(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        return {"stream_indices": sorted(self._port(request).streams)}
+
+    def _set_ps_indices(self, request: "XmpRequest", now: float) -> None:
+        port = self._port(request)
+        count = len(request.values) // 4
+        wanted = {
+            int.from_bytes(request.values[i * 4 : i * 4 + 4], "big") for i in range(count)
+        }
+        for index in list(port.streams):
+            if index not in wanted:
+                del port.streams[index]
+        for index in wanted:
+            port.streams.setdefault(index, SimStream(index))
+        self.network.invalidate()
+
+    def _get_ps_arprequest(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        self._stream(request)
+        return {"mac_address": self.network.dut.mac_address}
+
+    # endregion
+
+    # region statistics
+
+    def _get_pt_stream(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        self._stream(request)
+        return self._port(request).tx_counters(request.indices[0], now)
+
+    def _get_pt_total(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        return self._port(request).tx_counters(None, now)
+
+    def _set_pt_clear(self, request: "XmpRequest", now: float) -> None:
+        self._port(request).clear_tx(now)
+
+    def _set_pr_clear(self, request: "XmpRequest", now: float) -> None:
+        self._port(request).clear_rx(now)
+
+    def _rx_traffic(self, tpld_id: Optional[int], request: "XmpRequest", now: float) -> Dict[str, Any]:
+        frames, octets, pps, bps, _ = self._port(request).rx_counters(tpld_id, now)
+        return {
+            "packet_count_since_cleared": frames,
+            "byte_count_since_cleared": octets,
+            "packet_count_last_sec": int(pps),
+            "bit_count_last_sec": int(bps),
+        }
+
+    def _get_pr_total(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        return self._rx_traffic(None, request, now)
+
+    def _get_pr_tpldtraffic(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        return self._rx_traffic(request.indices[0], request, now)
+
+    def _get_pr_tplderrors(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        *_, lost = self._port(request).rx_counters(request.indices[0], now)
+        return {"non_incre_seq_event_count": max(0, lost)}
+
+    def _get_pr_tpldlatency(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        frames, *_ = self._port(request).rx_counters(request.indices[0], now)
+        dut = self.network.dut
+        if not frames:
+            return {name: NO_LATENCY for name in ("min_val", "avg_val", "max_val", "avg_last_sec", "min_last_sec", "max_last_sec")}
+        low, high = dut.latency_ns - dut.jitter_ns // 2, dut.latency_ns + dut.jitter_ns // 2
+        return {
+            "min_val": low,
+            "avg_val": dut.latency_ns,
+            "max_val": high,
+            "avg_last_sec": dut.latency_ns,
+            "min_last_sec": low,
+            "max_last_sec": high,
+        }
+
+    def _get_pr_tpldjitter(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        frames, *_ = self._port(request).rx_counters(request.indices[0], now)
+        jitter = self.network.dut.jitter_ns
+        if not frames:
+            return {name: NO_JITTER for name in ("min_val", "avg_val", "max_val", "avg_last_sec", "min_last_sec", "max_last_sec")}
+        return {
+            "min_val": 0,
+            "avg_val": jitter // 2,
+            "max_val": jitter,
+            "avg_last_sec": jitter // 2,
+            "min_last_sec": 0,
+            "max_last_sec": jitter,
+        }
+
+    def _get_pr_tplds(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        received = self.network.received(self._port(request), now)
+        return {"test_payload_identifiers": sorted(t for t in received if t >= 0)}
+
+    def _get_pr_extra(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        return dict(self._port(request).rx_extra)
+
+    # endregion
+
+    # region capture
+
+    def _get_p_capture(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        return {"on_off": int(self._port(request).is_capturing)}
+
+    def _set_p_capture(self, request: "XmpRequest", now: float) -> None:
+        port = self._port(request)
+        port.is_capturing = bool(request.values[0])
+        if port.is_capturing:
+            port.captured.clear()
+            port.capture_start = now
+
+    def _get_pc_stats(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        port = self._port(request)
+        return {
+            "status": int(port.is_capturing),
+            "packets": len(port.captured),
+            "start_time": int(port.capture_start * 1e9),
+        }
+
+    def _captured(self, request: "XmpRequest") -> "CapturedPacket":
+        captured = self._port(request).captured
+        if request.indices[0] >= len(captured):
+            raise _StatusError(CommandStatus.BADINDEX)
+        return captured[request.indices[0]]
+
+    def _get_pc_packet(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        return {"hex_data": self._captured(request).data}
+
+    def _get_pc_extra(self, request: "XmpRequest", now: float) -> Dict[str, Any]:
+        packet = self._captured(request)
+        return {
+            "time_captured": int(packet.timestamp * 1e9),
+            "latency": self.network.dut.latency_ns,
+            "length": len(packet.data),
+        }
+
+    # endregion
+
+
+class _StatusError(Exception):
+    def __init__(self, status: "CommandStatus") -> None:
+        self.status = status
+        super().__init__(status.name)
+
+
+def _reserved_status(action: int) -> int:
+    """ ReservedAction RESERVE gives ReservedStatus RESERVED_BY_YOU, RELEASE and RELINQUISH give RELEASED """
+    return 1 if action == 1 else 0
@@ -0,0 +1,21 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class DutModel:
+    """
+    Device under test between the simulated ports.
+    Override drop_ratio for other loss models, e.g. a loss that depends on the frame size.
+    """
+    capacity_pct: float = 100.0  # forwarding capacity of each egress port, in percent of its line rate
+    loss_ratio: float = 0.0  # load independent loss
+    latency_ns: int = 1000
+    jitter_ns: int = 0
+    mac_address: bytes = bytes.fromhex("0001020304FF")  # replied to ARP/NDP requests
+
+    def drop_ratio(self, utilization_pct: float, frame_size: float) -> float:
+        """ ratio of the frames dropped on an egress port loaded with utilization_pct of its line rate """
+        overload = 0.0
+        if utilization_pct > self.capacity_pct > 0:
+            overload = 1 - self.capacity_pct / utilization_pct
+        return min(1.0, 1 - (1 - overload) * (1 - self.loss_ratio))
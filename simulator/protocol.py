@@ -0,0 +1,169 @@
+import struct
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
+from xoa_driver.internals.core.transporter import registry
+from xoa_driver.internals.core.transporter.protocol._constants import (
+    MAGIC_WORD,
+    CommandStatus,
+    CommandType,
+)
+from xoa_driver.internals.core.transporter.protocol.payload.field import (
+    HexSpec,
+    SequenceSpec,
+    StrSpec,
+)
+from xoa_driver.internals.core.transporter.protocol.payload.base_struct import ResponseBodyStruct
+
+
+# magic word, number of indices, number of value bytes, command parameter, module, port, request id
+HEADER = struct.Struct("!4sHHHBBI")
+NOTHING = 0xFF
+
+
+def _pad(size: int) -> int:
+    return (4 - size % 4) % 4
+
+
+@dataclass
+class XmpRequest:
+    """ one decoded BXMP request sent by the driver """
+    request_id: int
+    cmd_type: int
+    cmd_code: int
+    module_index: Optional[int]
+    port_index: Optional[int]
+    indices: Tuple[int, ...]
+    values: bytes
+
+    @property
+    def command(self) -> Type[Any]:
+        return registry.get_command(self.cmd_code)
+
+    @property
+    def name(self) -> str:
+        return self.command.__name__
+
+    @property
+    def is_query(self) -> bool:
+        return self.cmd_type == CommandType.COMMAND_QUERY
+
+    def parse_values(self) -> Optional[ResponseBodyStruct]:
+        """ most set commands have the same layout as their get reply """
+        get_data = getattr(self.command, "GetDataAttr", None)
+        if get_data is None or not self.values:
+            return None
+        return get_data(self.values)
+
+
+def iter_requests(buffer: bytearray) -> Iterator[XmpRequest]:
+    """ consume all complete requests from the buffer """
+    while len(buffer) >= HEADER.size:
+        (
+            _magic,
+            number_of_indices,
+            number_of_value_bytes,
+            command_parameter,
+            module_index,
+            port_index,
+            request_id,
+        ) = HEADER.unpack_from(buffer)
+        body_size = number_of_indices * 4 + number_of_value_bytes
+        body_size += _pad(body_size)
+        if len(buffer) < HEADER.size + body_size:
+            return
+        body = bytes(buffer[HEADER.size : HEADER.size + body_size])
+        del buffer[: HEADER.size + body_size]
+        index_size = number_of_indices * 4
+        yield XmpRequest(
+            request_id=request_id,
+            cmd_type=(command_parameter & 0x0F00) >> 8,
+            cmd_code=(command_parameter & 0x00FF) | ((command_parameter & 0xF000) >> 4),
+            module_index=None if module_index == NOTHING else module_index,
+            port_index=None if port_index == NOTHING else port_index,
+            indices=struct.unpack(f"!{number_of_indices}I", body[:index_size]),
+            values=body[index_size : index_size + number_of_value_bytes],
+        )
+
+
+def _header(
+    cmd_type: int,
+    code: int,
+    module_index: Optional[int],
+    port_index: Optional[int],
+    request_id: int,
+    indices: Tuple[int, ...],
+    value_size: int,
+) -> bytes:
+    command_parameter = (cmd_type << 8) | (code & 0x00FF) | ((code & 0x0F00) << 4)
+    return HEADER.pack(
+        MAGIC_WORD,
+        len(indices),
+        value_size,
+        command_parameter,
+        NOTHING if module_index is None else module_index,
+        NOTHING if port_index is None else port_index,
+        request_id,
+    )
+
+
+def encode_values(
+    request: XmpRequest, values: bytes, request_id: Optional[int] = None
+) -> bytes:
+    """ reply of a query, or a pushed event when request_id is 0 """
+    indices = request.indices
+    body = struct.pack(f"!{len(indices)}I", *indices) + values
+    return (
+        _header(
+            CommandType.COMMAND_VALUE,
+            request.cmd_code,
+            request.module_index,
+            request.port_index,
+            request.request_id if request_id is None else request_id,
+            indices,
+            len(values),
+        )
+        + body
+        + bytes(_pad(len(body)))
+    )
+
+
+def encode_status(request: XmpRequest, status: "CommandStatus") -> bytes:
+    return _header(
+        CommandType.COMMAND_STATUS,
+        status.value,
+        request.module_index,
+        request.port_index,
+        request.request_id,
+        (),
+        0,
+    )
+
+
+def pack_fields(data_struct: Type[ResponseBodyStruct], values: Dict[str, Any]) -> bytes:
+    """
+    Pack reply values in the field order of the GetDataAttr structure.
+    Missing fixed fields are zero, missing strings and sequences are empty.
+    """
+    chunks: List[bytes] = []
+    for cell in data_struct._order:
+        spec = cell.spec
+        value = values.get(cell.name)
+        if isinstance(spec, StrSpec):
+            data = (value or "").encode() if isinstance(value, str) else (value or b"")
+            chunks.append(data + bytes(4 - len(data) % 4))
+        elif isinstance(spec, SequenceSpec):
+            if value is None and spec.xmp_type.length:
+                chunks.append(bytes(spec.calc_bsize()))
+            else:
+                chunks.append(spec.pack("", list(value or [])))
+        elif isinstance(spec, HexSpec):
+            size = spec.calc_bsize()
+            data = bytes(value or b"")
+            chunks.append(data if size is None else data[:size].ljust(size, b"\0"))
+        else:
+            fmt = spec.format()
+            if value is None:
+                chunks.append(bytes(struct.calcsize(fmt)))
+            else:
+                chunks.append(struct.pack(fmt, value))
+    return b"".join(chunks)
@@ -0,0 +1,150 @@
+"""
+Micro-benchmark of encoding protocol segment profiles into packet headers:
+ProtocolSegmentProfileConfig.prepare() of plugin2544 and plugin2889 against the former
+binary string implementation, on the stock profiles. The headers of both are checked to be identical.
+
+    python -m simulator.segment_benchmark --repeat 10000
+"""
+import argparse
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from plugin2544.model import m_protocol_segment as model2544
+from plugin2889.model import protocol_segment as model2889
+
+
+FieldSpec = Tuple[str, int, str]  # name, bit length, value as a binary string ("" is all zero)
+
+
+def _bits(value: int, bit_length: int) -> str:
+    return bin(value)[2:].zfill(bit_length)
+
+
+ETHERNET: List[FieldSpec] = [("Dst MAC addr", 48, ""), ("Src MAC addr", 48, "01" * 24), ("EtherType", 16, _bits(0x0800, 16))]
+VLAN: List[FieldSpec] = [("PCP", 3, ""), ("DEI", 1, ""), ("VLAN Tag", 12, _bits(100, 12)), ("EtherType", 16, _bits(0x0800, 16))]
+IPV4: List[FieldSpec] = [
+    ("Version", 4, _bits(4, 4)), ("Header Length", 4, _bits(5, 4)), ("DSCP", 6, ""), ("ECN", 2, ""),
+    ("Total Length", 16, _bits(46, 16)), ("Identification", 16, ""), ("Flags", 3, ""), ("Fragment Offset", 13, ""),
+    ("TTL", 8, _bits(127, 8)), ("Protocol", 8, _bits(17, 8)), ("Header Checksum", 16, ""),
+    ("Src IP Addr", 32, _bits(0xC0A80001, 32)), ("Dest IP Addr", 32, _bits(0xC0A80101, 32)),
+]
+IPV6: List[FieldSpec] = [
+    ("Version", 4, _bits(6, 4)), ("Traffic Class", 8, ""), ("Flow Label", 20, ""), ("Payload Length", 16, ""),
+    ("Next Header", 8, _bits(17, 8)), ("Hop Limit", 8, _bits(255, 8)),
+    ("Src IPv6 Addr", 128, _bits(0x20010DB8 << 96 | 1, 128)), ("Dest IPv6 Addr", 128, _bits(0x20010DB8 << 96 | 2, 128)),
+]
+UDP: List[FieldSpec] = [("Src Port", 16, _bits(49152, 16)), ("Dest Port", 16, _bits(4791, 16)), ("Length", 16, ""), ("Checksum", 16, "")]
+TCP: List[FieldSpec] = [
+    ("Src Port", 16, _bits(49152, 16)), ("Dest Port", 16, _bits(80, 16)), ("Sequence Number", 32, ""),
+    ("Acknowledgement Number", 32, ""), ("Header Length", 4, _bits(5, 4)), ("Reserved", 6, ""), ("Flags", 6, _bits(2, 6)),
+    ("Window", 16, _bits(1024, 16)), ("Checksum", 16, ""), ("Urgent Pointer", 16, ""),
+]
+SegmentSpec = Tuple[str, List[FieldSpec], Optional[int]]  # segment type, fields, checksum offset
+STOCK_PROFILES: Dict[str, List[SegmentSpec]] = {
+    "ethernet": [("ethernet", ETHERNET, None)],
+    "ethernet_ipv4_udp": [("ethernet", ETHERNET, None), ("ipv4", IPV4, 10), ("udp", UDP, None)],
+    "ethernet_vlan_ipv4_tcp": [("ethernet", ETHERNET, None), ("vlan", VLAN, None), ("ipv4", IPV4, 10), ("tcp", TCP, None)],
+    "ethernet_ipv6_udp": [("ethernet", ETHERNET, None), ("ipv6", IPV6, None), ("udp", UDP, None)],
+}
+VALUE_RANGE = {"start_value": 49152, "step_value": 1, "stop_value": 65535, "action": "increment", "restart_for_each_port": False}
+
+
+def _fields(fields: List[FieldSpec]) -> List[Dict[str, Any]]:
+    return [
+        {"name": name, "bit_length": bit_length, "value": value or "0" * bit_length}
+        for name, bit_length, value in fields
+    ]
+
+
+def profile_2544(segments: List[SegmentSpec], value_range: bool) -> "model2544.ProtocolSegmentProfileConfig":
+    data = []
+    for segment_type, fields, checksum_offset in segments:
+        field_data = [{**field, "hw_modifier": None, "value_range": None} for field in _fields(fields)]
+        if value_range and segment_type in ("udp", "tcp"):
+            field_data[0]["value_range"] = VALUE_RANGE
+        data.append({"type": segment_type, "fields": field_data, "checksum_offset": checksum_offset})
+    return model2544.ProtocolSegmentProfileConfig.parse_obj({"segments": data})
+
+
+def profile_2889(segments: List[SegmentSpec]) -> "model2889.ProtocolSegmentProfileConfig":
+    return model2889.ProtocolSegmentProfileConfig.parse_obj(
+        {
+            "header_segments": [
+                {"segment_type": segment_type, "fields": _fields(fields), "checksum_offset": checksum_offset}
+                for segment_type, fields, checksum_offset in segments
+            ]
+        }
+    )
+
+
+def reference_wrap_add_16(data: bytearray, offset_num: int) -> bytearray:
+    checksum = 0
+    data[offset_num + 0] = 0
+    data[offset_num + 1] = 0
+    for i in range(0, len(data), 2):
+        w = (data[i + 0] << 8) + data[i + 1]
+        checksum += w
+        if checksum > 0xFFFF:
+            checksum = (1 + checksum) & 0xFFFF  # add carry back in as lsb
+    data[offset_num + 0] = 0xFF + 1 + (~(checksum >> 8))
+    data[offset_num + 1] = 0xFF + 1 + (~(checksum & 0xFF))
+    return data
+
+
+def reference_prepare(profile: Any, segments_attribute: str) -> bytearray:
+    """ the binary string implementation prepare() replaced """
+    result = bytearray()
+    for segment in getattr(profile, segments_attribute):
+        bits = "".join(f.prepare() for f in segment.fields)
+        data = bytearray(int(bits, 2).to_bytes((len(bits) + 7) // 8, byteorder="big"))
+        if segment.checksum_offset:
+            data = reference_wrap_add_16(data, segment.checksum_offset)
+        result.extend(data)
+    return result
+
+
+def time_per_call(func: Callable[[], Any], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the encoding of protocol segment profiles")
+    parser.add_argument("--repeat", type=int, default=10000, help="headers encoded per profile and implementation")
+    args = parser.parse_args()
+
+    print(f"{'profile':<34}{'bytes':>6}{'reference us':>14}{'prepare us':>12}{'speedup':>9}")
+    for name, segments in STOCK_PROFILES.items():
+        candidates = [
+            (f"2544 {name}", profile_2544(segments, False), "segments"),
+            (f"2544 {name} +range", profile_2544(segments, True), "segments"),
+            (f"2889 {name}", profile_2889(segments), "header_segments"),
+        ]
+        for label, profile, segments_attribute in candidates:
+            if label.endswith("+range") and len(segments) == 1:
+                continue
+            value_ranges = [
+                field.value_range
+                for segment in getattr(profile, segments_attribute)
+                for field in segment.fields
+                if getattr(field, "value_range", None)
+            ]
+            for count in (0, 1, 16383, 16384):  # same headers, value ranges included
+                for value_range in value_ranges:
+                    value_range.set_current_count(count)
+                reference = reference_prepare(profile, segments_attribute)
+                for value_range in value_ranges:
+                    value_range.set_current_count(count)
+                if profile.prepare() != reference:
+                    raise AssertionError(f"{label}: prepare() differs from the reference")
+            reference_us = time_per_call(lambda: reference_prepare(profile, segments_attribute), args.repeat) * 1e6
+            prepare_us = time_per_call(profile.prepare, args.repeat) * 1e6
+            print(
+                f"{label:<34}{len(reference):>6}{reference_us:>14.2f}{prepare_us:>12.2f}"
+                f"{reference_us / prepare_us:>8.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Micro-benchmark of the per sample latency and jitter math of plugin2889: LatencyAccumulator, which keeps
+the integer nanoseconds read from the tester, against the former PortLatency setters doing it in Decimal.
+The PortLatency/PortJitter of both are checked to be identical, values and exponents included.
+
+    python -m simulator.statistics_benchmark --repeat 2000
+"""
+import argparse
+import random
+import sys
+import time
+from typing import Callable, List, Tuple, Type
+from plugin2889.dataset import PortJitter, PortLatency
+from plugin2889.resource._port_statistics import LatencyAccumulator
+
+
+Reading = Tuple[int, int, int, int]  # tpld id, min, max and average in nanoseconds
+EDGE_VALUES = (0, 1, -1, 999, 1000, 1001, -2147483648, 2**63 - 1, -(2**63))
+
+
+def make_readings(tpld_count: int, rng: random.Random) -> List[Reading]:
+    readings = []
+    for tpld_id in range(tpld_count):
+        values = [rng.choice(EDGE_VALUES) if rng.random() < 0.2 else rng.randrange(0, 10**7) for _ in range(3)]
+        readings.append((tpld_id, *values))
+    return readings
+
+
+def reference_sample(latency_type: Type[PortLatency], readings: List[Reading]) -> PortLatency:
+    """ the Decimal implementation LatencyAccumulator replaced """
+    result = latency_type()
+    for tpld_id, min_val, max_val, avg_val in readings:
+        result.minimum = min_val
+        result.maximum = max_val
+        result.set_average(tpld_id, avg_val)
+    return result
+
+
+def accumulator_sample(latency_type: Type[PortLatency], readings: List[Reading]) -> PortLatency:
+    accumulator = LatencyAccumulator(check_value=latency_type.check_value_)
+    for tpld_id, min_val, max_val, avg_val in readings:
+        accumulator.add(tpld_id, min_val, max_val, avg_val)
+    return accumulator.to_port_latency(latency_type)
+
+
+def as_exact(result: PortLatency) -> Tuple[str, str, List[Tuple[int, str]]]:
+    return repr(result.minimum_), repr(result.maximum_), [(tpld_id, repr(value)) for tpld_id, value in result.average_.items()]
+
+
+def time_per_call(func: Callable[[], object], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the latency and jitter math of a statistics sample")
+    parser.add_argument("--repeat", type=int, default=2000, help="samples computed per tpld count and implementation")
+    parser.add_argument("--seed", type=int, default=2889)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    for _ in range(2000):  # random samples, edge values included
+        readings = make_readings(rng.randrange(0, 16), rng)
+        for latency_type in (PortLatency, PortJitter):
+            if as_exact(accumulator_sample(latency_type, readings)) != as_exact(reference_sample(latency_type, readings)):
+                sys.exit(f"{latency_type.__name__} differs from the reference for {readings}")
+
+    print(f"{'tpld ids':>8}{'reference us':>14}{'accumulator us':>16}{'speedup':>9}")
+    for tpld_count in (1, 8, 64, 256, 1024):
+        readings = make_readings(tpld_count, rng)
+
+        def reference() -> None:
+            reference_sample(PortLatency, readings)
+            reference_sample(PortJitter, readings)
+
+        def accumulator() -> None:
+            accumulator_sample(PortLatency, readings)
+            accumulator_sample(PortJitter, readings)
+
+        reference_us = time_per_call(reference, max(args.repeat // tpld_count, 10)) * 1e6
+        accumulator_us = time_per_call(accumulator, max(args.repeat // tpld_count, 10)) * 1e6
+        print(f"{tpld_count:>8}{reference_us:>14.1f}{accumulator_us:>16.1f}{reference_us / accumulator_us:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import asyncio
+from typing import Any, Optional
+from xoa_driver import testers
+from xoa_driver.internals.commands import C_PORTCOUNTS
+from .chassis import SimulatedChassis, SimulatedNetwork, SimulatorConfig
+from .protocol import iter_requests
+
+
+class SimulatedTransport(asyncio.Transport):
+    """
+    In-process transport of one driver connection.
+    Every write is one batch of commands, its replies are delivered after the round trip latency
+    plus the service time of the commands, in the order they were sent.
+    """
+
+    def __init__(self, chassis: "SimulatedChassis", protocol: asyncio.Protocol) -> None:
+        super().__init__()
+        self._chassis = chassis
+        self._protocol = protocol
+        self._loop = asyncio.get_event_loop()
+        self._buffer = bytearray()
+        self._last_delivery = 0.0
+        self._closing = False
+        chassis.push = self._push
+        chassis.now = self._loop.time  # type: ignore[assignment]
+        chassis.call_at = self._loop.call_at  # type: ignore[assignment]
+
+    def write(self, data: Any) -> None:
+        if self._closing:
+            return
+        self._buffer.extend(data)
+        requests = list(iter_requests(self._buffer))
+        if not requests:
+            return
+        replies = self._chassis.handle(requests)
+        config = self._chassis.config
+        self._last_delivery = (
+            max(self._loop.time() + config.round_trip_second, self._last_delivery)
+            + len(requests) * config.command_second
+        )
+        self._loop.call_at(self._last_delivery, self._deliver, replies)
+
+    def _push(self, data: bytes) -> None:
+        self._loop.call_soon(self._deliver, data)
+
+    def _deliver(self, data: bytes) -> None:
+        if not self._closing:
+            self._protocol.data_received(data)
+
+    def is_closing(self) -> bool:
+        return self._closing
+
+    def close(self) -> None:
+        if self._closing:
+            return
+        self._closing = True
+        self._loop.call_soon(self._protocol.connection_lost, None)
+
+    def get_extra_info(self, name: str, default: Optional[Any] = None) -> Any:
+        if name == "peername":
+            return (self._chassis.name, 0)
+        return default
+
+
+class SimulatedL23Tester(testers.L23Tester):
+    """ L23 tester connected to a simulated chassis instead of a TCP connection """
+
+    def __init__(
+        self,
+        network: "SimulatedNetwork",
+        name: str,
+        config: Optional["SimulatorConfig"] = None,
+        username: str = "xoa",
+    ) -> None:
+        super().__init__(host=name, username=username)
+        self.chassis = SimulatedChassis(network, name, config)
+
+    async def _setup(self):
+        self._conn.connection_made(SimulatedTransport(self.chassis, self._conn))
+        await self.session.logon()
+        await self._local_states.initiate(self)
+        self._local_states.register_subscriptions(self)
+        port_counts = (await C_PORTCOUNTS(self._conn).get()).port_counts
+        await self.modules.fill_l23(port_counts)
+        return self
+
@@ -0,0 +1,21 @@
+import statistics
+import unittest
+
+from plugin2544.plugin.accumulator import RunningStatistic
+
+
+class RunningStatisticTest(unittest.TestCase):
+    def test_matches_the_statistics_of_all_values(self) -> None:
+        values = [12.5, 10.0, 11.25, 13.0, 9.5]
+        running = RunningStatistic()
+        for value in values:
+            running.update(value)
+        self.assertEqual(running.count, len(values))
+        self.assertAlmostEqual(running.mean, statistics.mean(values))
+        self.assertAlmostEqual(running.std, statistics.stdev(values))
+        self.assertEqual((running.minimum, running.maximum), (9.5, 13.0))
+
+    def test_one_value_has_no_deviation(self) -> None:
+        running = RunningStatistic()
+        running.update(5)
+        self.assertEqual(running.to_dict(), {"mean": 5.0, "std": 0.0, "min": 5, "max": 5})
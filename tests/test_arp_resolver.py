@@ -0,0 +1,43 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from plugin2544.plugin import arp_request
+from plugin2544.plugin.arp_request import ArpResolver
+from plugin2544.utils.field import IPv4Address, MacAddress
+
+
+class FakeStream:
+    async def delete(self) -> None:
+        pass
+
+
+async def create_arp_stream(port_struct) -> FakeStream:
+    await asyncio.sleep(0.01)
+    return FakeStream()
+
+
+async def send_arp_request(stream, packet_header) -> MacAddress:
+    await asyncio.sleep(0.01)
+    return MacAddress("00:00:00:00:00:01")
+
+
+class ArpResolverTest(unittest.TestCase):
+    def test_concurrent_resolves_keep_the_stream_cap(self) -> None:
+        port_struct = SimpleNamespace(port_identity=SimpleNamespace(name="P-0-0-0"))
+        resolver = ArpResolver(streams_per_port=2)
+
+        async def resolve_all() -> None:
+            await asyncio.gather(
+                *[
+                    resolver.resolve(port_struct, IPv4Address("10.0.0.1"), IPv4Address(f"10.0.1.{i}"))
+                    for i in range(10)
+                ]
+            )
+
+        with mock.patch.object(arp_request, "create_arp_stream", create_arp_stream), \
+                mock.patch.object(arp_request, "send_arp_request", send_arp_request), \
+                mock.patch.object(arp_request, "get_packet_header", lambda *args: ""):
+            asyncio.run(resolve_all())
+        self.assertEqual(len(resolver._streams["P-0-0-0"]), 2)
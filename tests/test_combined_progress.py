@@ -0,0 +1,41 @@
+import unittest
+
+from plugin2889.const import TestType
+from plugin2889.plugin.test_planner import CombinedProgress
+
+
+class FakeXOAOut:
+    def __init__(self) -> None:
+        self.progress = []
+        self.statistics = []
+
+    def send_statistics(self, data) -> None:
+        self.statistics.append(data)
+
+    def send_warning(self, warning: Exception) -> None:
+        pass
+
+    def send_progress(self, progress: int) -> None:
+        self.progress.append(progress)
+
+    def send_error(self, error: Exception) -> None:
+        pass
+
+
+class CombinedProgressTest(unittest.TestCase):
+    def test_interleaved_progress_is_combined(self) -> None:
+        xoa_out = FakeXOAOut()
+        progress = CombinedProgress(xoa_out, [TestType.RATE_TEST, TestType.CONGESTION_CONTROL])
+        rate_out = progress.out(TestType.RATE_TEST)
+        congestion_out = progress.out(TestType.CONGESTION_CONTROL)
+        for value in (20, 40, 60):
+            rate_out.send_progress(value + 20)
+            congestion_out.send_progress(value)
+        progress.finish(TestType.RATE_TEST)
+        congestion_out.send_statistics({"test_type": TestType.CONGESTION_CONTROL})
+        self.assertEqual(xoa_out.progress, [20, 30, 40, 50, 60, 70, 80])
+        self.assertEqual(xoa_out.statistics, [{"test_type": TestType.CONGESTION_CONTROL}])
+
+
+if __name__ == "__main__":
+    unittest.main()
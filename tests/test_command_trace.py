@@ -0,0 +1,42 @@
+import asyncio
+import unittest
+
+from plugin2544.plugin.command_trace import CommandTracer, trace_phase
+from simulator.chassis import SimulatedNetwork
+from simulator.tester import SimulatedL23Tester
+
+
+class CommandTracerTest(unittest.TestCase):
+    def test_concurrent_tracers_record_their_own_testers(self) -> None:
+        async def run() -> None:
+            network = SimulatedNetwork()
+            first = await SimulatedL23Tester(network, "first")
+            second = await SimulatedL23Tester(network, "second")
+
+            async def traced(tester: SimulatedL23Tester, count: int) -> CommandTracer:
+                tracer = CommandTracer().install([tester])
+                try:
+                    with trace_phase("collect"):
+                        for _ in range(count):
+                            await tester.name.get()
+                            await asyncio.sleep(0)
+                finally:
+                    tracer.uninstall()
+                return tracer
+
+            first_tracer, second_tracer = await asyncio.gather(traced(first, 3), traced(second, 5))
+            self.assertEqual([record.name for record in first_tracer.records], ["C_NAME"] * 3)
+            self.assertEqual([record.name for record in second_tracer.records], ["C_NAME"] * 5)
+            self.assertEqual([span.name for span in first_tracer.spans], ["collect"])
+            self.assertEqual([span.name for span in second_tracer.spans], ["collect"])
+
+            tracer = CommandTracer().install([first])
+            try:
+                with self.assertRaises(RuntimeError):
+                    CommandTracer().install([first])
+            finally:
+                tracer.uninstall()
+            await first.name.get()
+            self.assertEqual(tracer.records, [])
+
+        asyncio.run(run())
@@ -0,0 +1,44 @@
+import unittest
+
+from plugin2544.plugin.learning import get_address_list
+from plugin2544.utils.field import IPv4Address, IPv6Address
+
+
+class GetAddressListTest(unittest.TestCase):
+    def test_no_range_is_the_source_address(self) -> None:
+        source_ip = IPv4Address("10.0.0.1")
+        self.assertEqual(get_address_list(source_ip, None, 0, ""), [source_ip])
+
+    def test_ipv4_last_byte(self) -> None:
+        addresses = get_address_list(IPv4Address("10.0.3.7"), range(1, 4), 2, "00FF")
+        self.assertEqual(addresses, [IPv4Address(f"10.0.3.{i}") for i in (1, 2, 3)])
+
+    def test_ipv4_range_above_255(self) -> None:
+        addresses = get_address_list(IPv4Address("10.0.0.0"), range(250, 300, 10), 2, "FFFF")
+        self.assertEqual(
+            [str(address) for address in addresses],
+            ["10.0.0.250", "10.0.1.4", "10.0.1.14", "10.0.1.24", "10.0.1.34"],
+        )
+
+    def test_ipv4_full_modifier_range(self) -> None:
+        addresses = get_address_list(IPv4Address("192.168.1.1"), range(0, 65536, 65535), 2, "FFFF0000")
+        self.assertEqual(addresses, [IPv4Address("192.168.0.0"), IPv4Address("192.168.255.255")])
+
+    def test_ipv4_modifier_inside_the_address(self) -> None:
+        addresses = get_address_list(IPv4Address("10.1.2.3"), range(0x0506, 0x0508), 1, "FFFF")
+        self.assertEqual(addresses, [IPv4Address("10.5.6.3"), IPv4Address("10.5.7.3")])
+
+    def test_ipv6_values_are_hex_groups(self) -> None:
+        addresses = get_address_list(IPv6Address("2001:db8::"), range(10, 12), 14, "FFFF")
+        self.assertEqual(addresses, [IPv6Address("2001:db8::a"), IPv6Address("2001:db8::b")])
+
+    def test_ipv6_range_above_255(self) -> None:
+        addresses = get_address_list(IPv6Address("2001:db8::1:0"), range(255, 258), 14, "FFFF")
+        self.assertEqual(
+            [str(address) for address in addresses],
+            ["2001:db8::1:ff", "2001:db8::1:100", "2001:db8::1:101"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from plugin2889.dataset import StatisticsData
+from plugin2889.resource import _port_statistics
+from plugin2889.resource._port_statistics import PortStatistics
+
+
+def reply(**values: int) -> SimpleNamespace:
+    async def get() -> SimpleNamespace:
+        return SimpleNamespace(**values)
+    return SimpleNamespace(get=get)
+
+
+class FakeRxTpld:
+    def __init__(self, packet: int) -> None:
+        self.traffic = reply(packet_count_since_cleared=packet, packet_count_last_sec=packet, bit_count_last_sec=packet * 512)
+        self.latency = reply(min_val=1000, max_val=1000, avg_val=1000)
+        self.jitter = reply(min_val=0, max_val=0, avg_val=0)
+        self.errors = reply(non_incre_seq_event_count=0)
+
+
+class FakePort:
+    def __init__(self, rx_packets: dict) -> None:
+        self.statistics = SimpleNamespace(
+            rx=SimpleNamespace(access_tpld=lambda tpld_id: FakeRxTpld(rx_packets[tpld_id])),
+        )
+
+
+async def apply_all(tokens: list) -> list:
+    return await asyncio.gather(*tokens)
+
+
+class CollectRxByStreamsTest(unittest.TestCase):
+    def test_duplicated_tpld_id_is_read_once(self) -> None:
+        # source port id tpld allocation: one source port sends the same tpld id to two destinations
+        stream = SimpleNamespace(tpld_id=3, packet_size=64)
+        source = SimpleNamespace(streams=[stream, SimpleNamespace(tpld_id=3, packet_size=64)])
+        statistics = PortStatistics(FakePort({3: 100}), [], "P-0-0-1")
+        statistics.add_tx_resources(source, 3)
+        result = StatisticsData()
+        with mock.patch.object(_port_statistics, "_apply_all", apply_all):
+            asyncio.run(statistics.collect_rx_by_streams(result, 64))
+        self.assertEqual(result.rx_packet, 100)
+        self.assertEqual(list(result.per_rx_tpld_id), [3])
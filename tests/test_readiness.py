@@ -0,0 +1,41 @@
+import asyncio
+import time
+import unittest
+
+from plugin2544.plugin.readiness import ReadinessMonitor
+from plugin2544.utils import constants as const
+
+
+class CountingMonitor(ReadinessMonitor):
+    """ counters stop changing after change_second, traffic is already stopped """
+
+    def __init__(self, change_second: float) -> None:
+        super().__init__(resources=None)
+        self.change_until = time.time() + change_second
+        self.count = 0
+
+    async def _query_traffic_stopped(self) -> bool:
+        return True
+
+    async def _read_port_totals(self):
+        if time.time() < self.change_until:
+            self.count += 1
+        return [(self.count, self.count)]
+
+
+class ReadinessTest(unittest.TestCase):
+    def test_counters_settle_after_the_whole_window(self) -> None:
+        monitor = CountingMonitor(change_second=0.25)
+        start_time = time.time()
+        asyncio.run(monitor.wait_counters_settled(settle_second=0.5, timeout=5))
+        self.assertGreater(time.time() - start_time, 0.65)  # last change read at about 0.2s
+        self.assertEqual(monitor.records[const.WaitState.COUNTERS_SETTLED].timeout_count, 0)
+
+    def test_counters_not_settled_before_timeout(self) -> None:
+        monitor = CountingMonitor(change_second=0.0)
+        asyncio.run(monitor.wait_counters_settled(settle_second=1, timeout=0.5))
+        self.assertEqual(monitor.records[const.WaitState.COUNTERS_SETTLED].timeout_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,30 @@
+import asyncio
+import unittest
+
+from plugin2544.utils.scheduler import Scheduler
+
+
+async def fail(count: int) -> bool:
+    raise ValueError("poll failed")
+
+
+class SchedulerStopTest(unittest.TestCase):
+    def test_stop_raises_the_job_error(self) -> None:
+        async def run() -> None:
+            scheduler = Scheduler()
+            scheduler.schedule(1, "s", fail)
+            await asyncio.sleep(0)
+            await scheduler.stop()
+
+        with self.assertRaises(ValueError):
+            asyncio.run(run())
+
+    def test_stop_returns_the_job_error_without_raising(self) -> None:
+        async def run() -> list:
+            scheduler = Scheduler()
+            scheduler.schedule(1, "s", fail)
+            await asyncio.sleep(0)
+            return await scheduler.stop(raise_error=False)
+
+        errors = asyncio.run(run())
+        self.assertEqual([str(error) for error in errors], ["poll failed"])
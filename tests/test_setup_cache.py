@@ -0,0 +1,31 @@
+import unittest
+from types import SimpleNamespace
+
+from xoa_core.types import PortIdentity
+
+from plugin2889.dataset import PortPair
+from plugin2889.resource.setup_cache import PortSetupCache
+
+
+class PortSetupCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache = PortSetupCache()
+        self.port = PortIdentity(tester_id="t0", module_index=0, port_index=0)
+        self.port_config = SimpleNamespace(json=lambda: '{"port_slot": "P-t0-0-0"}')
+        self.pairs = [PortPair(west="P-t0-0-0", east="P-t0-0-1")]
+        self.cache.keep(self.port, self.port_config, self.pairs, [])
+
+    def test_same_config_and_pairs_keep_the_setup(self) -> None:
+        self.assertIsNotNone(self.cache.kept_setup(self.port, self.port_config, list(self.pairs)))
+
+    def test_other_pairs_do_not_keep_the_setup(self) -> None:
+        pairs = [PortPair(west="P-t0-0-0", east="P-t0-0-2")]
+        self.assertIsNone(self.cache.kept_setup(self.port, self.port_config, pairs))
+        self.assertIsNone(self.cache.kept_setup(self.port, self.port_config, self.pairs + pairs))
+
+    def test_saved_time_is_measured_against_full_setups(self) -> None:
+        self.assertIsNone(self.cache.saved_second)
+        self.cache.add_setup_time(8.0, kept=False)
+        self.cache.add_setup_time(10.0, kept=False)
+        self.cache.add_setup_time(2.5, kept=True)
+        self.assertEqual(self.cache.saved_second, 6.5)
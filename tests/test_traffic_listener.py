@@ -0,0 +1,37 @@
+import asyncio
+import unittest
+
+from plugin2889.resource import manager
+
+
+class FakePort:
+    def __init__(self) -> None:
+        self.callbacks = []
+
+    def on_traffic_change(self, callback) -> None:
+        self.callbacks.append(callback)
+
+    def push(self, on_off: int) -> None:
+        for callback in self.callbacks:
+            asyncio.run(callback(self, on_off))
+
+
+class TrafficListenerTest(unittest.TestCase):
+    def test_port_subscribes_once_and_only_the_current_manager_is_called(self) -> None:
+        port = FakePort()
+        calls = []
+
+        async def first(port: FakePort, on_off: int) -> None:
+            calls.append(("first", on_off))
+
+        async def second(port: FakePort, on_off: int) -> None:
+            calls.append(("second", on_off))
+
+        manager._listen_traffic_change(port, first)
+        port.push(1)
+        manager._listen_traffic_change(port, None)  # first manager freed the port
+        port.push(0)
+        manager._listen_traffic_change(port, second)
+        port.push(1)
+        self.assertEqual(len(port.callbacks), 1)
+        self.assertEqual(calls, [("first", 1), ("second", 1)])